@@ -0,0 +1,87 @@
+"""
+峰值和异常检测
+在写入Excel之前对 [天, 序列] 数值矩阵一次性计算，返回需要高亮的单元格坐标
+- peak: 每个序列每周的最高值
+- outlier: 居中窗口中位数/MAD稳健z分数超过阈值的异常值
+- jump: 周平均值环比变化超过阈值的周（该周所有行）
+"""
+
+import numpy as np
+import pandas as pd
+from weekly_stats import week_start_days
+from config import ANOMALY_CONFIG
+
+# 按整列计算异常值时至少需要的数据个数
+MIN_VALUES = 3
+
+def _week_starts(dates):
+    """日期已按升序排列时，每周第一行的行号"""
+    keys = week_start_days(dates)
+    return np.flatnonzero(np.r_[True, np.diff(keys) != 0])
+
+def weekly_peaks(dates, values):
+    """每个序列每周最高值所在位置的布尔矩阵（同一周并列最高值都标出）"""
+    if not len(values):
+        return np.zeros(values.shape, dtype=bool)
+    starts = _week_starts(dates)
+    counts = np.diff(np.r_[starts, len(values)])
+    maxes = np.fmax.reduceat(values, starts, axis=0)
+    return values == np.repeat(maxes, counts, axis=0)
+
+def mad_outliers(values, window=None, min_periods=None, threshold=None):
+    """
+    稳健z分数异常值的布尔矩阵
+    中位数和MAD取以当天为中心的窗口，报告开头几天也能判断；
+    序列数据少于min_periods时改用整列的中位数和MAD（至少MIN_VALUES个数据）
+    MAD为0（大部分数值相同）时按平均绝对偏差计算，单个尖峰仍能标出
+    """
+    window = window or ANOMALY_CONFIG['mad_window']
+    min_periods = min_periods or ANOMALY_CONFIG['mad_min_periods']
+    threshold = threshold or ANOMALY_CONFIG['mad_threshold']
+
+    frame = pd.DataFrame(values)
+    enough = frame.count() >= MIN_VALUES
+
+    def rolling(data):
+        return data.rolling(window, min_periods=min(min_periods, window), center=True)
+
+    median = rolling(frame).median().fillna(frame.median().where(enough))
+    deviation = (frame - median).abs()
+    mad = rolling(deviation).median().fillna(deviation.median().where(enough)).to_numpy()
+    mean_deviation = rolling(deviation).mean().fillna(deviation.mean().where(enough)).to_numpy()
+    deviation = deviation.to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        score = np.where(mad > 0, 0.6745 * deviation / mad, deviation / (1.253314 * mean_deviation))
+    return score > threshold
+
+def week_over_week_jumps(dates, values, threshold=None):
+    """周平均值环比变化超过阈值的布尔矩阵，标出突变周的所有行"""
+    threshold = threshold or ANOMALY_CONFIG['jump_threshold']
+    if not len(values):
+        return np.zeros(values.shape, dtype=bool)
+
+    starts = _week_starts(dates)
+    counts = np.diff(np.r_[starts, len(values)])
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0), starts, axis=0)
+    sizes = np.add.reduceat(present, starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / sizes
+        change = np.abs(means[1:] / means[:-1] - 1)
+    jumped = np.vstack([np.zeros((1, values.shape[1]), dtype=bool), (means[:-1] > 0) & (change > threshold)])
+    return np.repeat(jumped, counts, axis=0)
+
+def detect(dates, values):
+    """
+    检测峰值、异常值和周环比突变
+    dates: 升序日期序列；values: [天, 序列] 数值矩阵，缺失值为NaN
+    返回 {类型: (行号数组, 列号数组)}，行列均为矩阵中的0起始坐标
+    """
+    values = np.asarray(values, dtype=np.float64)
+    # 条件格式按添加顺序确定优先级，异常值优先于峰值显示
+    masks = {
+        'outlier': mad_outliers(values),
+        'peak': weekly_peaks(dates, values),
+        'jump': week_over_week_jumps(dates, values)
+    }
+    return {kind: np.nonzero(mask) for kind, mask in masks.items()}
@@ -8,9 +8,9 @@ import os
 import sys
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response
 from template_utils import render_template_string
 import threading
 import time
@@ -19,10 +19,15 @@ import time
 sys.path.insert(0, str(Path(__file__).parent))
 
 # 导入我们的模块
-from config import create_directories, get_collection_dates
-from baidu_collector import BaiduIndexCollector
-from wechat_collector import WechatIndexCollector
-from data_processor import DataProcessor
+from config import create_directories, get_collection_dates, DRIVER_POOL_CONFIG, LOG_STREAM_CONFIG, KEYWORDS
+from pipeline import CollectionPipeline
+from driver_pool import get_driver_pool
+from rate_limiter import get_all_stats as get_rate_limit_stats
+from index_store import IndexStore
+from exporter import long_table, to_bytes, has_pyarrow, FILE_NAMES, MIME_TYPES
+from log_stream import EventHub, RingBufferHandler, StatusPublisher
+from job_queue import JobManager, QueueFullError
+from artifact_catalog import get_catalog
 
 # 创建Flask应用
 app = Flask(__name__)
@@ -34,24 +39,55 @@ collection_status = {
     'progress': 0,
     'message': '',
     'last_run': None,
-    'last_report': None
+    'last_report': None,
+    'sources': {}
 }
 
+# 状态变化和新日志都通过event_hub通知推送端
+event_hub = EventHub()
+status_publisher = StatusPublisher(collection_status, event_hub)
+log_buffer = RingBufferHandler(LOG_STREAM_CONFIG['capacity'], event_hub)
+
 # 设置日志
+LOG_FILE = 'logs/app.log'
+# 进程启动时从日志文件末尾预填缓冲区，之后的日志请求只读内存
+log_buffer.preload(LOG_FILE, LOG_STREAM_CONFIG['capacity'])
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('logs/app.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
+        logging.FileHandler(LOG_FILE, encoding='utf-8'),
+        logging.StreamHandler(sys.stdout),
+        log_buffer
     ]
 )
 logger = logging.getLogger(__name__)
 
-@app.route('/')
-def index():
-    """主页"""
-    return render_template_string('''
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """获取共享的数据存储（并发的首次请求只创建一个）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IndexStore()
+        return _store
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """获取收集任务管理器（并发的首次请求只创建一个）"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(store=get_store(), on_update=_on_job_update)
+            _job_manager.start()
+        return _job_manager
+
+# 主页模板（首次渲染时编译并缓存）
+INDEX_TEMPLATE = '''
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -266,21 +302,17 @@ def index():
         
         <div class="status-card">
             <h2>
-                <span class="status-indicator status-{{ 'running' if collection_status.is_running else 'stopped' }}"></span>
-                系统状态: {{ '正在运行' if collection_status.is_running else '待机中' }}
+                <span id="status-indicator" class="status-indicator status-{{ 'running' if collection_status.is_running else 'stopped' }}"></span>
+                系统状态: <span id="status-text">{{ '正在运行' if collection_status.is_running else '待机中' }}</span>
             </h2>
-            {% if collection_status.message %}
-            <p style="margin-top: 10px; color: #666;">{{ collection_status.message }}</p>
-            {% endif %}
+            <p id="status-message" style="margin-top: 10px; color: #666;{{ '' if collection_status.message else ' display: none;' }}">{{ collection_status.message }}</p>
         </div>
         
-        {% if collection_status.is_running %}
-        <div class="progress">
-            <div class="progress-bar" style="width: {{ collection_status.progress }}%">
-                {{ collection_status.progress }}%
+        <div id="progress" class="progress" style="{{ '' if collection_status.is_running else 'display: none;' }}">
+            <div id="progress-bar" class="progress-bar" style="width: {{ collection_status.progress or 0 }}%">
+                {{ collection_status.progress or 0 }}%
             </div>
         </div>
-        {% endif %}
         
         <div class="buttons">
             <a href="/collect" class="btn btn-success">📊 手动收集数据</a>
@@ -347,111 +379,82 @@ def index():
     </div>
     
     <script>
-        // 自动刷新日志
-        function refreshLog() {
-            fetch('/api/log')
-                .then(response => response.json())
-                .then(data => {
-                    const logContent = document.getElementById('log-content');
-                    if (data.logs && data.logs.length > 0) {
-                        logContent.innerHTML = data.logs.map(log => 
-                            `<p style="color: ${log.level === 'ERROR' ? '#ff6b6b' : log.level === 'WARNING' ? '#ffd93d' : '#ffffff'};">${log.time} - ${log.level} - ${log.message}</p>`
-                        ).join('');
-                    }
-                })
-                .catch(error => {
-                    console.error('Failed to fetch logs:', error);
-                });
-        }
-        
-        // 每5秒刷新一次日志
-        setInterval(refreshLog, 5000);
-        
-        // 页面加载完成后立即刷新一次
-        document.addEventListener('DOMContentLoaded', refreshLog);
+        const MAX_LOG_LINES = 200;
+        
+        // 更新状态卡片和进度条
+        function renderStatus(status) {
+            document.getElementById('status-indicator').className =
+                'status-indicator status-' + (status.is_running ? 'running' : 'stopped');
+            document.getElementById('status-text').textContent = status.is_running ? '正在运行' : '待机中';
+            
+            const message = document.getElementById('status-message');
+            message.textContent = status.message || '';
+            message.style.display = status.message ? '' : 'none';
+            
+            const progress = document.getElementById('progress');
+            const bar = document.getElementById('progress-bar');
+            progress.style.display = status.is_running ? '' : 'none';
+            bar.style.width = status.progress + '%';
+            bar.textContent = status.progress + '%';
+        }
+        
+        // 追加一条日志，只保留最近MAX_LOG_LINES行
+        function appendLog(log) {
+            const logContent = document.getElementById('log-content');
+            if (logContent.dataset.started !== 'true') {
+                logContent.innerHTML = '';
+                logContent.dataset.started = 'true';
+            }
+            const line = document.createElement('p');
+            line.style.color = log.level === 'ERROR' ? '#ff6b6b' : log.level === 'WARNING' ? '#ffd93d' : '#ffffff';
+            line.textContent = `${log.time} - ${log.level} - ${log.message}`;
+            logContent.appendChild(line);
+            while (logContent.childElementCount > MAX_LOG_LINES) {
+                logContent.removeChild(logContent.firstElementChild);
+            }
+            logContent.scrollTop = logContent.scrollHeight;
+        }
+        
+        // 服务器推送状态和日志，断线后浏览器自动重连并从Last-Event-ID继续
+        const stream = new EventSource('/api/stream');
+        stream.addEventListener('status', event => renderStatus(JSON.parse(event.data)));
+        stream.addEventListener('log', event => appendLog(JSON.parse(event.data)));
+        stream.onerror = () => console.error('日志推送连接中断，正在重连');
     </script>
 </body>
 </html>
-''')
+'''
+
+@app.route('/')
+def index():
+    """主页"""
+    return render_template_string(INDEX_TEMPLATE, collection_status=status_publisher.snapshot()[1])
 
 @app.route('/collect')
 def collect():
-    """手动收集数据"""
-    if collection_status['is_running']:
-        return jsonify({'error': '数据收集正在进行中，请稍候'}), 400
-    
-    # 在新线程中运行收集任务
-    thread = threading.Thread(target=run_collection_task)
-    thread.start()
+    """手动收集数据（提交一个默认日期范围和关键词的收集任务）"""
+    start_date, end_date = get_collection_dates()
+    try:
+        job = get_job_manager().submit(start_date, end_date)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
     
-    return jsonify({'message': '数据收集任务已启动'})
+    return jsonify({'message': '数据收集任务已提交', 'job_id': job.id}), 202
 
-def run_collection_task():
-    """运行收集任务"""
-    collection_status['is_running'] = True
-    collection_status['progress'] = 0
-    collection_status['message'] = '正在收集数据...'
-    
-    try:
-        logger.info("开始数据收集任务")
-        
-        # 获取收集日期
-        start_date, end_date = get_collection_dates()
-        logger.info(f"收集日期范围: {start_date} 到 {end_date}")
-        
-        collection_status['progress'] = 10
-        
-        # 收集百度指数数据
-        logger.info("开始收集百度指数数据")
-        collection_status['message'] = '正在收集百度指数数据...'
-        
-        baidu_collector = BaiduIndexCollector(headless=True)
-        baidu_data = baidu_collector.collect_baidu_index_data(start_date, end_date)
-        
-        collection_status['progress'] = 40
-        
-        # 收集微信指数数据
-        logger.info("开始收集微信指数数据")
-        collection_status['message'] = '正在收集微信指数数据...'
-        
-        wechat_collector = WechatIndexCollector(headless=True)
-        wechat_data = wechat_collector.collect_wechat_index_data(start_date, end_date)
-        
-        collection_status['progress'] = 70
-        
-        # 处理数据
-        logger.info("开始处理数据")
-        collection_status['message'] = '正在处理数据...'
-        
-        processor = DataProcessor()
-        processor.process_baidu_data(baidu_data)
-        processor.process_wechat_data(wechat_data)
-        
-        collection_status['progress'] = 90
-        
-        # 生成报告
-        logger.info("生成Excel报告")
-        collection_status['message'] = '正在生成Excel报告...'
-        
-        output_path = f"data/运营商指数报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        if processor.generate_excel_report(output_path):
-            logger.info(f"Excel报告生成成功: {output_path}")
-            collection_status['last_report'] = output_path
-        else:
-            logger.error("Excel报告生成失败")
-        
-        collection_status['progress'] = 100
-        collection_status['message'] = '数据收集完成'
-        collection_status['last_run'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        logger.info("数据收集任务完成")
-        
-    except Exception as e:
-        logger.error(f"数据收集失败: {str(e)}")
-        collection_status['message'] = f'数据收集失败: {str(e)}'
-    finally:
-        collection_status['is_running'] = False
-        collection_status['progress'] = 0
+def _on_job_update(job):
+    """任务状态变化时同步到页面状态卡片（显示最近变化的任务）"""
+    changes = {
+        'is_running': get_job_manager().running(),
+        'progress': job.progress if not job.finished else 0,
+        'message': job.message,
+        'sources': job.source_status,
+        'job_id': job.id
+    }
+    if job.status == 'done':
+        changes['last_run'] = job.finished_at.strftime('%Y-%m-%d %H:%M:%S')
+        if job.result and job.result['report_path']:
+            changes['last_report'] = job.result['report_path']
+    status_publisher.update(**changes)
 
 @app.route('/schedule/<action>')
 def schedule_control(action):
@@ -464,24 +467,45 @@ def schedule_control(action):
     else:
         return jsonify({'error': '未知操作'}), 400
 
+def _catalog_page(kind):
+    """按请求参数（offset, limit, source, keyword, since, until）查询目录索引，返回 (结果, 错误信息)"""
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        if limit is not None and limit < 1:
+            raise ValueError(limit)
+        since = datetime.strptime(request.args['since'], '%Y-%m-%d') if request.args.get('since') else None
+        until = datetime.strptime(request.args['until'], '%Y-%m-%d') + timedelta(days=1) if request.args.get('until') else None
+    except ValueError:
+        return None, 'offset应为整数，limit应为正整数，since和until格式应为YYYY-MM-DD'
+    
+    page = get_catalog().query(kind, offset, limit, source=request.args.get('source'),
+                               keyword=request.args.get('keyword'), since=since, until=until)
+    for item in page['items']:
+        item['created'] = datetime.fromtimestamp(item.pop('mtime')).strftime('%Y-%m-%d %H:%M:%S')
+    return page, None
+
 @app.route('/report')
 def report():
-    """查看报告"""
-    data_dir = Path('data')
-    if not data_dir.exists():
-        return jsonify({'message': '暂无报告，请先收集数据'})
+    """查看报告（分页，最新的在前）"""
+    page, error = _catalog_page('report')
+    if error:
+        return jsonify({'error': error}), 400
     
-    reports = sorted(data_dir.glob('*.xlsx'), reverse=True)
-    
-    if not reports:
+    if not get_catalog().count('report'):
         return jsonify({'message': '暂无报告，请先收集数据'})
     
-    latest_report = reports[0]
+    latest_report = get_catalog().query('report', limit=1)['items'][0]['name']
     
     return jsonify({
-        'latest_report': latest_report.name,
-        'download_url': f'/download/{latest_report.name}',
-        'all_reports': [report.name for report in reports[:10]]
+        'latest_report': latest_report,
+        'download_url': f'/download/{latest_report}',
+        'all_reports': [item['name'] for item in page['items']],
+        'reports': [dict(item, download_url=f"/download/{item['name']}") for item in page['items']],
+        'total': page['total'],
+        'offset': page['offset'],
+        'limit': page['limit'],
+        'next_offset': page['next_offset']
     })
 
 @app.route('/download/<filename>')
@@ -495,22 +519,29 @@ def download(filename):
 
 @app.route('/screenshots')
 def screenshots():
-    """查看截图"""
-    screenshots_dir = Path('screenshots')
-    if not screenshots_dir.exists():
-        return jsonify({'message': '暂无截图'})
+    """查看截图（分页，最新的在前）"""
+    page, error = _catalog_page('screenshot')
+    if error:
+        return jsonify({'error': error}), 400
     
-    screenshots = sorted(screenshots_dir.glob('*.png'), reverse=True)
+    if not get_catalog().count('screenshot'):
+        return jsonify({'message': '暂无截图'})
     
     return jsonify({
         'screenshots': [
             {
-                'filename': screenshot.name,
-                'url': f'/screenshot/{screenshot.name}',
-                'created': datetime.fromtimestamp(screenshot.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                'filename': item['name'],
+                'url': f"/screenshot/{item['name']}",
+                'created': item['created'],
+                'size': item['size'],
+                'source': item['source']
             }
-            for screenshot in screenshots[:20]
-        ]
+            for item in page['items']
+        ],
+        'total': page['total'],
+        'offset': page['offset'],
+        'limit': page['limit'],
+        'next_offset': page['next_offset']
     })
 
 @app.route('/screenshot/<filename>')
@@ -524,34 +555,206 @@ def screenshot(filename):
 
 @app.route('/api/log')
 def api_log():
-    """API: 获取日志"""
-    log_file = Path('logs/app.log')
-    if not log_file.exists():
-        return jsonify({'logs': []})
-    
+    """
+    API: 获取日志
+    since=<seq> 只返回序号大于seq的新日志，不带since时返回最近的日志
+    返回的seq作为下一次请求的since
+    """
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        logs = []
-        for line in lines[-50:]:  # 只显示最近50行
-            if ' - ' in line:
-                parts = line.strip().split(' - ', 3)
-                if len(parts) >= 4:
-                    logs.append({
-                        'time': parts[0],
-                        'level': parts[2],
-                        'message': parts[3]
-                    })
-        
-        return jsonify({'logs': logs})
-    except Exception as e:
-        return jsonify({'logs': [{'time': '', 'level': 'ERROR', 'message': f'读取日志失败: {str(e)}'}]})
+        since = int(request.args['since']) if request.args.get('since') else None
+        limit = int(request.args.get('limit', LOG_STREAM_CONFIG['initial_lines']))
+    except ValueError:
+        return jsonify({'error': 'since和limit应为整数'}), 400
+    # limit限制在 1..缓冲区容量
+    limit = min(max(1, limit), LOG_STREAM_CONFIG['capacity'])
+    if since is not None and since > log_buffer.latest_seq():
+        # 服务重启后序号重新计数，旧的since改为返回最近的日志
+        since = None
+    
+    logs = log_buffer.since(since, limit) if since is not None else log_buffer.tail(limit)
+    return jsonify({'logs': logs, 'seq': logs[-1]['seq'] if logs else (since if since is not None else log_buffer.latest_seq())})
 
 @app.route('/api/status')
 def api_status():
-    """API: 获取状态"""
-    return jsonify(collection_status)
+    """API: 获取状态（任务线程会同时更新状态，返回加锁取得的副本）"""
+    return jsonify(status_publisher.snapshot()[1])
+
+def _sse(event, data, event_id=None):
+    """格式化一条Server-Sent Events消息"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+@app.route('/api/stream')
+def api_stream():
+    """API: 以Server-Sent Events推送收集状态和新日志"""
+    # 浏览器重连时带上最后收到的日志序号，只补发之后的日志
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID') or request.args.get('since', ''))
+    except ValueError:
+        last_seq = None
+    if last_seq is None or last_seq > log_buffer.latest_seq():
+        # 服务重启后序号重新计数，旧的Last-Event-ID比当前序号大，改为从最近的日志开始
+        last_seq = max(0, log_buffer.latest_seq() - LOG_STREAM_CONFIG['initial_lines'])
+    
+    def generate():
+        seq = last_seq
+        status_version = None
+        hub_version = event_hub.version
+        yield 'retry: 3000\n\n'
+        while True:
+            version, status = status_publisher.snapshot()
+            if version != status_version:
+                status_version = version
+                yield _sse('status', status)
+            for record in log_buffer.since(seq):
+                seq = record['seq']
+                yield _sse('log', record, record['seq'])
+            
+            new_version = event_hub.wait(hub_version, timeout=LOG_STREAM_CONFIG['heartbeat'])
+            if new_version == hub_version:
+                # 注释行作为心跳，保持连接并及时发现客户端断开
+                yield ': keepalive\n\n'
+            hub_version = new_version
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/driver_pool')
+def api_driver_pool():
+    """API: 获取浏览器驱动池状态"""
+    return jsonify(get_driver_pool().get_stats())
+
+@app.route('/api/rate_limits')
+def api_rate_limits():
+    """API: 获取各数据源的限速和熔断状态"""
+    return jsonify(get_rate_limit_stats())
+
+@app.route('/api/series')
+def api_series():
+    """API: 查询已存储的指数序列"""
+    source = request.args.get('source', 'baidu')
+    metric = request.args.get('metric', 'search')
+    default_start, default_end = get_collection_dates()
+    
+    try:
+        start_date = datetime.strptime(request.args.get('start', default_start.strftime('%Y-%m-%d')), '%Y-%m-%d')
+        end_date = datetime.strptime(request.args.get('end', default_end.strftime('%Y-%m-%d')), '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': '日期格式应为YYYY-MM-DD'}), 400
+    
+    keywords = request.args.getlist('keyword') or None
+    df = get_store().query_frame(source, metric, start_date, end_date, keywords)
+    
+    return jsonify({
+        'source': source,
+        'metric': metric,
+        'dates': df.index.strftime('%Y-%m-%d').tolist(),
+        'series': {
+            keyword: [None if value != value else value for value in df[keyword].tolist()]
+            for keyword in df.columns
+        }
+    })
+
+@app.route('/api/export')
+def api_export():
+    """API: 导出长表数据（parquet/feather/csv）"""
+    fmt = request.args.get('format', 'parquet' if has_pyarrow() else 'csv')
+    if fmt not in FILE_NAMES:
+        return jsonify({'error': f'不支持的导出格式: {fmt}'}), 400
+    if fmt != 'csv' and not has_pyarrow():
+        return jsonify({'error': '服务器未安装pyarrow，只能导出csv'}), 400
+    default_start, default_end = get_collection_dates()
+    
+    try:
+        start_date = datetime.strptime(request.args.get('start', default_start.strftime('%Y-%m-%d')), '%Y-%m-%d')
+        end_date = datetime.strptime(request.args.get('end', default_end.strftime('%Y-%m-%d')), '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': '日期格式应为YYYY-MM-DD'}), 400
+    
+    sources = request.args.getlist('source') or None
+    df = long_table(get_store(), start_date, end_date, sources)
+    extension = FILE_NAMES[fmt].split('.', 1)[1]
+    filename = f"index_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.{extension}"
+    return send_file(to_bytes(df, fmt), mimetype=MIME_TYPES[fmt], as_attachment=True, download_name=filename)
+
+def _parse_job_request(data):
+    """解析提交任务的请求体，返回 (参数, 错误信息)"""
+    if not isinstance(data, dict):
+        return None, '请求体应为JSON对象'
+    default_start, default_end = get_collection_dates()
+    try:
+        start_date = datetime.strptime(data.get('start') or default_start.strftime('%Y-%m-%d'), '%Y-%m-%d')
+        end_date = datetime.strptime(data.get('end') or default_end.strftime('%Y-%m-%d'), '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None, '日期格式应为YYYY-MM-DD'
+    if start_date > end_date:
+        return None, '开始日期不能晚于结束日期'
+    
+    sources = data.get('sources') or list(CollectionPipeline.SOURCES)
+    if isinstance(sources, str):
+        sources = [sources]
+    if not isinstance(sources, list) or not all(isinstance(source, str) for source in sources):
+        return None, 'sources应为数据源名称列表'
+    unknown = [source for source in sources if source not in CollectionPipeline.SOURCES]
+    if unknown:
+        return None, f"未知数据源: {', '.join(map(str, unknown))}"
+    
+    # keywords可以是所有数据源共用的列表，也可以是 {数据源: 关键词列表}
+    keywords = data.get('keywords')
+    if keywords is not None:
+        if isinstance(keywords, list):
+            keywords = {source: keywords for source in CollectionPipeline.SOURCES}
+        if not isinstance(keywords, dict):
+            return None, 'keywords应为关键词列表或 {数据源: 关键词列表}'
+        keywords = dict(KEYWORDS, **keywords)
+        for source in sources:
+            words = keywords.get(source)
+            if not isinstance(words, list) or not words or not all(isinstance(word, str) and word for word in words):
+                return None, f"{source}的关键词应为非空字符串列表"
+    
+    return {'start_date': start_date, 'end_date': end_date, 'keywords': keywords, 'sources': sources}, None
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """API: 提交收集任务（JSON: start, end, keywords, sources，均可省略）"""
+    params, error = _parse_job_request(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        job = get_job_manager().submit(**params)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    response = jsonify(job.to_dict())
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response, 202
+
+@app.route('/api/jobs', methods=['GET'])
+def api_list_jobs():
+    """API: 任务列表（最新的在前）"""
+    return jsonify({'jobs': [job.to_dict() for job in get_job_manager().list()]})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """API: 任务状态、进度和结果"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    """API: 取消任务"""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job.to_dict())
 
 @app.route('/api/collect', methods=['POST'])
 def api_collect():
@@ -571,13 +774,22 @@ def docs():
             'GET /': '主页',
             'GET /collect': '手动收集数据',
             'GET /schedule/<action>': '定时任务控制',
-            'GET /report': '查看报告',
+            'GET /report': '查看报告（offset, limit, source, keyword, since, until；total为过滤后的条数）',
             'GET /download/<filename>': '下载报告',
-            'GET /screenshots': '查看截图',
+            'GET /screenshots': '查看截图（offset, limit, source, since, until；total为过滤后的条数）',
             'GET /screenshot/<filename>': '查看截图',
-            'GET /api/log': '获取日志',
+            'GET /api/log': '获取日志（since=<seq>只返回新日志）',
             'GET /api/status': '获取状态',
+            'GET /api/stream': '推送收集状态和新日志（Server-Sent Events）',
+            'GET /api/driver_pool': '浏览器驱动池状态',
+            'GET /api/rate_limits': '各数据源的限速和熔断状态',
+            'GET /api/series': '查询已存储的指数序列',
+            'GET /api/export': '导出长表数据（format=parquet/feather/csv）',
             'POST /api/collect': 'API收集数据',
+            'POST /api/jobs': '提交收集任务（start, end, keywords, sources）',
+            'GET /api/jobs': '任务列表',
+            'GET /api/jobs/<id>': '任务状态、进度和结果',
+            'DELETE /api/jobs/<id>': '取消任务',
             'GET /health': '健康检查',
             'GET /docs': 'API文档'
         }
@@ -592,6 +804,10 @@ def run_app():
     os.environ['DISPLAY'] = ':99'
     os.environ['CHROME_BIN'] = 'chromium-browser'
     
+    # 后台预热浏览器驱动池，首次收集无需等待浏览器冷启动
+    if DRIVER_POOL_CONFIG['warm_on_start']:
+        threading.Thread(target=get_driver_pool().warm_up, daemon=True).start()
+    
     print("=" * 60)
     print("🚀 启动运营商指数数据收集工具")
     print("=" * 60)
@@ -602,7 +818,8 @@ def run_app():
     print("=" * 60)
     
     # 运行Flask应用
-    app.run(host='0.0.0.0', port=8080, debug=False)
+    # 每个推送连接占用一个线程
+    app.run(host='0.0.0.0', port=8080, debug=False, threaded=True)
 
 if __name__ == '__main__':
     run_app()
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""
+报告和截图目录索引
+在内存中保存报告（data/*.xlsx）和截图（screenshots/*.png）的名称、大小、修改时间、日期范围和关键词
+- 写入文件的代码调用register立即登记
+- 其他进程（分片收集）写入的文件通过目录修改时间发现：目录未变化时不扫描，变化时重新stat目录中的文件，只更新新增或改写的条目
+- 查询从按修改时间排序的索引中分页取出，不过滤时耗时只与页大小有关
+日期范围和关键词无法从文件本身得到，登记时写入清单文件，重启后恢复
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from itertools import islice
+from config import ARTIFACT_CATALOG_CONFIG, DATA_DIR, SCREENSHOTS_DIR
+
+# 类型 -> (目录, 扩展名)
+KINDS = {
+    'report': (DATA_DIR, '.xlsx'),
+    'screenshot': (SCREENSHOTS_DIR, '.png')
+}
+
+# 截图文件名前缀 -> 数据源
+SCREENSHOT_SOURCES = ('baidu', 'wechat')
+
+def _source_of(kind, name):
+    """从文件名推断数据源（截图文件名以数据源开头，报告包含全部数据源）"""
+    if kind == 'screenshot':
+        prefix = name.split('_', 1)[0]
+        return prefix if prefix in SCREENSHOT_SOURCES else None
+    return None
+
+class ArtifactCatalog:
+    """报告和截图目录索引"""
+
+    def __init__(self, kinds=None, scan_interval=None, manifest_path=None):
+        self.logger = logging.getLogger(__name__)
+        self.kinds = kinds or KINDS
+        self.scan_interval = ARTIFACT_CATALOG_CONFIG['scan_interval'] if scan_interval is None else scan_interval
+        self.manifest_path = manifest_path or ARTIFACT_CATALOG_CONFIG['manifest_file']
+        self._lock = threading.Lock()
+        # 类型 -> {文件名: 条目}
+        self.entries = {kind: {} for kind in self.kinds}
+        # 类型 -> [(修改时间, 文件名)] 升序
+        self.order = {kind: [] for kind in self.kinds}
+        self._dir_mtime = {kind: None for kind in self.kinds}
+        self._checked_at = {kind: 0 for kind in self.kinds}
+        self.metadata = self._load_manifest()
+
+    def _load_manifest(self):
+        """读取登记时保存的日期范围和关键词 {类型: {文件名: 元数据}}"""
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {kind: {} for kind in self.kinds}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {kind: dict(data.get(kind, {})) for kind in self.kinds}
+        except Exception as e:
+            self.logger.error(f"读取目录清单失败: {str(e)}")
+            return {kind: {} for kind in self.kinds}
+
+    def _save_manifest(self):
+        """原子写入清单文件（调用方需持有锁）"""
+        if not self.manifest_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+            temp_path = f"{self.manifest_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            self.logger.error(f"保存目录清单失败: {str(e)}")
+
+    def _make_entry(self, kind, name, stat):
+        metadata = self.metadata[kind].get(name, {})
+        return {
+            'name': name,
+            'kind': kind,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'source': metadata.get('source') or _source_of(kind, name),
+            'start_date': metadata.get('start_date'),
+            'end_date': metadata.get('end_date'),
+            'keywords': metadata.get('keywords') or []
+        }
+
+    def _insert(self, kind, entry):
+        """加入或替换条目（调用方需持有锁）"""
+        self._remove(kind, entry['name'])
+        self.entries[kind][entry['name']] = entry
+        bisect.insort(self.order[kind], (entry['mtime'], entry['name']))
+
+    def _remove(self, kind, name):
+        """删除条目（调用方需持有锁）"""
+        entry = self.entries[kind].pop(name, None)
+        if entry is None:
+            return
+        order = self.order[kind]
+        index = bisect.bisect_left(order, (entry['mtime'], name))
+        if index < len(order) and order[index] == (entry['mtime'], name):
+            del order[index]
+
+    def kind_of(self, path):
+        """文件所属的类型，不在目录中时为None"""
+        directory, name = os.path.split(os.path.abspath(path))
+        for kind, (kind_dir, extension) in self.kinds.items():
+            if directory == os.path.abspath(kind_dir) and name.endswith(extension):
+                return kind
+        return None
+
+    def register(self, path, start_date=None, end_date=None, keywords=None, source=None):
+        """登记刚写入的文件，返回条目；文件不在索引目录中时返回None"""
+        kind = self.kind_of(path)
+        if kind is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            self.logger.error(f"登记文件失败: {str(e)}")
+            return None
+
+        name = os.path.basename(path)
+        metadata = {
+            'source': source,
+            'start_date': start_date.strftime('%Y-%m-%d') if start_date else None,
+            'end_date': end_date.strftime('%Y-%m-%d') if end_date else None,
+            'keywords': keywords or []
+        }
+        with self._lock:
+            if any(metadata.values()):
+                self.metadata[kind][name] = metadata
+                self._save_manifest()
+            entry = self._make_entry(kind, name, stat)
+            self._insert(kind, entry)
+        return entry
+
+    def refresh(self, kind, force=False):
+        """
+        目录修改时间变化时同步新增、删除和改写的文件，两次检查之间至少间隔scan_interval秒
+        原地改写文件不会改变目录修改时间，改写文件的代码需要重新调用register
+        """
+        directory, extension = self.kinds[kind]
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked_at[kind] < self.scan_interval:
+                return
+            self._checked_at[kind] = now
+            try:
+                dir_mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                self.entries[kind] = {}
+                self.order[kind] = []
+                self._dir_mtime[kind] = None
+                return
+            if dir_mtime == self._dir_mtime[kind]:
+                return
+            self._dir_mtime[kind] = dir_mtime
+
+            present = set()
+            with os.scandir(directory) as entries:
+                for item in entries:
+                    if not item.name.endswith(extension) or not item.is_file():
+                        continue
+                    present.add(item.name)
+                    stat = item.stat()
+                    entry = self.entries[kind].get(item.name)
+                    if entry is None or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                        self._insert(kind, self._make_entry(kind, item.name, stat))
+            for name in [name for name in self.entries[kind] if name not in present]:
+                self._remove(kind, name)
+            if any(name not in present for name in self.metadata[kind]):
+                self.metadata[kind] = {name: value for name, value in self.metadata[kind].items() if name in present}
+                self._save_manifest()
+
+    def get(self, kind, name):
+        """单个条目"""
+        self.refresh(kind)
+        with self._lock:
+            return self.entries[kind].get(name)
+
+    def count(self, kind):
+        self.refresh(kind)
+        with self._lock:
+            return len(self.entries[kind])
+
+    def query(self, kind, offset=0, limit=None, source=None, keyword=None, since=None, until=None):
+        """
+        按修改时间从新到旧分页查询
+        source/keyword: 数据源、关键词过滤；since/until: 修改时间范围（datetime）
+        返回 {'items', 'offset', 'limit', 'total', 'next_offset'}，total为过滤后的条数，没有下一页时next_offset为None
+        只按修改时间过滤时total由二分查找得到；按数据源或关键词过滤时需要遍历时间范围内的条目
+        """
+        self.refresh(kind)
+        offset = max(0, offset)
+        limit = max(1, min(limit or ARTIFACT_CATALOG_CONFIG['page_size'], ARTIFACT_CATALOG_CONFIG['max_page_size']))
+        since_ts = since.timestamp() if since else None
+        until_ts = until.timestamp() if until else None
+
+        with self._lock:
+            entries = self.entries[kind]
+            order = self.order[kind]
+            # 修改时间上限在有序索引上二分定位，不用逐个比较
+            end = bisect.bisect_right(order, (until_ts, '\uffff')) if until_ts is not None else len(order)
+            begin = bisect.bisect_left(order, (since_ts, '')) if since_ts is not None else 0
+
+            def selected(name):
+                entry = entries[name]
+                if source and entry['source'] not in (source, None):
+                    return False
+                return not keyword or keyword in entry['keywords']
+
+            def matches():
+                for i in range(end - 1, begin - 1, -1):
+                    name = order[i][1]
+                    if selected(name):
+                        yield dict(entries[name])
+
+            page = list(islice(matches(), offset, offset + limit + 1))
+            if source or keyword:
+                total = sum(1 for i in range(begin, end) if selected(order[i][1]))
+            else:
+                total = max(0, end - begin)
+
+        return {
+            'items': page[:limit],
+            'offset': offset,
+            'limit': limit,
+            'total': total,
+            'next_offset': offset + limit if len(page) > limit else None
+        }
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """获取进程内共享的目录索引"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ArtifactCatalog()
+        return _catalog
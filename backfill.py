@@ -0,0 +1,226 @@
+"""
+历史数据回填
+把较长的日期范围按网站允许的天数切分为区间，用有限的工作线程并行收集并写入存储
+每完成一个区间就写入断点文件，中断后重新运行会跳过已完成的区间
+收集两次后仍没有数据的日期视为网站没有该日数据，记入断点文件，区间照常完成
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import BACKFILL_CONFIG
+from pipeline import CollectionPipeline
+from index_store import IndexStore
+from rate_limiter import CircuitOpenError
+
+def split_chunks(start_date, end_date, chunk_days):
+    """把日期范围从开始日期起切分为固定长度的区间 [(开始, 结束)]，与已有数据无关，断点续传时区间不变"""
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+def chunk_id(source, start_date, end_date):
+    """区间在断点文件中的标识"""
+    return f"{source}:{start_date.strftime('%Y-%m-%d')}:{end_date.strftime('%Y-%m-%d')}"
+
+class Checkpoint:
+    """回填断点文件：记录已完成和失败的区间及网站没有数据的日期，每次更新都原子写入"""
+
+    def __init__(self, path=None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path or BACKFILL_CONFIG['checkpoint_file']
+        self._lock = threading.Lock()
+        self.completed = set()
+        self.failed = {}
+        self.no_data = {}  # 区间标识 -> 网站没有数据的日期
+        self._load()
+
+    def _load(self):
+        """读取已有断点"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.completed = set(data.get('completed', []))
+            self.failed = dict(data.get('failed', {}))
+            self.no_data = dict(data.get('no_data', {}))
+            self.logger.info(f"读取回填断点: 已完成 {len(self.completed)} 个区间")
+        except Exception as e:
+            self.logger.error(f"读取回填断点失败: {str(e)}")
+
+    def _save(self):
+        """原子写入断点文件（调用方需持有锁）"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'completed': sorted(self.completed),
+                'failed': self.failed,
+                'no_data': self.no_data,
+                'updated_at': datetime.now().isoformat()
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def is_done(self, key):
+        with self._lock:
+            return key in self.completed
+
+    def mark_done(self, key, no_data=None):
+        """区间完成，no_data为收集成功但网站没有数据的日期字符串"""
+        with self._lock:
+            self.completed.add(key)
+            self.failed.pop(key, None)
+            if no_data:
+                self.no_data[key] = sorted(no_data)
+            else:
+                self.no_data.pop(key, None)
+            self._save()
+
+    def mark_failed(self, key, error):
+        with self._lock:
+            self.failed[key] = error
+            self._save()
+
+    def reset(self):
+        """清空断点"""
+        with self._lock:
+            self.completed = set()
+            self.failed = {}
+            self.no_data = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+class SourceThrottle:
+    """同一数据源两次请求之间保持最短间隔"""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = {}
+
+    def wait(self, source):
+        """等待轮到该数据源发出下一次请求"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time.get(source, now))
+            self._next_time[source] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+class BackfillRunner:
+    """历史数据回填"""
+
+    def __init__(self, store=None, pipeline=None, checkpoint=None, max_workers=None, min_interval=None):
+        self.logger = logging.getLogger(__name__)
+        self.store = store or IndexStore()
+        # 回填在工作线程中运行，收集时固定不进入需要按回车继续的手动收集模式（不修改调用方传入的流水线）
+        self.pipeline = pipeline or CollectionPipeline(store=self.store, interactive=False)
+        self.checkpoint = checkpoint or Checkpoint()
+        self.max_workers = max_workers or BACKFILL_CONFIG['max_workers']
+        self.throttle = SourceThrottle(BACKFILL_CONFIG['min_interval'] if min_interval is None else min_interval)
+
+    def plan(self, start_date, end_date, sources):
+        """需要处理的区间 [(数据源, 开始, 结束)]，跳过断点中已完成的区间"""
+        tasks = []
+        for source in sources:
+            for chunk_start, chunk_end in split_chunks(start_date, end_date, BACKFILL_CONFIG['chunk_days'][source]):
+                if not self.checkpoint.is_done(chunk_id(source, chunk_start, chunk_end)):
+                    tasks.append((source, chunk_start, chunk_end))
+        return tasks
+
+    def _collect_missing(self, source, chunk_start, chunk_end, keywords, key, require_records=True):
+        """
+        收集区间内存储中缺失的日期，失败时按退避时间重试，返回收集后仍缺失的日期
+        require_records: 收集结果没有可写入的数据时视为失败
+        """
+        for range_start, range_end in self.pipeline.planner.plan(source, chunk_start, chunk_end, keywords):
+            for attempt in range(BACKFILL_CONFIG['max_retries'] + 1):
+                self.throttle.wait(source)
+                retry_after = 0
+                try:
+                    if self.pipeline.collect_range(source, range_start, range_end, require_records=require_records,
+                                                   interactive=False) is not None:
+                        break
+                    error = '收集未返回数据'
+                except CircuitOpenError as e:
+                    # 熔断期间等到允许探测时再重试
+                    error = str(e)
+                    retry_after = e.retry_after
+                except Exception as e:
+                    error = str(e)
+                if attempt < BACKFILL_CONFIG['max_retries']:
+                    delay = max(BACKFILL_CONFIG['retry_backoff'] * 2 ** attempt, retry_after)
+                    self.logger.warning(f"区间 {key} 收集失败（{error}），{delay:.0f} 秒后重试")
+                    time.sleep(delay)
+            else:
+                raise RuntimeError(error)
+        return self.pipeline.planner.missing_dates(source, chunk_start, chunk_end, keywords)
+
+    def _run_chunk(self, source, chunk_start, chunk_end):
+        """
+        收集一个区间内存储中缺失的日期
+        收集成功后仍有缺失的日期时再收集一次（可能是页面只返回了部分数据），
+        再次收集只针对第一次已成功收集过的日期，结果为空也算成功；两次都缺失的日期视为网站没有数据，记入断点后区间完成
+        """
+        key = chunk_id(source, chunk_start, chunk_end)
+        keywords = self.pipeline.keywords[source]
+
+        missing = self._collect_missing(source, chunk_start, chunk_end, keywords, key)
+        if missing:
+            self.logger.warning(f"区间 {key} 收集后仍缺少 {len(missing)} 天的数据，再收集一次")
+            missing = self._collect_missing(source, chunk_start, chunk_end, keywords, key, require_records=False)
+        no_data = [day.strftime('%Y-%m-%d') for day in missing]
+        if no_data:
+            self.logger.warning(f"区间 {key} 有 {len(no_data)} 天网站没有数据: {', '.join(no_data[:10])}"
+                                f"{' ...' if len(no_data) > 10 else ''}")
+
+        self.checkpoint.mark_done(key, no_data)
+        return key
+
+    def run(self, start_date, end_date, sources=None):
+        """
+        回填日期范围内的数据
+        返回 {'total', 'completed', 'failed', 'skipped'}
+        """
+        sources = sources or list(CollectionPipeline.SOURCES)
+        tasks = self.plan(start_date, end_date, sources)
+        total = sum(len(split_chunks(start_date, end_date, BACKFILL_CONFIG['chunk_days'][source])) for source in sources)
+        self.logger.info(f"回填 {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}: "
+                         f"共 {total} 个区间，待处理 {len(tasks)} 个")
+
+        completed, failed = [], {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='backfill')
+        try:
+            futures = {executor.submit(self._run_chunk, *task): chunk_id(*task) for task in tasks}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    future.result()
+                    completed.append(key)
+                    self.logger.info(f"回填进度 {len(completed) + len(failed)}/{len(tasks)}: {key} 完成")
+                except Exception as e:
+                    failed[key] = str(e)
+                    self.checkpoint.mark_failed(key, str(e))
+                    self.logger.error(f"回填区间 {key} 失败: {str(e)}")
+        except KeyboardInterrupt:
+            # 取消未开始的区间，已完成的区间都已写入断点
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.logger.warning("回填已中断，再次运行将从断点继续")
+            raise
+        executor.shutdown()
+
+        return {
+            'total': total,
+            'completed': len(completed),
+            'failed': failed,
+            'skipped': total - len(tasks)
+        }
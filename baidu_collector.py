@@ -2,24 +2,33 @@
 百度指数数据收集器
 """
 
-import time
+import os
 import logging
 from datetime import datetime, timedelta
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd
-from config import BROWSER_CONFIG, BAIDU_INDEX_URL, KEYWORDS, SCREENSHOT_CONFIG, SCREENSHOTS_DIR
+from driver_pool import create_chrome_driver
+from network_capture import NetworkCapture
+from baidu_http_collector import BaiduHttpCollector, save_cookies
+from wait_strategy import PageWaiter, dom_ready, chart_rendered, network_idle
+from rate_limiter import get_guard, CircuitOpenError, ThrottledError
+from config import BAIDU_EXTRACTION_CONFIG, BAIDU_HTTP_CONFIG, BAIDU_INDEX_URL, KEYWORDS, SCREENSHOT_CONFIG, SCREENSHOTS_DIR
+from artifact_catalog import get_catalog
 
 class BaiduIndexCollector:
     """百度指数数据收集器"""
     
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, driver_pool=None):
         self.driver = None
         self.headless = headless
+        self.driver_pool = driver_pool  # 共享驱动池，为None时每次新建浏览器
+        self._driver_broken = False
+        self.waiter = None
+        self.capture = None
+        self.guard = get_guard('baidu')  # 所有百度指数请求共享的限速熔断器
         self.logger = logging.getLogger(__name__)
         self.data = {
             'search_index': [],  # 搜索指数
@@ -29,40 +38,52 @@ class BaiduIndexCollector:
     def setup_driver(self):
         """设置浏览器驱动"""
         try:
-            chrome_options = Options()
-            if self.headless:
-                chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument(f'--window-size={BROWSER_CONFIG["window_size"]}')
-            chrome_options.add_argument(f'--user-agent={BROWSER_CONFIG["user_agent"]}')
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.implicitly_wait(BROWSER_CONFIG['timeout'])
-            self.logger.info("浏览器驱动初始化成功")
+            self._driver_broken = False
+            if self.driver_pool:
+                self.driver = self.driver_pool.acquire()
+                self.logger.info("已从驱动池借用浏览器驱动")
+            else:
+                self.driver = create_chrome_driver(self.headless)
+                self.logger.info("浏览器驱动初始化成功")
+            self.waiter = PageWaiter(self.driver)
+            if BAIDU_EXTRACTION_CONFIG['mode'] == 'network':
+                self.capture = NetworkCapture(self.driver, BAIDU_EXTRACTION_CONFIG['record_dir'])
+                self.capture.reset()
             
         except Exception as e:
             self.logger.error(f"浏览器驱动初始化失败: {str(e)}")
             raise
     
     def close_driver(self):
-        """关闭浏览器驱动"""
+        """关闭浏览器驱动（使用驱动池时归还会话）"""
         if self.driver:
-            self.driver.quit()
-            self.logger.info("浏览器驱动已关闭")
+            if self.driver_pool:
+                self.driver_pool.release(self.driver, broken=self._driver_broken)
+                self.logger.info("浏览器驱动已归还驱动池")
+            else:
+                self.driver.quit()
+                self.logger.info("浏览器驱动已关闭")
+            self.driver = None
+    
+    def _check_blocked(self):
+        """被转到百度安全验证页面时抛出ThrottledError"""
+        if 'wappass.baidu.com' in self.driver.current_url or '安全验证' in (self.driver.title or ''):
+            raise ThrottledError("百度安全验证")
     
     def navigate_to_baidu_index(self):
         """导航到百度指数页面"""
         try:
-            self.driver.get(BAIDU_INDEX_URL)
-            self.logger.info(f"已访问百度指数页面: {BAIDU_INDEX_URL}")
-            time.sleep(3)
-            
-            # 等待页面加载完成
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "home-header"))
-            )
+            with self.guard.request('打开页面'):
+                self.driver.get(BAIDU_INDEX_URL)
+                self.logger.info(f"已访问百度指数页面: {BAIDU_INDEX_URL}")
+                self._check_blocked()
+                
+                # 等待页面加载完成
+                self.waiter.until(
+                    'baidu_page_load',
+                    dom_ready(),
+                    EC.presence_of_element_located((By.CLASS_NAME, "home-header"))
+                )
             self.logger.info("百度指数页面加载完成")
             
         except TimeoutException:
@@ -89,12 +110,20 @@ class BaiduIndexCollector:
             self.logger.info(f"输入关键词: {keyword_str}")
             
             # 点击搜索按钮
-            search_button = self.driver.find_element(By.CLASS_NAME, "search-btn")
-            search_button.click()
-            self.logger.info("已点击搜索按钮")
-            
-            # 等待搜索结果加载
-            time.sleep(5)
+            with self.guard.request('搜索'):
+                search_button = self.driver.find_element(By.CLASS_NAME, "search-btn")
+                self.waiter.arm()
+                search_button.click()
+                self.logger.info("已点击搜索按钮")
+                
+                # 等待搜索结果加载：趋势图渲染完成且网络空闲
+                self.waiter.until(
+                    'baidu_search',
+                    chart_rendered('.index-trend-chart'),
+                    network_idle(),
+                    required=False
+                )
+                self._check_blocked()
             
         except TimeoutException:
             self.logger.error("搜索框加载超时")
@@ -110,9 +139,17 @@ class BaiduIndexCollector:
             info_tab = WebDriverWait(self.driver, 10).until(
                 EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), '资讯指数') or contains(@class, 'info-index')]"))
             )
-            info_tab.click()
-            self.logger.info("已切换到资讯指数")
-            time.sleep(3)
+            with self.guard.request('切换资讯指数'):
+                self.waiter.arm()
+                info_tab.click()
+                self.logger.info("已切换到资讯指数")
+                self.waiter.until(
+                    'baidu_switch_info',
+                    network_idle(),
+                    chart_rendered('.index-trend-chart'),
+                    required=False
+                )
+                self._check_blocked()
             
         except TimeoutException:
             self.logger.error("资讯指数标签加载超时")
@@ -121,9 +158,27 @@ class BaiduIndexCollector:
             self.logger.error(f"切换到资讯指数失败: {str(e)}")
             raise
     
+    def _get_captured_data(self, index_type):
+        """从捕获的接口响应中解码指数数据"""
+        try:
+            self.capture.poll()
+            data = self.capture.decode().get(index_type, {})
+            if data:
+                self.logger.info(f"通过网络捕获获取{index_type}数据: {len(data)} 天")
+            return data
+        except Exception as e:
+            self.logger.warning(f"网络捕获获取{index_type}数据失败: {str(e)}")
+            return {}
+    
     def get_index_data(self, index_type='search'):
         """获取指数数据"""
         try:
+            # 优先使用网络捕获的接口数据，拿不到时退回页面解析
+            if self.capture:
+                data = self._get_captured_data(index_type)
+                if data:
+                    return data
+            
             data = {}
             
             # 等待图表加载
@@ -181,7 +236,11 @@ class BaiduIndexCollector:
                 EC.element_to_be_clickable((By.CLASS_NAME, "date-picker"))
             )
             date_picker.click()
-            time.sleep(2)
+            self.waiter.until(
+                'date_picker',
+                EC.visibility_of_element_located((By.CLASS_NAME, "start-date")),
+                required=False
+            )
             
             # 设置开始日期
             start_input = self.driver.find_element(By.CLASS_NAME, "start-date")
@@ -195,13 +254,24 @@ class BaiduIndexCollector:
             
             # 确认日期选择
             confirm_btn = self.driver.find_element(By.CLASS_NAME, "date-confirm")
-            confirm_btn.click()
-            time.sleep(3)
+            with self.guard.request('设置日期'):
+                self.waiter.arm()
+                confirm_btn.click()
+                self.waiter.until(
+                    'date_range',
+                    network_idle(),
+                    chart_rendered('.index-trend-chart'),
+                    required=False
+                )
+                self._check_blocked()
             
             self.logger.info(f"已设置日期范围: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
             
         except TimeoutException:
             self.logger.error("日期选择器加载超时")
+        except (CircuitOpenError, ThrottledError):
+            # 验证页或熔断时不能继续在当前页面上收集
+            raise
         except Exception as e:
             self.logger.error(f"设置日期范围失败: {str(e)}")
     
@@ -212,8 +282,14 @@ class BaiduIndexCollector:
             filename = f"{filename_prefix}_{timestamp}.png"
             filepath = os.path.join(SCREENSHOTS_DIR, filename)
             
-            # 等待页面完全加载
-            time.sleep(SCREENSHOT_CONFIG['baidu']['wait_time'])
+            # 等待图表渲染完成
+            self.waiter.until(
+                'baidu_screenshot',
+                chart_rendered('.index-trend-chart'),
+                network_idle(),
+                timeout=SCREENSHOT_CONFIG['baidu']['wait_time'],
+                required=False
+            )
             
             # 截图
             if SCREENSHOT_CONFIG['baidu']['full_page']:
@@ -223,6 +299,7 @@ class BaiduIndexCollector:
                 # 当前视口截图
                 self.driver.get_screenshot_as_file(filepath)
             
+            get_catalog().register(filepath, source='baidu')
             self.logger.info(f"截图已保存: {filepath}")
             return filepath
             
@@ -230,11 +307,45 @@ class BaiduIndexCollector:
             self.logger.error(f"截图失败: {str(e)}")
             return None
     
-    def collect_baidu_index_data(self, start_date, end_date):
-        """收集百度指数数据"""
+    def export_cookies(self, filepath=None):
+        """导出当前浏览器的Cookie，供HTTP收集器使用"""
+        filepath = filepath or BAIDU_HTTP_CONFIG['cookie_file']
+        save_cookies(self.driver.get_cookies(), filepath)
+        self.logger.info(f"Cookie已导出: {filepath}")
+        return filepath
+    
+    def _collect_via_http(self, start_date, end_date, keywords):
+        """有导出的Cookie时直接请求接口获取数据"""
+        if not BAIDU_HTTP_CONFIG['enabled'] or not os.path.exists(BAIDU_HTTP_CONFIG['cookie_file']):
+            return None
+        
+        http_collector = BaiduHttpCollector()
+        try:
+            return http_collector.collect_baidu_index_data(start_date, end_date, keywords)
+        except (CircuitOpenError, ThrottledError):
+            # 被限流或熔断时改用浏览器只会加重限流
+            raise
+        except Exception as e:
+            self.logger.warning(f"HTTP收集失败，改用浏览器收集: {str(e)}")
+            return None
+        finally:
+            http_collector.close()
+    
+    def collect_baidu_index_data(self, start_date, end_date, keywords=None):
+        """收集百度指数数据，keywords为空时使用配置中的关键词"""
+        keywords = keywords or KEYWORDS['baidu']
+        
+        # 0. 优先通过HTTP接口获取数据，浏览器只用于截图
+        http_result = self._collect_via_http(start_date, end_date, keywords)
+        if http_result and not BAIDU_HTTP_CONFIG['screenshots']:
+            return http_result
+        
         try:
             self.logger.info("开始收集百度指数数据")
             
+            # 熔断期间不启动浏览器
+            self.guard.check()
+            
             # 1. 设置浏览器
             self.setup_driver()
             
@@ -242,7 +353,7 @@ class BaiduIndexCollector:
             self.navigate_to_baidu_index()
             
             # 3. 搜索关键词
-            self.search_keywords(KEYWORDS['baidu'])
+            self.search_keywords(keywords)
             
             # 4. 设置日期范围
             self.set_date_range(start_date, end_date)
@@ -251,20 +362,23 @@ class BaiduIndexCollector:
             screenshot_path = self.take_screenshot('baidu_index_search')
             
             # 6. 获取搜索指数数据
-            search_data = self.get_index_data('search')
+            search_data = http_result['search_data'] if http_result else self.get_index_data('search')
             
             # 7. 切换到资讯指数
             self.switch_to_info_index()
-            time.sleep(2)
             
             # 8. 截图
             info_screenshot_path = self.take_screenshot('baidu_index_info')
             
             # 9. 获取资讯指数数据
-            info_data = self.get_index_data('info')
+            info_data = http_result['info_data'] if http_result else self.get_index_data('info')
+            
+            if self.capture:
+                self.capture.save()
             
             # 10. 整理数据
             result = {
+                'method': 'http' if http_result else 'browser',
                 'search_data': search_data,
                 'info_data': info_data,
                 'screenshots': {
@@ -274,7 +388,8 @@ class BaiduIndexCollector:
                 'date_range': {
                     'start': start_date.strftime('%Y-%m-%d'),
                     'end': end_date.strftime('%Y-%m-%d')
-                }
+                },
+                'wait_timings': self.waiter.summary()
             }
             
             self.logger.info("百度指数数据收集完成")
@@ -282,6 +397,8 @@ class BaiduIndexCollector:
             
         except Exception as e:
             self.logger.error(f"收集百度指数数据失败: {str(e)}")
+            # 出错的会话状态不可信，归还时回收
+            self._driver_broken = True
             raise
         finally:
             self.close_driver()
@@ -0,0 +1,135 @@
+"""
+百度指数接口数据解码
+百度指数接口返回的序列经过混淆，需要用ptbk接口返回的密钥还原
+密钥转换表只构建一次，所有关键词的序列拼接后一次还原、一次解析为NumPy数组
+"""
+
+import io
+import logging
+from functools import lru_cache
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 接口中指数类型与报告中指数类型的对应关系
+METRIC_BY_API = {
+    'SearchApi/index': 'search',
+    'FeedSearchApi/getFeedIndex': 'info',
+    'NewsApi/getNewsIndex': 'news'
+}
+
+# 拼接各关键词序列时使用的分隔符，不会出现在密钥中
+SEPARATOR = '\x1e'
+
+@lru_cache(maxsize=64)
+def translation_table(key):
+    """密钥转换表：密钥前半段字符依次映射为后半段字符"""
+    half = len(key) // 2
+    return str.maketrans(key[:half], key[half:])
+
+def decrypt(key, data):
+    """用密钥还原混淆的数据"""
+    return data.translate(translation_table(key)) if key else data
+
+def keyword_name(entry):
+    """从接口返回的单个关键词条目中取出关键词名称"""
+    words = entry.get('word') or entry.get('key') or []
+    if isinstance(words, str):
+        return words
+    return '+'.join(word.get('name', '') for word in words)
+
+def parse_values(text):
+    """把逗号分隔的序列解析为float64数组，空值为NaN"""
+    # 空值补为nan后交给NumPy的C解析器一次读完
+    text = text.replace(',,', ',nan,').replace(',,', ',nan,')
+    if text.startswith(',') or not text:
+        text = 'nan' + text
+    if text.endswith(','):
+        text += 'nan'
+    return np.loadtxt(io.StringIO(text), delimiter=',', dtype=np.float64, ndmin=1)
+
+def parse_series(text, start_date, step_days=1):
+    """把逗号分隔的序列还原为 [(日期, 数值)]，空值表示当天无数据"""
+    values = parse_values(text)
+    dates = np.datetime64(start_date[:10], 'D') + np.arange(len(values)) * step_days
+    present = ~np.isnan(values)
+    return list(zip(dates[present].astype(str).tolist(), values[present].astype(np.int64).tolist()))
+
+def _series_entries(data):
+    """取出接口数据中的关键词序列列表及其混淆数据"""
+    entries = []
+    for entry in data.get('userIndexes') or []:
+        # 搜索指数：all为PC+移动合计
+        series = entry.get('all') or {}
+        entries.append((keyword_name(entry), series.get('data', ''), series.get('startDate'), entry.get('type')))
+    for entry in data.get('index') or []:
+        # 资讯/媒体指数
+        entries.append((keyword_name(entry), entry.get('data', ''), entry.get('startDate'), entry.get('type')))
+    return entries
+
+def _empty_arrays():
+    return np.empty(0, dtype='datetime64[D]'), [], np.empty((0, 0))
+
+def decode_index_arrays(payload, key):
+    """
+    解码指数接口返回的JSON为对齐的NumPy数组
+    返回 (日期数组 datetime64[D], 关键词列表, 数值矩阵[天, 关键词])，缺失值为NaN
+    某个关键词的序列无法解码时记录日志并跳过，其他关键词照常返回
+    """
+    data = payload.get('data') or {}
+    entries = [entry for entry in _series_entries(data) if entry[0] and entry[2]]
+    if not entries:
+        return _empty_arrays()
+
+    try:
+        return _decode_entries(entries, key)
+    except (ValueError, TypeError) as e:
+        logger.warning(f"批量解码指数序列失败，改为逐个关键词解码: {str(e)}")
+
+    decodable = []
+    for entry in entries:
+        try:
+            _decode_entries([entry], key)
+            decodable.append(entry)
+        except (ValueError, TypeError) as e:
+            logger.error(f"解码关键词 {entry[0]} 的指数序列失败: {str(e)}")
+    return _decode_entries(decodable, key) if decodable else _empty_arrays()
+
+def _decode_entries(entries, key):
+    """解码 [(关键词, 混淆数据, 起始日期, 类型)]，任一序列格式错误时抛出ValueError"""
+    # 所有关键词的序列一次还原、一次解析
+    text = decrypt(key, SEPARATOR.join(encrypted or '' for _, encrypted, _, _ in entries))
+    segments = text.split(SEPARATOR)
+    lengths = np.array([segment.count(',') + 1 for segment in segments])
+    values = parse_values(','.join(segments))
+
+    # 每个值对应的日期：起始日期 + 序号 × 步长（按周的序列步长为7天）
+    starts = np.array([start_date[:10] for _, _, start_date, _ in entries], dtype='datetime64[D]')
+    steps = np.array([7 if series_type == 'week' else 1 for _, _, _, series_type in entries])
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    dates = np.repeat(starts, lengths) + offsets * np.repeat(steps, lengths)
+
+    keywords = list(dict.fromkeys(keyword for keyword, _, _, _ in entries))
+    columns = np.repeat([keywords.index(keyword) for keyword, _, _, _ in entries], lengths)
+    all_dates, rows = np.unique(dates, return_inverse=True)
+    matrix = np.full((len(all_dates), len(keywords)), np.nan)
+    matrix[rows, columns] = values
+    return all_dates, keywords, matrix
+
+def decode_index_payload(payload, key):
+    """
+    解码指数接口返回的JSON
+    返回 {日期: {关键词: 数值}}，与DataProcessor.process_baidu_data期望的结构一致
+    """
+    try:
+        dates, keywords, matrix = decode_index_arrays(payload, key)
+    except (ValueError, TypeError) as e:
+        logger.error(f"解码指数序列失败: {str(e)}")
+        return {}
+
+    result = {}
+    rows, cols = np.nonzero(~np.isnan(matrix))
+    day_strings = dates.astype(str).tolist()
+    for row, col, value in zip(rows.tolist(), cols.tolist(), matrix[rows, cols].astype(np.int64).tolist()):
+        result.setdefault(day_strings[row], {})[keywords[col]] = value
+    return result
@@ -0,0 +1,195 @@
+"""
+百度指数HTTP数据收集器
+不启动浏览器，使用浏览器登录后导出的Cookie直接请求指数数据接口
+"""
+
+import os
+import json
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from baidu_decoder import METRIC_BY_API, decode_index_payload
+from rate_limiter import get_guard, ThrottledError
+from config import BROWSER_CONFIG, BAIDU_HTTP_CONFIG, BAIDU_INDEX_URL, KEYWORDS
+
+# 指数类型 -> 接口路径
+API_PATHS = {metric: f'/api/{api}' for api, metric in METRIC_BY_API.items()}
+PTBK_PATH = '/Interface/ptbk'
+
+# 视为被限流的HTTP状态码和接口状态码（10001: request block）
+THROTTLE_HTTP_STATUS = (403, 429)
+THROTTLE_API_STATUS = (10001,)
+
+def load_cookies(filepath):
+    """读取导出的Cookie文件（selenium get_cookies() 的JSON格式）"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_cookies(cookies, filepath):
+    """保存Cookie文件"""
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(cookies, f, ensure_ascii=False, indent=2)
+    return filepath
+
+class BaiduHttpCollector:
+    """百度指数HTTP数据收集器"""
+
+    def __init__(self, cookies=None, cookie_file=None, base_url=None):
+        self.logger = logging.getLogger(__name__)
+        self.base_url = (base_url or BAIDU_HTTP_CONFIG['base_url']).rstrip('/')
+        self.timeout = BAIDU_HTTP_CONFIG['timeout']
+        self.guard = get_guard('baidu')
+        self._ptbk_cache = {}
+
+        if cookies is None:
+            cookie_file = cookie_file or BAIDU_HTTP_CONFIG['cookie_file']
+            cookies = load_cookies(cookie_file) if os.path.exists(cookie_file) else []
+
+        self.session = self._create_session(cookies)
+
+    def _create_session(self, cookies):
+        """创建带连接池和重试的会话"""
+        session = requests.Session()
+
+        retry = Retry(
+            total=BAIDU_HTTP_CONFIG['retries'],
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=('GET',)
+        )
+        adapter = HTTPAdapter(
+            pool_connections=BAIDU_HTTP_CONFIG['pool_size'],
+            pool_maxsize=BAIDU_HTTP_CONFIG['pool_size'],
+            max_retries=retry
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        session.headers.update({
+            'User-Agent': BROWSER_CONFIG['user_agent'],
+            'Accept': 'application/json, text/plain, */*',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Referer': BAIDU_INDEX_URL
+        })
+
+        for cookie in cookies:
+            session.cookies.set(cookie['name'], cookie['value'],
+                                domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+
+        return session
+
+    def _get_json(self, path, params=None):
+        """请求接口并检查返回状态，请求经过百度指数共享的限速熔断器"""
+        with self.guard.request(path):
+            response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+            if response.status_code in THROTTLE_HTTP_STATUS:
+                raise ThrottledError(f"HTTP {response.status_code}")
+            response.raise_for_status()
+            payload = response.json()
+            status = payload.get('status', 0)
+            if status in THROTTLE_API_STATUS:
+                raise ThrottledError(f"{status} {payload.get('message', '')}")
+            if status != 0:
+                raise RuntimeError(f"百度指数接口返回错误: {status} {payload.get('message', '')}")
+        return payload
+
+    def get_ptbk(self, uniqid):
+        """获取解密密钥"""
+        if uniqid not in self._ptbk_cache:
+            self._ptbk_cache[uniqid] = self._get_json(PTBK_PATH, {'uniqid': uniqid}).get('data', '')
+        return self._ptbk_cache[uniqid]
+
+    def fetch_index(self, metric, keywords, start_date, end_date):
+        """获取一组关键词的指数序列，返回 {日期: {关键词: 数值}}"""
+        words = [[{'name': keyword, 'wordType': 1}] for keyword in keywords]
+        params = {
+            'area': 0,
+            'word': json.dumps(words, ensure_ascii=False, separators=(',', ':')),
+            'startDate': start_date.strftime('%Y-%m-%d'),
+            'endDate': end_date.strftime('%Y-%m-%d')
+        }
+        payload = self._get_json(API_PATHS[metric], params)
+        uniqid = (payload.get('data') or {}).get('uniqid', '')
+        return decode_index_payload(payload, self.get_ptbk(uniqid) if uniqid else '')
+
+    def collect_baidu_index_data(self, start_date, end_date, keywords=None):
+        """收集百度指数数据，返回结构与BaiduIndexCollector一致"""
+        keywords = keywords or KEYWORDS['baidu']
+        try:
+            self.logger.info(f"开始通过HTTP收集百度指数数据: {','.join(keywords)}")
+
+            search_data = self.fetch_index('search', keywords, start_date, end_date)
+            info_data = self.fetch_index('info', keywords, start_date, end_date)
+
+            self.logger.info(f"百度指数HTTP收集完成: 搜索 {len(search_data)} 天, 资讯 {len(info_data)} 天")
+            return {
+                'method': 'http',
+                'search_data': search_data,
+                'info_data': info_data,
+                'screenshots': {},
+                'date_range': {
+                    'start': start_date.strftime('%Y-%m-%d'),
+                    'end': end_date.strftime('%Y-%m-%d')
+                }
+            }
+
+        except Exception as e:
+            self.logger.error(f"通过HTTP收集百度指数数据失败: {str(e)}")
+            raise
+
+    def close(self):
+        """关闭会话"""
+        self.session.close()
+
+def export_cookies_from_browser(filepath=None):
+    """打开浏览器手动登录百度指数，然后导出Cookie"""
+    from driver_pool import create_chrome_driver
+
+    filepath = filepath or BAIDU_HTTP_CONFIG['cookie_file']
+    driver = create_chrome_driver(headless=False, capture_network=False)
+    try:
+        driver.get(BAIDU_INDEX_URL)
+        input("请在浏览器中登录百度指数，完成后按回车键继续...")
+        save_cookies(driver.get_cookies(), filepath)
+        print(f"Cookie已导出: {filepath}")
+        return filepath
+    finally:
+        driver.quit()
+
+def main():
+    """主函数"""
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='百度指数HTTP数据收集')
+    parser.add_argument('--login', action='store_true', help='打开浏览器登录并导出Cookie')
+    args = parser.parse_args()
+
+    if args.login:
+        export_cookies_from_browser()
+        return
+
+    from config import get_collection_dates
+    start_date, end_date = get_collection_dates()
+
+    collector = BaiduHttpCollector()
+    try:
+        data = collector.collect_baidu_index_data(start_date, end_date)
+        print("百度指数数据收集成功")
+        print(f"数据范围: {data['date_range']['start']} 到 {data['date_range']['end']}")
+        print(f"搜索指数: {data['search_data']}")
+        print(f"资讯指数: {data['info_data']}")
+    except Exception as e:
+        print(f"数据收集失败: {str(e)}")
+    finally:
+        collector.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+性能基准测试
+python benchmark.py weekly --keywords 2000 --years 3
+python benchmark.py excel --keywords 3 --years 100
+python benchmark.py series --keywords 500 --years 3
+python benchmark.py decode --keywords 50 --years 5
+"""
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+def _timeit(func, repeat):
+    """运行多次，返回最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def bench_weekly(args):
+    """每周平均值计算：关键词数 × 天数"""
+    from weekly_stats import weekly_average_frame
+
+    dates = pd.Series(pd.date_range('2020-01-01', periods=args.years * 365, freq='D'))
+    rng = np.random.default_rng(0)
+    matrix = rng.integers(0, 50000, size=(len(dates), args.keywords)).astype(np.float64)
+    # 模拟少量缺失值
+    matrix[rng.random(matrix.shape) < 0.01] = np.nan
+    values = pd.DataFrame(matrix, columns=[f'关键词{i}' for i in range(args.keywords)])
+
+    seconds = _timeit(lambda: weekly_average_frame(dates, values), args.repeat)
+    cells = values.size
+    print(f"weekly: {args.keywords} 个关键词 × {len(dates)} 天 = {cells:,} 个值，"
+          f"耗时 {seconds * 1000:.1f} ms（{cells / seconds / 1e6:.1f} M值/秒）")
+    return seconds
+
+def bench_excel(args):
+    """流式写入Excel：天数 × (关键词每日值 + 周平均)"""
+    import os
+    import tempfile
+    from excel_writer import StreamingReportWriter
+
+    rows = args.years * 365
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.integers(0, 50000, size=(rows, args.keywords * 2)).astype(np.float64))
+    df.insert(0, '日期', pd.date_range('2020-01-01', periods=rows, freq='D').strftime('%Y-%m-%d'))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'bench.xlsx')
+
+        def run():
+            writer = StreamingReportWriter()
+            writer.write_frame('数据', df)
+            writer.save(path)
+
+        seconds = _timeit(run, args.repeat)
+        size = os.path.getsize(path)
+
+    print(f"excel: {rows:,} 行 × {df.shape[1]} 列，耗时 {seconds:.2f} s，文件 {size / 1024:.0f} KB")
+    return seconds
+
+def bench_series(args):
+    """序列容器：从 {日期: {关键词: 数值}} 构建、转换DataFrame、求平均值"""
+    from series_frame import SeriesFrame
+
+    days = pd.date_range('2020-01-01', periods=args.years * 365, freq='D').strftime('%Y-%m-%d')
+    keywords = [f'关键词{i}' for i in range(args.keywords)]
+    rng = np.random.default_rng(0)
+    matrix = rng.integers(0, 50000, size=(len(days), args.keywords)).tolist()
+    mapping = {day: dict(zip(keywords, row)) for day, row in zip(days, matrix)}
+
+    build = _timeit(lambda: SeriesFrame.from_mapping('baidu', 'search', mapping), args.repeat)
+    series = SeriesFrame.from_mapping('baidu', 'search', mapping)
+    convert = _timeit(series.to_frame, args.repeat)
+    means = _timeit(series.means, args.repeat)
+    print(f"series: {series}，占用 {series.nbytes / 1024 / 1024:.1f} MB，构建 {build * 1000:.0f} ms，"
+          f"转换DataFrame {convert * 1000:.2f} ms，求平均 {means * 1000:.1f} ms")
+    return build
+
+def synthetic_payload(keywords, days, seed=0):
+    """生成混淆后的百度指数接口数据，返回 (payload, 密钥, 原始数值矩阵)"""
+    rng = np.random.default_rng(seed)
+    plain = list('0123456789,.+-')
+    cipher = [chr(code) for code in rng.choice(np.arange(0x41, 0x5b), size=len(plain), replace=False)]
+    key = ''.join(cipher) + ''.join(plain)
+    encrypt = str.maketrans(''.join(plain), ''.join(cipher))
+
+    matrix = rng.integers(0, 50000, size=(days, keywords))
+    entries = []
+    for i in range(keywords):
+        text = ','.join(map(str, matrix[:, i].tolist()))
+        entries.append({
+            'word': [{'name': f'关键词{i}', 'wordType': 1}],
+            'all': {'startDate': '2020-01-01', 'endDate': '', 'data': text.translate(encrypt)},
+            'type': 'day'
+        })
+    return {'status': 0, 'data': {'userIndexes': entries, 'uniqid': 'bench'}}, key, matrix
+
+def bench_decode(args):
+    """百度指数解码：关键词数 × 天数"""
+    from baidu_decoder import decode_index_arrays, decode_index_payload
+
+    days = args.years * 365
+    payload, key, matrix = synthetic_payload(args.keywords, days)
+    dates, _, decoded = decode_index_arrays(payload, key)
+    assert len(dates) == days and np.array_equal(decoded, matrix), '解码结果与原始数据不一致'
+
+    seconds = _timeit(lambda: decode_index_arrays(payload, key), args.repeat)
+    to_dict = _timeit(lambda: decode_index_payload(payload, key), args.repeat)
+    cells = matrix.size
+    print(f"decode: {args.keywords} 个关键词 × {days} 天 = {cells:,} 个值，数组 {seconds * 1000:.1f} ms"
+          f"（{cells / seconds / 1e6:.1f} M值/秒），字典 {to_dict * 1000:.1f} ms")
+    return seconds
+
+BENCHMARKS = {
+    'weekly': bench_weekly,
+    'excel': bench_excel,
+    'series': bench_series,
+    'decode': bench_decode
+}
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='性能基准测试')
+    parser.add_argument('name', choices=sorted(BENCHMARKS), help='基准测试名称')
+    parser.add_argument('--keywords', type=int, default=2000, help='关键词数')
+    parser.add_argument('--years', type=int, default=3, help='年数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    args = parser.parse_args()
+
+    BENCHMARKS[args.name](args)
+
+if __name__ == '__main__':
+    main()
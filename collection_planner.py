@@ -0,0 +1,103 @@
+"""
+增量收集计划
+对比已存储的数据，只向收集器请求缺失的日期区间
+"""
+
+import logging
+from datetime import datetime, timedelta
+from index_store import to_number
+
+# 各数据源包含的指标
+SOURCE_METRICS = {
+    'baidu': ('search', 'info'),
+    'wechat': ('index',)
+}
+
+def date_range(start_date, end_date):
+    """生成日期范围内的每一天（含首尾）"""
+    start = start_date.date() if isinstance(start_date, datetime) else start_date
+    end = end_date.date() if isinstance(end_date, datetime) else end_date
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+def group_contiguous(dates):
+    """把日期列表合并为连续区间 [(开始, 结束)]"""
+    ranges = []
+    for day in sorted(dates):
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [(start, end) for start, end in ranges]
+
+def baidu_records(result):
+    """把百度指数收集结果转换为存储记录"""
+    records = []
+    for metric, key in (('search', 'search_data'), ('info', 'info_data')):
+        series = result.get(key) or {}
+        if not isinstance(series, dict):
+            continue
+        for date_str, values in series.items():
+            if not isinstance(values, dict):
+                continue
+            for keyword, value in values.items():
+                number = to_number(value)
+                if number is not None:
+                    records.append(('baidu', keyword, metric, date_str, number))
+    return records
+
+def wechat_records(result, start_date, end_date):
+    """
+    把微信指数收集结果转换为存储记录
+    每个关键词的数据可以是 {日期: 数值}，也可以是从开始日期起逐日排列的数值列表
+    """
+    records = []
+    if not result or result.get('method') != 'web':
+        return records
+
+    days = date_range(start_date, end_date)
+    for item in result.get('data', []):
+        keyword = item.get('keyword')
+        data = item.get('data')
+        if isinstance(data, dict):
+            pairs = data.items()
+        elif isinstance(data, list):
+            pairs = zip((day.strftime('%Y-%m-%d') for day in days), data)
+        else:
+            continue
+        for date_str, value in pairs:
+            number = to_number(value)
+            if keyword and number is not None:
+                records.append(('wechat', keyword, 'index', date_str, number))
+    return records
+
+class CollectionPlanner:
+    """增量收集计划"""
+
+    def __init__(self, store):
+        self.logger = logging.getLogger(__name__)
+        self.store = store
+
+    def missing_dates(self, source, start_date, end_date, keywords):
+        """任一关键词或指标缺失数据的日期"""
+        days = date_range(start_date, end_date)
+        wanted = {day.strftime('%Y-%m-%d') for day in days}
+        missing = set()
+
+        for metric in SOURCE_METRICS[source]:
+            existing = self.store.existing_dates(source, metric, keywords, start_date, end_date)
+            for dates in existing.values():
+                missing |= wanted - dates
+
+        return sorted(datetime.strptime(date_str, '%Y-%m-%d').date() for date_str in missing)
+
+    def plan(self, source, start_date, end_date, keywords):
+        """需要收集的连续日期区间 [(开始, 结束)]，每个区间调用一次收集器"""
+        missing = self.missing_dates(source, start_date, end_date, keywords)
+        ranges = [
+            (datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time()))
+            for start, end in group_contiguous(missing)
+        ]
+
+        total = len(date_range(start_date, end_date))
+        self.logger.info(f"{source} 共 {total} 天，缺失 {len(missing)} 天，需收集 {len(ranges)} 个区间")
+        return ranges
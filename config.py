@@ -17,6 +17,13 @@ KEYWORDS = {
     'wechat': ['上海电信', '上海移动', '上海联通']
 }
 
+# 关键词分片配置（关键词较多时分组并行收集）
+SHARD_CONFIG = {
+    'max_workers': 4,            # 并行工作进程数，每个进程独立启动浏览器
+    'baidu_compare_limit': 5,    # 百度指数单次最多对比5个关键词
+    'wechat_shard_size': 5       # 微信指数每个进程负责的关键词数
+}
+
 # URL配置
 BAIDU_INDEX_URL = 'https://index.baidu.com/v2/index.html#/'
 WECHAT_MINIPROGRAM_PATH = '小程序://微信指数/RTGJwjluzNnWpqq'
@@ -26,24 +33,87 @@ COLLECTION_DAYS = 7  # 收集7天数据
 COLLECTION_HOUR = 9  # 每天9点开始收集（周五或周一）
 
 # Excel模板配置
+# 每个工作表对应一个 (数据源, 指标)，列依次为：日期、星期、每个关键词的每日指数和每周平均值、趋势对比
+# 关键词数量不限，列名由 daily_suffix 等字段生成
 EXCEL_TEMPLATE = {
     '微信指数趋势': {
-        'columns': ['日期', '星期', '上海电信每日指数', '每周指数平均值', 
-                   '上海移动每日指数', '每周指数平均值', 
-                   '上海联通每日指数', '每周指数平均值', '三家指数趋势对比'],
-        'keywords': ['上海电信', '上海移动', '上海联通']
+        'source': 'wechat',
+        'metric': 'index',
+        'keywords': KEYWORDS['wechat'],
+        'daily_suffix': '每日指数',
+        'average_column': '每周指数平均值',
+        'trend_column': '三家指数趋势对比',
+        'summary_column': '微信指数平均'
     },
     '百度指数搜索': {
-        'columns': ['日期', '星期', '上海电信每日搜索指数', '每周指数平均值',
-                   '上海移动每日搜索指数', '每周指数平均值',
-                   '上海联通每日搜索指数', '每周指数平均值', '三家每日搜索指数趋势对比'],
-        'keywords': ['上海电信', '上海移动', '上海联通']
+        'source': 'baidu',
+        'metric': 'search',
+        'keywords': KEYWORDS['baidu'],
+        'daily_suffix': '每日搜索指数',
+        'average_column': '每周指数平均值',
+        'trend_column': '三家每日搜索指数趋势对比',
+        'summary_column': '百度指数搜索平均'
     },
     '百度指数资讯': {
-        'columns': ['日期', '星期', '上海电信每日资讯指数', '每周指数平均值',
-                   '上海移动每日资讯指数', '每周指数平均值',
-                   '上海联通每日资讯指数', '每周指数平均值', '三家每日资讯指数趋势对比'],
-        'keywords': ['上海电信', '上海移动', '上海联通']
+        'source': 'baidu',
+        'metric': 'info',
+        'keywords': KEYWORDS['baidu'],
+        'daily_suffix': '每日资讯指数',
+        'average_column': '每周指数平均值',
+        'trend_column': '三家每日资讯指数趋势对比',
+        'summary_column': '百度指数资讯平均'
+    }
+}
+
+def template_columns(spec):
+    """根据模板生成工作表的列名"""
+    columns = ['日期', '星期']
+    for keyword in spec['keywords']:
+        columns += [f"{keyword}{spec['daily_suffix']}", spec['average_column']]
+    columns.append(spec['trend_column'])
+    return columns
+
+# 多周期历史报告配置（period_report.py）
+PERIOD_REPORT_CONFIG = {
+    'period': 'quarter',     # 每个工作表的周期: month/quarter/year/all
+    'granularity': 'week'    # 工作表内的聚合粒度: day/week/month
+}
+
+# 列式数据导出配置（exporter.py，按 source=/month= 分区）
+EXPORT_CONFIG = {
+    'enabled': True,                          # 每次收集后导出本次日期范围覆盖的月份
+    'dir': os.path.join(DATA_DIR, 'export'),
+    'formats': ['parquet', 'csv']             # 可选 parquet/feather/csv，parquet和feather需要pyarrow
+}
+
+# 报告缓存配置（输入数据和配置相同时直接复用已生成的报告）
+REPORT_CACHE_CONFIG = {
+    'enabled': True,
+    'dir': os.path.join(DATA_DIR, 'report_cache'),
+    'max_bytes': 200 * 1024 * 1024,   # 缓存总大小上限
+    'max_entries': 100,               # 缓存文件数量上限
+    'max_age_days': 30                # 超过N天未使用的报告被删除
+}
+
+# 报告趋势图配置（每个指数工作表一个原生折线图，引用已写入的每日指数列）
+CHART_CONFIG = {
+    'enabled': True,
+    'width': 24,     # 图表宽度（厘米）
+    'height': 12,    # 图表高度（厘米）
+    'y_axis_title': '指数'
+}
+
+# 报告高亮配置（峰值和异常值以条件格式标出）
+ANOMALY_CONFIG = {
+    'enabled': True,
+    'mad_window': 28,        # 中位数/MAD窗口（天，以当天为中心）
+    'mad_min_periods': 7,    # 窗口内少于N个数据时改用整列的中位数/MAD
+    'mad_threshold': 3.5,    # 稳健z分数超过该值视为异常
+    'jump_threshold': 0.3,   # 周平均值环比变化超过30%视为突变
+    'styles': {
+        'peak': {'fill': 'FF0000', 'font': 'FFFFFF'},      # 每周最高值
+        'outlier': {'fill': 'FFC000', 'font': '000000'},   # 异常值
+        'jump': {'fill': 'BDD7EE', 'font': '1F4E78'}       # 周环比突变（标在每周平均值列）
     }
 }
 
@@ -55,6 +125,114 @@ BROWSER_CONFIG = {
     'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
+# 数据存储配置
+STORE_CONFIG = {
+    'db_path': os.path.join(DATA_DIR, 'index_data.db')
+}
+
+# 百度指数数据提取配置
+BAIDU_EXTRACTION_CONFIG = {
+    'mode': 'network',   # network: 捕获趋势图接口响应并解码; dom: 读取页面变量或元素
+    'record_dir': None   # 设置目录后保存捕获到的原始响应，可用network_capture.py离线回放
+}
+
+# 百度指数HTTP收集配置（使用浏览器登录后导出的Cookie直接请求接口）
+BAIDU_HTTP_CONFIG = {
+    'enabled': True,         # Cookie文件存在时优先走HTTP接口
+    'screenshots': True,     # HTTP收集成功后是否仍打开浏览器截图
+    'base_url': 'https://index.baidu.com',
+    'cookie_file': os.path.join(DATA_DIR, 'baidu_cookies.json'),
+    'pool_size': 4,
+    'timeout': 15,
+    'retries': 2
+}
+
+# 页面等待配置：各步骤的最长等待时间（秒），条件满足即返回
+WAIT_CONFIG = {
+    'poll_interval': 0.2,     # 条件轮询间隔
+    'network_idle_ms': 500,   # 无请求持续多久视为网络空闲
+    'default_timeout': 10,
+    'timeouts': {
+        'baidu_page_load': 20,
+        'baidu_search': 15,
+        'baidu_switch_info': 10,
+        'date_picker': 5,
+        'date_range': 10,
+        'wechat_page_load': 15,
+        'wechat_search': 10
+    }
+}
+
+# 请求限速和熔断配置（rate_limiter.py，各收集器共享）
+RATE_LIMIT_CONFIG = {
+    'baidu': {
+        'rate': 0.5,             # 初始速率（次/秒）
+        'burst': 2,              # 令牌桶容量
+        'min_rate': 0.02,
+        'max_rate': 2.0,
+        'increase': 0.05,        # 每次成功增加的速率
+        'latency_target': 15     # 单次请求超过该秒数视为网站变慢，开始降速
+    },
+    'wechat': {
+        'rate': 0.3,
+        'burst': 1,
+        'min_rate': 0.02,
+        'max_rate': 1.0,
+        'increase': 0.03,
+        'latency_target': 15
+    },
+    'breaker': {
+        'failure_threshold': 5,        # 连续失败N次后熔断
+        'recovery_timeout': 120,       # 熔断后等待多久放行探测请求（秒）
+        'max_recovery_timeout': 1800,  # 探测连续失败时冷却时间翻倍的上限
+        'probe_timeout': 300           # 探测请求超过N秒未结束（进程崩溃或被终止）时放行新的探测
+    },
+    # 令牌桶和熔断状态文件：分片工作进程、定时任务和Web应用共用同一个速率和熔断器，None为只在进程内共享
+    'state_file': os.path.join(DATA_DIR, 'rate_limit_state.db')
+}
+
+# 历史数据回填配置（scheduler.py --mode backfill）
+BACKFILL_CONFIG = {
+    'chunk_days': {          # 每次请求的最大天数（超过后网站改为按周返回或不允许查询）
+        'baidu': 180,
+        'wechat': 90
+    },
+    'max_workers': 2,        # 同时收集的区间数
+    'min_interval': 10,      # 同一数据源两次请求之间的最短间隔（秒）
+    'max_retries': 2,        # 单个区间失败后的重试次数
+    'retry_backoff': 30,     # 重试等待时间（秒），每次翻倍
+    'checkpoint_file': os.path.join(DATA_DIR, 'backfill_checkpoint.json')
+}
+
+# 浏览器驱动池配置（收集器共享的预热无头浏览器会话）
+DRIVER_POOL_CONFIG = {
+    'size': 2,               # 保持预热的会话数
+    'max_uses': 20,          # 单个会话使用N次后回收重建
+    'checkout_timeout': 120, # 借用会话的最长等待时间（秒）
+    'warm_on_start': True    # Web应用启动时预热
+}
+
+# Web应用收集任务队列配置（job_queue.py）
+JOB_QUEUE_CONFIG = {
+    'max_workers': 2,    # 同时运行的收集任务数（浏览器会话由驱动池共享）
+    'max_queued': 10,    # 排队任务上限，超过时拒绝提交
+    'max_history': 50    # 保留的已结束任务数
+}
+
+# 报告和截图目录索引配置（artifact_catalog.py）
+ARTIFACT_CATALOG_CONFIG = {
+    'scan_interval': 5,      # 检查目录是否变化的最短间隔（秒）
+    'page_size': 20,         # 默认每页条数
+    'max_page_size': 200,
+    'manifest_file': os.path.join(DATA_DIR, 'artifact_catalog.json')   # 登记的日期范围和关键词
+}
+
+# 页面模板缓存配置（template_utils.py）
+TEMPLATE_CONFIG = {
+    'cache_size': 50,                                              # 内存中保留的编译模板数
+    'bytecode_cache_dir': os.path.join(DATA_DIR, 'template_cache')  # 编译结果缓存目录，None为不使用
+}
+
 # 日志配置
 LOG_CONFIG = {
     'level': 'INFO',
@@ -62,16 +240,23 @@ LOG_CONFIG = {
     'file': os.path.join(LOGS_DIR, f'index_collector_{datetime.now().strftime("%Y%m%d")}.log')
 }
 
+# 页面实时推送配置
+LOG_STREAM_CONFIG = {
+    'capacity': 1000,     # 内存中保留的最近日志条数
+    'initial_lines': 50,  # 页面连接时先发送的历史日志条数
+    'heartbeat': 15       # 无新内容时发送心跳的间隔（秒），防止代理断开空闲连接
+}
+
 # 截图配置
 SCREENSHOT_CONFIG = {
     'baidu': {
         'full_page': True,
-        'wait_time': 5,
+        'wait_time': 5,  # 截图前等待图表渲染的最长时间
         'file_prefix': 'baidu_index'
     },
     'wechat': {
         'full_page': True,
-        'wait_time': 3,
+        'wait_time': 3,  # 截图前等待页面就绪的最长时间
         'file_prefix': 'wechat_index'
     }
 }
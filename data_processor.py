@@ -4,36 +4,47 @@
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.chart import LineChart, Reference
-from config import DATA_DIR, EXCEL_TEMPLATE
+from openpyxl.utils import get_column_letter
+from excel_writer import StreamingReportWriter
+from weekly_stats import weekly_average_frame, iso_week_bounds
+from anomaly_detector import detect
+from report_cache import ReportCache, report_key
+from series_frame import SeriesFrame
+from artifact_catalog import get_catalog
+from config import EXCEL_TEMPLATE, KEYWORDS, ANOMALY_CONFIG, CHART_CONFIG, REPORT_CACHE_CONFIG, template_columns
 
 class DataProcessor:
     """数据处理类"""
     
-    def __init__(self):
+    def __init__(self, report_cache=None, keywords=None):
         self.logger = logging.getLogger(__name__)
-        self.wechat_data = []
-        self.baidu_search_data = []
-        self.baidu_info_data = []
+        # 各数据源的关键词，默认使用配置中的关键词；工作表模板按关键词生成
+        self.keywords = keywords or KEYWORDS
+        self.template = {
+            sheet_name: dict(spec, keywords=self.keywords.get(spec['source'], spec['keywords']))
+            for sheet_name, spec in EXCEL_TEMPLATE.items()
+        }
+        self.report_cache = report_cache
+        if self.report_cache is None and REPORT_CACHE_CONFIG['enabled']:
+            self.report_cache = ReportCache()
+        # (数据源, 指标) -> SeriesFrame
+        self.series = {}
+        # 报告日期范围；从存储载入时数据扩展到完整ISO周，只用于计算边界周的平均值
+        self.window = None
         
     def process_baidu_data(self, raw_data):
         """处理百度指数数据"""
         try:
             self.logger.info("开始处理百度指数数据")
             
-            # 这里需要根据实际收集到的数据结构进行处理
-            # 示例数据结构
+            # 收集结果为 {日期: {关键词: 数值}}
             if 'search_data' in raw_data:
-                search_data = raw_data['search_data']
-                self.baidu_search_data = self._parse_baidu_index_data(search_data)
+                self.series[('baidu', 'search')] = self._parse_baidu_index_data(raw_data['search_data'], 'search')
             
             if 'info_data' in raw_data:
-                info_data = raw_data['info_data']
-                self.baidu_info_data = self._parse_baidu_index_data(info_data)
+                self.series[('baidu', 'info')] = self._parse_baidu_index_data(raw_data['info_data'], 'info')
             
             self.logger.info("百度指数数据处理完成")
             return True
@@ -48,11 +59,11 @@ class DataProcessor:
             self.logger.info("开始处理微信指数数据")
             
             if raw_data.get('method') == 'web' and 'data' in raw_data:
-                self.wechat_data = self._parse_wechat_index_data(raw_data['data'])
+                self.series[('wechat', 'index')] = self._parse_wechat_index_data(raw_data['data'])
             elif raw_data.get('method') == 'manual':
                 # 手动收集的数据，需要用户手动输入
                 self.logger.info("微信指数数据需要手动输入")
-                self.wechat_data = []
+                self.series[('wechat', 'index')] = SeriesFrame.empty('wechat', 'index', self.keywords['wechat'])
             
             self.logger.info("微信指数数据处理完成")
             return True
@@ -61,87 +72,145 @@ class DataProcessor:
             self.logger.error(f"处理微信指数数据失败: {str(e)}")
             return False
     
-    def _parse_baidu_index_data(self, raw_data):
-        """解析百度指数数据"""
+    def load_from_store(self, store, start_date, end_date, sources=('baidu', 'wechat')):
+        """
+        从数据存储载入日期范围内的数据
+        按首尾两周的完整ISO周查询，每周平均值与列式导出一致；报告只包含日期范围内的行
+        """
         try:
-            parsed_data = []
-            
-            # 这里根据实际数据结构进行解析
-            # 示例：假设返回的是字典格式 {date: {keyword: value}}
-            if isinstance(raw_data, dict):
-                for date_str, keyword_data in raw_data.items():
-                    row = {'日期': date_str}
-                    for keyword, value in keyword_data.items():
-                        row[f'{keyword}'] = value
-                    parsed_data.append(row)
+            week_start, week_end = iso_week_bounds(start_date, end_date)
+            self.window = (pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+            if 'baidu' in sources:
+                for metric in ('search', 'info'):
+                    self.series[('baidu', metric)] = SeriesFrame.from_store(
+                        store, 'baidu', metric, week_start, week_end, self.keywords['baidu'])
+            
+            if 'wechat' in sources:
+                self.series[('wechat', 'index')] = SeriesFrame.from_store(
+                    store, 'wechat', 'index', week_start, week_end, self.keywords['wechat'])
+            
+            self.logger.info(f"已从数据存储载入数据: {', '.join(sources)}")
+            return True
             
-            return parsed_data
+        except Exception as e:
+            self.logger.error(f"从数据存储载入数据失败: {str(e)}")
+            return False
+    
+    def _parse_baidu_index_data(self, raw_data, metric):
+        """解析百度指数数据 {日期: {关键词: 数值}}"""
+        try:
+            return SeriesFrame.from_mapping('baidu', metric, raw_data)
             
         except Exception as e:
             self.logger.error(f"解析百度指数数据失败: {str(e)}")
-            return []
+            return SeriesFrame.empty('baidu', metric)
     
     def _parse_wechat_index_data(self, raw_data):
-        """解析微信指数数据"""
+        """解析微信指数数据 [{'keyword': 关键词, 'data': {日期: 数值}}]"""
         try:
-            parsed_data = []
-            
-            # 这里根据实际数据结构进行解析
+            mapping = {}
             for item in raw_data:
-                if 'keyword' in item and 'data' in item:
-                    parsed_data.append(item)
+                if 'keyword' not in item or 'data' not in item:
+                    continue
+                if not isinstance(item['data'], dict):
+                    # 没有日期的数值列表由收集流水线按收集区间写入存储
+                    self.logger.warning(f"微信指数数据缺少日期，跳过: {item['keyword']}")
+                    continue
+                for date_str, value in item['data'].items():
+                    mapping.setdefault(date_str, {})[item['keyword']] = value
             
-            return parsed_data
+            return SeriesFrame.from_mapping('wechat', 'index', mapping)
             
         except Exception as e:
             self.logger.error(f"解析微信指数数据失败: {str(e)}")
-            return []
+            return SeriesFrame.empty('wechat', 'index')
     
-    def calculate_weekly_averages(self, data, keyword):
-        """计算每周平均值"""
+    def _report_series(self):
+        """报告日期范围内的数据"""
+        if self.window is None:
+            return self.series
+        return {key: series.slice(*self.window) for key, series in self.series.items()}
+    
+    def _build_report_frame(self):
+        """
+        把所有数据合并为一个列式DataFrame，列为 (数据源, 指标, 关键词)
+        日期、星期和每周平均值只计算一次，各工作表从中取列
+        每周平均值按载入的完整ISO周计算后再裁剪到报告日期范围
+        返回 (日期和星期, 每日数值, 每周平均值)
+        """
+        frames = {key: series.to_frame() for key, series in self.series.items() if len(series)}
+        
+        if frames:
+            # 存储为float32，报告中的平均值按float64计算
+            values = pd.concat(frames, axis=1).sort_index().astype(np.float64)
+        else:
+            # 没有数据时生成最近7天的空模板
+            dates = pd.date_range(end=pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=1), periods=7)
+            values = pd.DataFrame(index=dates, columns=pd.MultiIndex.from_tuples([], names=[None, None, None]))
+        
+        averages = weekly_average_frame(values.index, values)
+        if self.window is not None and frames:
+            inside = (values.index >= self.window[0]) & (values.index <= self.window[1])
+            values, averages = values[inside], averages[inside]
+        calendar = pd.DataFrame({
+            '日期': values.index.strftime('%Y-%m-%d'),
+            '星期': values.index.day_name()
+        })
+        return calendar, values, averages
+    
+    def _build_sheet_frame(self, spec, calendar, values, averages):
+        """按模板从合并后的数据中取出一个工作表"""
+        columns = [calendar['日期'].to_numpy(), calendar['星期'].to_numpy()]
+        for keyword in spec['keywords']:
+            key = (spec['source'], spec['metric'], keyword)
+            if key in values.columns:
+                columns += [values[key].to_numpy(), averages[key].to_numpy()]
+            else:
+                columns += [[None] * len(calendar)] * 2
+        columns.append([None] * len(calendar))
+        
+        df = pd.DataFrame(dict(enumerate(columns)))
+        df.columns = template_columns(spec)
+        return df
+    
+    def generate_excel_report(self, output_path):
+        """生成Excel报告"""
         try:
-            if not data:
-                return {}
+            self.logger.info("开始生成Excel报告")
             
-            # 将数据转换为DataFrame
-            df = pd.DataFrame(data)
+            calendar, values, averages = self._build_report_frame()
             
-            # 确保日期列为datetime格式
-            df['日期'] = pd.to_datetime(df['日期'])
+            # 输入数据、配置和代码都未变化时直接复用已生成的报告
+            cache_key = None
+            if self.report_cache:
+                # 边界周的平均值还取决于范围外的数据，缓存键同时包含每日数值和每周平均值
+                report_values = pd.concat({'value': values, 'weekly_avg': averages}, axis=1)
+                cache_key = report_key(report_values, {'template': self.template, 'anomaly': ANOMALY_CONFIG, 'chart': CHART_CONFIG})
+                if self.report_cache.get(cache_key, output_path):
+                    get_catalog().register(output_path)
+                    self.logger.info(f"Excel报告已生成（缓存）: {output_path}")
+                    return True
             
-            # 按周分组计算平均值
-            df['周数'] = df['日期'].dt.isocalendar().week
+            # 峰值和异常值在写入前对整个数值矩阵一次算出
+            highlights = {}
+            if ANOMALY_CONFIG['enabled'] and values.size:
+                highlights = detect(values.index, values.to_numpy(dtype=np.float64))
             
-            weekly_avg = df.groupby('周数')[keyword].mean().to_dict()
+            # 流式写入，样式在写入单元格时套用，文件只保存一次
+            writer = StreamingReportWriter()
             
-            return weekly_avg
+            # 1. 按模板生成各指数工作表
+            for sheet_name, spec in self.template.items():
+                self._generate_sheet(writer, sheet_name, spec, calendar, values, averages, highlights)
             
-        except Exception as e:
-            self.logger.error(f"计算每周平均值失败: {str(e)}")
-            return {}
-    
-    def generate_excel_report(self, output_path):
-        """生成Excel报告"""
-        try:
-            self.logger.info("开始生成Excel报告")
-            
-            # 创建Excel写入器
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                
-                # 1. 生成微信指数趋势表
-                self._generate_wechat_sheet(writer)
-                
-                # 2. 生成百度指数搜索表
-                self._generate_baidu_search_sheet(writer)
-                
-                # 3. 生成百度指数资讯表
-                self._generate_baidu_info_sheet(writer)
-                
-                # 4. 生成汇总表
-                self._generate_summary_sheet(writer)
+            # 2. 生成汇总表
+            self._generate_summary_sheet(writer)
             
-            # 应用样式
-            self._apply_excel_styles(output_path)
+            writer.save(output_path)
+            # 覆盖同名文件不会改变目录修改时间，需要重新登记大小和修改时间
+            get_catalog().register(output_path)
+            if cache_key:
+                self.report_cache.put(cache_key, output_path)
             
             self.logger.info(f"Excel报告已生成: {output_path}")
             return True
@@ -150,253 +219,67 @@ class DataProcessor:
             self.logger.error(f"生成Excel报告失败: {str(e)}")
             return False
     
-    def _generate_wechat_sheet(self, writer):
-        """生成微信指数工作表"""
+    def _generate_sheet(self, writer, sheet_name, spec, calendar, values, averages, highlights=None):
+        """生成一个指数工作表"""
         try:
-            if not self.wechat_data:
-                # 创建空模板
-                df = self._create_empty_template('微信指数趋势')
-                df.to_excel(writer, sheet_name='微信指数趋势', index=False)
-                return
-            
-            # 处理微信指数数据
-            df = pd.DataFrame(self.wechat_data)
-            
-            # 添加周几列
-            df['日期'] = pd.to_datetime(df['日期'])
-            df['星期'] = df['日期'].dt.day_name()
-            
-            # 计算每周平均值
-            for keyword in ['上海电信', '上海移动', '上海联通']:
-                if keyword in df.columns:
-                    weekly_avg = self.calculate_weekly_averages(df.to_dict('records'), keyword)
-                    df[f'{keyword}_每周平均'] = df.apply(
-                        lambda row: weekly_avg.get(row['日期'].dt.isocalendar().week[0], ''),
-                        axis=1
-                    )
-            
-            # 重新排列列
-            columns = ['日期', '星期', '上海电信', '上海电信_每周平均', 
-                      '上海移动', '上海移动_每周平均', 
-                      '上海联通', '上海联通_每周平均']
-            
-            # 确保所有列都存在
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = ''
-            
-            df = df[columns]
-            df.to_excel(writer, sheet_name='微信指数趋势', index=False)
+            df = self._build_sheet_frame(spec, calendar, values, averages)
+            ws, row_count = writer.write_frame(sheet_name, df)
+            if highlights:
+                self._highlight_sheet(writer, ws, spec, values, highlights)
+            if CHART_CONFIG['enabled']:
+                self._add_trend_chart(writer, ws, spec, values, row_count)
             
         except Exception as e:
-            self.logger.error(f"生成微信指数工作表失败: {str(e)}")
+            self.logger.error(f"生成{sheet_name}工作表失败: {str(e)}")
     
-    def _generate_baidu_search_sheet(self, writer):
-        """生成百度指数搜索工作表"""
-        try:
-            if not self.baidu_search_data:
-                # 创建空模板
-                df = self._create_empty_template('百度指数搜索')
-                df.to_excel(writer, sheet_name='百度指数搜索', index=False)
-                return
-            
-            # 处理百度指数搜索数据
-            df = pd.DataFrame(self.baidu_search_data)
-            
-            # 添加周几列
-            df['日期'] = pd.to_datetime(df['日期'])
-            df['星期'] = df['日期'].dt.day_name()
-            
-            # 计算每周平均值
-            for keyword in ['上海电信', '上海移动', '上海联通']:
-                if keyword in df.columns:
-                    weekly_avg = self.calculate_weekly_averages(df.to_dict('records'), keyword)
-                    df[f'{keyword}_每周平均'] = df.apply(
-                        lambda row: weekly_avg.get(row['日期'].dt.isocalendar().week[0], ''),
-                        axis=1
-                    )
-            
-            # 重新排列列
-            columns = ['日期', '星期', '上海电信', '上海电信_每周平均', 
-                      '上海移动', '上海移动_每周平均', 
-                      '上海联通', '上海联通_每周平均']
-            
-            # 确保所有列都存在
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = ''
-            
-            df = df[columns]
-            df.to_excel(writer, sheet_name='百度指数搜索', index=False)
-            
-        except Exception as e:
-            self.logger.error(f"生成百度指数搜索工作表失败: {str(e)}")
+    def _add_trend_chart(self, writer, ws, spec, values, row_count):
+        """在趋势对比列放置各关键词每日指数的折线图"""
+        data_columns = [3 + 2 * i for i, keyword in enumerate(spec['keywords'])
+                        if (spec['source'], spec['metric'], keyword) in values.columns]
+        anchor = f"{get_column_letter(len(template_columns(spec)))}2"
+        writer.add_line_chart(ws, spec['trend_column'], data_columns, row_count, anchor,
+                              width=CHART_CONFIG['width'], height=CHART_CONFIG['height'],
+                              y_axis_title=CHART_CONFIG['y_axis_title'])
     
-    def _generate_baidu_info_sheet(self, writer):
-        """生成百度指数资讯工作表"""
-        try:
-            if not self.baidu_info_data:
-                # 创建空模板
-                df = self._create_empty_template('百度指数资讯')
-                df.to_excel(writer, sheet_name='百度指数资讯', index=False)
-                return
-            
-            # 处理百度指数资讯数据
-            df = pd.DataFrame(self.baidu_info_data)
-            
-            # 添加周几列
-            df['日期'] = pd.to_datetime(df['日期'])
-            df['星期'] = df['日期'].dt.day_name()
-            
-            # 计算每周平均值
-            for keyword in ['上海电信', '上海移动', '上海联通']:
-                if keyword in df.columns:
-                    weekly_avg = self.calculate_weekly_averages(df.to_dict('records'), keyword)
-                    df[f'{keyword}_每周平均'] = df.apply(
-                        lambda row: weekly_avg.get(row['日期'].dt.isocalendar().week[0], ''),
-                        axis=1
-                    )
-            
-            # 重新排列列
-            columns = ['日期', '星期', '上海电信', '上海电信_每周平均', 
-                      '上海移动', '上海移动_每周平均', 
-                      '上海联通', '上海联通_每周平均']
-            
-            # 确保所有列都存在
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = ''
-            
-            df = df[columns]
-            df.to_excel(writer, sheet_name='百度指数资讯', index=False)
-            
-        except Exception as e:
-            self.logger.error(f"生成百度指数资讯工作表失败: {str(e)}")
+    def _highlight_sheet(self, writer, ws, spec, values, highlights):
+        """把检测结果映射到工作表坐标，按类型批量添加条件格式"""
+        # 数值矩阵的列 -> 工作表中该关键词每日指数所在列（1起始），不在本表的列为0
+        sheet_columns = np.zeros(len(values.columns), dtype=np.int64)
+        for i, keyword in enumerate(spec['keywords']):
+            key = (spec['source'], spec['metric'], keyword)
+            if key in values.columns:
+                sheet_columns[values.columns.get_loc(key)] = 3 + 2 * i
+        
+        for kind, (rows, cols) in highlights.items():
+            target = sheet_columns[cols]
+            mask = target > 0
+            if kind == 'jump':
+                # 周环比突变标在每周平均值列
+                target = target + 1
+            style = ANOMALY_CONFIG['styles'][kind]
+            # 第1行为表头
+            writer.highlight(ws, rows[mask] + 2, target[mask], style['fill'], style.get('font'))
     
     def _generate_summary_sheet(self, writer):
         """生成汇总工作表"""
         try:
-            summary_data = []
+            keywords = []
+            for spec in self.template.values():
+                keywords += [keyword for keyword in spec['keywords'] if keyword not in keywords]
             
-            # 汇总各运营商的指数数据
-            operators = ['上海电信', '上海移动', '上海联通']
-            platforms = ['微信指数', '百度指数搜索', '百度指数资讯']
+            # 每个 (数据源, 指标) 的所有关键词平均值一次算出
+            df_summary = pd.DataFrame({'运营商': keywords})
+            report_series = self._report_series()
+            for spec in self.template.values():
+                series = report_series.get((spec['source'], spec['metric']))
+                if series is not None and len(series):
+                    df_summary[spec['summary_column']] = series.select(keywords).means().to_numpy()
             
-            for operator in operators:
-                row = {'运营商': operator}
-                
-                # 微信指数平均值
-                if self.wechat_data:
-                    df_wechat = pd.DataFrame(self.wechat_data)
-                    if operator in df_wechat.columns:
-                        row['微信指数平均'] = df_wechat[operator].mean()
-                
-                # 百度指数搜索平均值
-                if self.baidu_search_data:
-                    df_search = pd.DataFrame(self.baidu_search_data)
-                    if operator in df_search.columns:
-                        row['百度指数搜索平均'] = df_search[operator].mean()
-                
-                # 百度指数资讯平均值
-                if self.baidu_info_data:
-                    df_info = pd.DataFrame(self.baidu_info_data)
-                    if operator in df_info.columns:
-                        row['百度指数资讯平均'] = df_info[operator].mean()
-                
-                summary_data.append(row)
-            
-            df_summary = pd.DataFrame(summary_data)
-            df_summary.to_excel(writer, sheet_name='数据汇总', index=False)
+            writer.write_frame('数据汇总', df_summary)
             
         except Exception as e:
             self.logger.error(f"生成汇总工作表失败: {str(e)}")
     
-    def _create_empty_template(self, sheet_type):
-        """创建空模板"""
-        try:
-            if '微信' in sheet_type:
-                columns = ['日期', '星期', '上海电信', '每周指数平均值', 
-                          '上海移动', '每周指数平均值', 
-                          '上海联通', '每周指数平均值', '三家指数趋势对比']
-            elif '搜索' in sheet_type:
-                columns = ['日期', '星期', '上海电信每日搜索指数', '每周指数平均值',
-                          '上海移动每日搜索指数', '每周指数平均值',
-                          '上海联通每日搜索指数', '每周指数平均值', '三家每日搜索指数趋势对比']
-            else:  # 资讯
-                columns = ['日期', '星期', '上海电信每日资讯指数', '每周指数平均值',
-                          '上海移动每日资讯指数', '每周指数平均值',
-                          '上海联通每日资讯指数', '每周指数平均值', '三家每日资讯指数趋势对比']
-            
-            # 创建7天的空数据
-            dates = []
-            start_date = datetime.now() - timedelta(days=7)
-            for i in range(7):
-                date = start_date + timedelta(days=i)
-                dates.append({
-                    '日期': date.strftime('%Y-%m-%d'),
-                    '星期': date.strftime('%A')
-                })
-            
-            df = pd.DataFrame(dates)
-            
-            # 添加其他空列
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = ''
-            
-            return df[columns]
-            
-        except Exception as e:
-            self.logger.error(f"创建空模板失败: {str(e)}")
-            return pd.DataFrame()
-    
-    def _apply_excel_styles(self, filepath):
-        """应用Excel样式"""
-        try:
-            wb = load_workbook(filepath)
-            
-            # 定义样式
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF", size=11)
-            
-            peak_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-            peak_font = Font(color="FFFFFF", bold=True)
-            
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            # 为每个工作表应用样式
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                
-                # 设置标题行样式
-                for cell in ws[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    cell.border = border
-                
-                # 设置数据行样式
-                for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-                    for cell in row:
-                        cell.border = border
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                        
-                        # 如果是数值列，检查是否为峰值
-                        if isinstance(cell.value, (int, float)) and cell.value:
-                            # 这里可以添加峰值检测逻辑
-                            pass
-            
-            wb.save(filepath)
-            self.logger.info(f"Excel样式应用完成: {filepath}")
-            
-        except Exception as e:
-            self.logger.error(f"应用Excel样式失败: {str(e)}")
-
 def main():
     """主函数"""
     logging.basicConfig(
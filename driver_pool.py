@@ -0,0 +1,248 @@
+"""
+浏览器驱动池
+百度指数和微信指数收集器共享一组预热的无头Chrome会话，避免每次收集都冷启动浏览器
+"""
+
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from network_capture import enable_performance_logging
+from config import BROWSER_CONFIG, DRIVER_POOL_CONFIG, BAIDU_EXTRACTION_CONFIG
+
+def create_chrome_driver(headless=True, capture_network=None):
+    """创建Chrome浏览器驱动，capture_network为None时按百度指数提取模式决定是否开启网络日志"""
+    if capture_network is None:
+        capture_network = BAIDU_EXTRACTION_CONFIG['mode'] == 'network'
+    
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument(f'--window-size={BROWSER_CONFIG["window_size"]}')
+    chrome_options.add_argument(f'--user-agent={BROWSER_CONFIG["user_agent"]}')
+    if capture_network:
+        enable_performance_logging(chrome_options)
+
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.implicitly_wait(BROWSER_CONFIG['timeout'])
+    return driver
+
+class _PooledSession:
+    """驱动池中的单个浏览器会话"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+class DriverPool:
+    """浏览器驱动池"""
+
+    def __init__(self, size=None, max_uses=None, checkout_timeout=None, driver_factory=None):
+        self.logger = logging.getLogger(__name__)
+        self.size = size or DRIVER_POOL_CONFIG['size']
+        self.max_uses = max_uses or DRIVER_POOL_CONFIG['max_uses']
+        self.checkout_timeout = checkout_timeout or DRIVER_POOL_CONFIG['checkout_timeout']
+        self.driver_factory = driver_factory or (lambda: create_chrome_driver(headless=True))
+
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}      # id(driver) -> _PooledSession
+        self._creating = 0     # 正在创建中的会话数（已占用名额）
+        self._closed = False
+
+        # 统计信息
+        self._wait_times = deque(maxlen=1000)
+        self._checkouts = 0
+        self._created = 0
+        self._recycled = 0
+
+    def _total(self):
+        """当前占用名额的会话总数（调用方需持有锁）"""
+        return len(self._idle) + len(self._in_use) + self._creating
+
+    def _create_session(self):
+        """创建新会话（调用方已预留名额）"""
+        try:
+            driver = self.driver_factory()
+        except Exception:
+            with self._condition:
+                self._creating -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._creating -= 1
+            self._created += 1
+        self.logger.info("驱动池新建浏览器会话")
+        return _PooledSession(driver)
+
+    def _is_healthy(self, session):
+        """健康检查：会话仍能执行脚本即视为可用"""
+        try:
+            session.driver.execute_script("return document.readyState")
+            return True
+        except Exception as e:
+            self.logger.warning(f"浏览器会话健康检查失败: {str(e)}")
+            return False
+
+    def _quit_session(self, session):
+        """关闭会话"""
+        try:
+            session.driver.quit()
+        except Exception as e:
+            self.logger.warning(f"关闭浏览器会话失败: {str(e)}")
+
+    def warm_up(self):
+        """预热：创建会话直到达到池大小"""
+        created = 0
+        while True:
+            with self._condition:
+                if self._closed or self._total() >= self.size:
+                    break
+                self._creating += 1
+            try:
+                session = self._create_session()
+            except Exception as e:
+                self.logger.error(f"驱动池预热失败: {str(e)}")
+                break
+            with self._condition:
+                self._idle.append(session)
+                self._condition.notify()
+            created += 1
+
+        self.logger.info(f"驱动池预热完成，新建 {created} 个会话")
+        return created
+
+    def acquire(self, timeout=None):
+        """借用一个浏览器驱动"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            session = None
+            create = False
+
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("驱动池已关闭")
+                    if self._idle:
+                        session = self._idle.popleft()
+                        break
+                    if self._total() < self.size:
+                        self._creating += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"等待浏览器驱动超时（{timeout}秒）")
+                    self._condition.wait(remaining)
+
+            if create:
+                session = self._create_session()
+            elif not self._is_healthy(session):
+                # 会话已崩溃，丢弃后重新借用
+                self._quit_session(session)
+                with self._condition:
+                    self._recycled += 1
+                continue
+
+            wait_time = time.monotonic() - started
+            with self._condition:
+                self._in_use[id(session.driver)] = session
+                self._checkouts += 1
+                self._wait_times.append(wait_time)
+
+            self.logger.info(f"借用浏览器驱动，等待 {wait_time:.3f} 秒")
+            return session.driver
+
+    def release(self, driver, broken=False):
+        """归还浏览器驱动，崩溃或达到使用上限的会话会被回收"""
+        with self._condition:
+            session = self._in_use.pop(id(driver), None)
+
+        if session is None:
+            self.logger.warning("归还的浏览器驱动不属于驱动池，直接关闭")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+
+        session.uses += 1
+        recycle = broken or self._closed or session.uses >= self.max_uses
+
+        if not recycle:
+            try:
+                # 清空当前页面，避免下次借用时残留状态
+                driver.get("about:blank")
+            except Exception as e:
+                self.logger.warning(f"重置浏览器会话失败: {str(e)}")
+                recycle = True
+
+        if recycle:
+            self._quit_session(session)
+            self.logger.info(f"回收浏览器会话（已使用 {session.uses} 次）")
+
+        with self._condition:
+            if recycle:
+                self._recycled += 1
+            else:
+                self._idle.append(session)
+            self._condition.notify()
+
+    def get_stats(self):
+        """获取驱动池统计信息"""
+        with self._condition:
+            wait_times = sorted(self._wait_times)
+            stats = {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'checkouts': self._checkouts,
+                'created': self._created,
+                'recycled': self._recycled
+            }
+
+        if wait_times:
+            stats['wait_avg'] = round(sum(wait_times) / len(wait_times), 3)
+            stats['wait_p95'] = round(wait_times[min(len(wait_times) - 1, int(len(wait_times) * 0.95))], 3)
+            stats['wait_max'] = round(wait_times[-1], 3)
+        else:
+            stats['wait_avg'] = stats['wait_p95'] = stats['wait_max'] = 0
+
+        return stats
+
+    def close(self):
+        """关闭驱动池中所有空闲会话，借出的会话在归还时关闭"""
+        with self._condition:
+            self._closed = True
+            sessions = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+
+        for session in sessions:
+            self._quit_session(session)
+
+        if sessions:
+            self.logger.info(f"驱动池已关闭 {len(sessions)} 个会话")
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    """获取进程内共享的驱动池"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = DriverPool()
+            atexit.register(_shared_pool.close)
+        return _shared_pool
@@ -0,0 +1,154 @@
+"""
+流式Excel报告写入
+使用openpyxl只写模式逐行输出，写入单元格时直接套用共享的命名样式，文件只序列化一次
+"""
+
+import math
+import logging
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.chart import LineChart, Reference
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+
+HEADER_STYLE = 'report_header'
+CELL_STYLE = 'report_cell'
+
+def _create_named_styles():
+    """创建报告共享的命名样式"""
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    alignment = Alignment(horizontal='center', vertical='center')
+
+    header = NamedStyle(name=HEADER_STYLE)
+    header.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header.font = Font(bold=True, color="FFFFFF", size=11)
+    header.alignment = alignment
+    header.border = border
+
+    cell = NamedStyle(name=CELL_STYLE)
+    cell.alignment = alignment
+    cell.border = border
+
+    return [header, cell]
+
+def _clean(value):
+    """单元格取值：NaN写为空单元格，NumPy标量转为Python类型"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def cell_ranges(rows, cols):
+    """
+    把单元格坐标（1起始的行号、列号数组）合并为同列连续行的区域列表，如 ['C2:C5', 'E7']
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if not len(rows):
+        return []
+
+    order = np.lexsort((rows, cols))
+    rows, cols = rows[order], cols[order]
+    breaks = np.flatnonzero((np.diff(cols) != 0) | (np.diff(rows) != 1)) + 1
+    starts = np.r_[0, breaks]
+    ends = np.r_[breaks - 1, len(rows) - 1]
+
+    ranges = []
+    for col, first, last in zip(cols[starts].tolist(), rows[starts].tolist(), rows[ends].tolist()):
+        letter = get_column_letter(col)
+        ranges.append(f"{letter}{first}" if first == last else f"{letter}{first}:{letter}{last}")
+    return ranges
+
+class StreamingReportWriter:
+    """流式Excel报告写入器"""
+
+    def __init__(self, column_width=16):
+        self.logger = logging.getLogger(__name__)
+        self.workbook = Workbook(write_only=True)
+        self.column_width = column_width
+        for style in _create_named_styles():
+            self.workbook.add_named_style(style)
+
+    def write_rows(self, title, header, rows):
+        """
+        写入一个工作表：header为列名列表，rows为逐行产出的可迭代对象
+        行在写入后立即序列化，内存占用不随行数增长
+        """
+        ws = self.workbook.create_sheet(title)
+        for i in range(1, len(header) + 1):
+            ws.column_dimensions[get_column_letter(i)].width = self.column_width
+
+        header_cells = []
+        for name in header:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.style = HEADER_STYLE
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        # 只写模式下append会立即序列化该行，同一组单元格对象可以逐行复用
+        row_cells = []
+        for _ in header:
+            cell = WriteOnlyCell(ws)
+            cell.style = CELL_STYLE
+            row_cells.append(cell)
+
+        count = 0
+        for row in rows:
+            for cell, value in zip(row_cells, row):
+                cell.value = _clean(value)
+            ws.append(row_cells)
+            count += 1
+
+        return ws, count
+
+    def write_frame(self, title, df):
+        """写入DataFrame（不含索引）"""
+        return self.write_rows(title, list(df.columns), df.itertuples(index=False, name=None))
+
+    def highlight(self, ws, rows, cols, fill_color, font_color=None):
+        """
+        以一条条件格式规则高亮一批单元格（1起始的行号、列号数组）
+        所有区域合并到同一个规则中，不逐个单元格设置样式
+        """
+        ranges = cell_ranges(rows, cols)
+        if not ranges:
+            return 0
+
+        fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
+        font = Font(color=font_color, bold=True) if font_color else None
+        ws.conditional_formatting.add(' '.join(ranges), FormulaRule(formula=['TRUE'], fill=fill, font=font))
+        return len(ranges)
+
+    def add_line_chart(self, ws, title, data_columns, row_count, anchor, width=24, height=12, y_axis_title=None):
+        """
+        添加一个引用已写入数据区域的折线图
+        data_columns为数据列号（1起始，第1行为系列名），第1列日期作为横轴
+        图表只保存区域引用，大小与行数无关
+        """
+        if not data_columns or not row_count:
+            return None
+
+        chart = LineChart()
+        chart.title = title
+        chart.width = width
+        chart.height = height
+        chart.y_axis.title = y_axis_title
+        for col in data_columns:
+            chart.add_data(Reference(ws, min_col=col, min_row=1, max_row=row_count + 1), titles_from_data=True)
+        chart.set_categories(Reference(ws, min_col=1, min_row=2, max_row=row_count + 1))
+        ws.add_chart(chart, anchor)
+        return chart
+
+    def save(self, output_path):
+        """保存工作簿"""
+        self.workbook.save(output_path)
+        self.logger.info(f"Excel文件已写入: {output_path}")
+        return output_path
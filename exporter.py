@@ -0,0 +1,147 @@
+"""
+列式数据导出
+把存储中的指数数据导出为规范化长表（date, source, metric, keyword, value, weekly_avg）
+支持 Parquet、Feather 和 gzip CSV，每种格式一个目录，按 <格式>/source=<数据源>/month=<年-月> 分区写入，供BI工具直接读取
+分区列按Hive约定只出现在目录名中，不重复写入文件
+"""
+
+import os
+import io
+import gzip
+import logging
+import importlib.util
+import pandas as pd
+from weekly_stats import week_start_days, iso_week_bounds
+from index_store import IndexStore
+from config import EXPORT_CONFIG
+
+COLUMNS = ['date', 'source', 'metric', 'keyword', 'value', 'weekly_avg']
+FILE_NAMES = {'parquet': 'part.parquet', 'feather': 'part.feather', 'csv': 'part.csv.gz'}
+MIME_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'feather': 'application/vnd.apache.arrow.file',
+    'csv': 'application/gzip'
+}
+
+def has_pyarrow():
+    """是否安装了pyarrow（Parquet和Feather需要）"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+def long_table(store, start_date, end_date, sources=None):
+    """
+    查询长表并计算每个序列所在ISO周的平均值
+    按首尾两周的完整ISO周查询并计算平均值，再裁剪回日期范围，与Excel报告的每周平均值一致
+    date为datetime64[D]，文本列转为category以减小体积
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize()
+    week_start, week_end = iso_week_bounds(start, end)
+    df = store.query_long(week_start.to_pydatetime(), week_end.to_pydatetime(), sources)
+    keys = week_start_days(df['date'])
+    df['weekly_avg'] = df.groupby(['source', 'metric', 'keyword', keys])['value'].transform('mean')
+    dates = df['date'].values.astype('datetime64[D]')
+    df = df[(dates >= start.to_datetime64()) & (dates <= end.to_datetime64())].reset_index(drop=True)
+    for column in ('source', 'metric', 'keyword'):
+        df[column] = df[column].astype('category')
+    return df[COLUMNS]
+
+def write_table(df, path, fmt):
+    """按格式写入单个文件"""
+    if fmt == 'csv':
+        df.to_csv(path, index=False, compression='gzip', encoding='utf-8')
+    elif fmt == 'parquet':
+        df.to_parquet(path, index=False, compression='zstd')
+    elif fmt == 'feather':
+        # 不压缩，读取时可直接内存映射
+        df.reset_index(drop=True).to_feather(path, compression='uncompressed')
+    else:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+def to_bytes(df, fmt):
+    """把长表写入内存，用于接口直接返回"""
+    if fmt == 'csv':
+        buffer = io.BytesIO(gzip.compress(df.to_csv(index=False).encode('utf-8')))
+    else:
+        buffer = io.BytesIO()
+        write_table(df, buffer, fmt)
+    buffer.seek(0)
+    return buffer
+
+class ColumnarExporter:
+    """列式数据导出器"""
+
+    def __init__(self, store=None, export_dir=None, formats=None):
+        self.logger = logging.getLogger(__name__)
+        self.store = store or IndexStore()
+        self.export_dir = export_dir or EXPORT_CONFIG['dir']
+        self.formats = self._available_formats(formats or EXPORT_CONFIG['formats'])
+
+    def _available_formats(self, formats):
+        """去掉缺少依赖的格式"""
+        if has_pyarrow():
+            return list(formats)
+        skipped = [fmt for fmt in formats if fmt != 'csv']
+        if skipped:
+            self.logger.warning(f"未安装pyarrow，跳过导出格式: {', '.join(skipped)}")
+        return [fmt for fmt in formats if fmt == 'csv']
+
+    def export(self, start_date, end_date, sources=None):
+        """
+        导出日期范围覆盖的整月分区，已有分区整体覆盖
+        返回写入的文件路径列表
+        """
+        try:
+            # 扩展到整月，避免部分月份覆盖掉分区内已有的数据
+            start = pd.Timestamp(start_date).normalize().replace(day=1)
+            end = pd.Timestamp(end_date).normalize() + pd.offsets.MonthEnd(0)
+            df = long_table(self.store, start, end, sources)
+            if df.empty:
+                self.logger.info("没有需要导出的数据")
+                return []
+
+            months = df['date'].values.astype('datetime64[M]').astype(str)
+            written = []
+            for (source, month), part in df.groupby([df['source'].astype(str), months], sort=True, observed=True):
+                part = part.drop(columns=['source']).reset_index(drop=True)
+                part['metric'] = part['metric'].cat.remove_unused_categories()
+                part['keyword'] = part['keyword'].cat.remove_unused_categories()
+                for fmt in self.formats:
+                    part_dir = os.path.join(self.export_dir, fmt, f"source={source}", f"month={month}")
+                    os.makedirs(part_dir, exist_ok=True)
+                    path = os.path.join(part_dir, FILE_NAMES[fmt])
+                    temp_path = f"{path}.tmp"
+                    write_table(part, temp_path, fmt)
+                    os.replace(temp_path, path)
+                    written.append(path)
+
+            self.logger.info(f"已导出 {len(df)} 行数据，{len(written)} 个文件: {self.export_dir}")
+            return written
+
+        except Exception as e:
+            self.logger.error(f"导出列式数据失败: {str(e)}")
+            return []
+
+def main():
+    """命令行入口"""
+    import argparse
+    from datetime import datetime
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='导出列式指数数据')
+    parser.add_argument('--start', required=True, help='开始日期 YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='结束日期 YYYY-MM-DD')
+    parser.add_argument('--source', action='append', help='只导出指定数据源，可重复')
+    parser.add_argument('--format', action='append', choices=list(FILE_NAMES), help='导出格式，可重复')
+    args = parser.parse_args()
+
+    exporter = ColumnarExporter(formats=args.format)
+    files = exporter.export(datetime.strptime(args.start, '%Y-%m-%d'), datetime.strptime(args.end, '%Y-%m-%d'),
+                            sources=args.source)
+    print(f"已写入 {len(files)} 个文件")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+指数数据持久化存储
+按 (数据源, 关键词, 指标, 日期) 保存每日指数，供增量收集、报告生成和数据查询复用
+
+存储结构：
+- series: 每个 (数据源, 关键词, 指标) 一行，分配整数序列ID
+- daily_values: (序列ID, 天序号) 为主键的无rowid表，天序号为距1970-01-01的天数
+  范围查询直接走主键索引，返回NumPy数组或DataFrame
+"""
+
+import sqlite3
+import logging
+import threading
+from datetime import datetime, date
+import numpy as np
+import pandas as pd
+from config import STORE_CONFIG
+
+EPOCH = date(1970, 1, 1)
+
+def to_day(value):
+    """日期（date/datetime/字符串）转为天序号"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+def to_number(value):
+    """把收集到的数值（可能是带千分位的字符串）转为浮点数"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.replace(',', '').strip()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def day_to_str(day):
+    """天序号转为日期字符串"""
+    return str(np.datetime64(int(day), 'D'))
+
+class IndexStore:
+    """指数数据存储（SQLite）"""
+
+    def __init__(self, db_path=None):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or STORE_CONFIG['db_path']
+        self._lock = threading.Lock()
+        self._series_ids = {}  # (数据源, 关键词, 指标) -> 序列ID
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._create_schema()
+        self._load_series_ids()
+
+    def _create_schema(self):
+        """创建数据表"""
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS series (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    UNIQUE (source, keyword, metric)
+                );
+                CREATE TABLE IF NOT EXISTS daily_values (
+                    series_id INTEGER NOT NULL,
+                    day INTEGER NOT NULL,
+                    value REAL,
+                    collected_at INTEGER,
+                    PRIMARY KEY (series_id, day)
+                ) WITHOUT ROWID;
+            """)
+            self.conn.commit()
+
+    def _load_series_ids(self):
+        """加载序列ID缓存（其他进程或连接新建的序列在重新加载后可见）"""
+        with self._lock:
+            for series_id, source, keyword, metric in self.conn.execute(
+                    "SELECT id, source, keyword, metric FROM series"):
+                self._series_ids[(source, keyword, metric)] = series_id
+
+    def _series_id(self, source, keyword, metric):
+        """获取序列ID，不存在时创建（调用方需持有锁）"""
+        key = (source, keyword, metric)
+        if key not in self._series_ids:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO series (source, keyword, metric) VALUES (?, ?, ?)", key
+            )
+            if cursor.lastrowid and cursor.rowcount:
+                self._series_ids[key] = cursor.lastrowid
+            else:
+                self._series_ids[key] = self.conn.execute(
+                    "SELECT id FROM series WHERE source = ? AND keyword = ? AND metric = ?", key
+                ).fetchone()[0]
+        return self._series_ids[key]
+
+    def _find_series(self, source, metric, keywords=None):
+        """查找已有序列，返回 [(序列ID, 关键词)]；缓存中缺少序列时重新查询series表"""
+        def cached():
+            with self._lock:
+                return [(series_id, keyword) for (s, keyword, m), series_id in self._series_ids.items()
+                        if s == source and m == metric]
+
+        found = cached()
+        if keywords is None or not set(keywords) <= {keyword for _, keyword in found}:
+            self._load_series_ids()
+            found = cached()
+        if keywords is not None:
+            order = {keyword: i for i, keyword in enumerate(keywords)}
+            found = sorted((item for item in found if item[1] in order), key=lambda item: order[item[1]])
+        else:
+            found.sort(key=lambda item: item[0])
+        return found
+
+    def upsert_records(self, records):
+        """
+        批量写入记录，records为 (数据源, 关键词, 指标, 日期, 数值) 的序列
+        已有记录会被覆盖，整批在一个事务内完成
+        """
+        collected_at = int(datetime.now().timestamp())
+        with self._lock:
+            rows = [(self._series_id(source, keyword, metric), to_day(date_value), value, collected_at)
+                    for source, keyword, metric, date_value, value in records]
+            if not rows:
+                return 0
+            self.conn.executemany("""
+                INSERT INTO daily_values (series_id, day, value, collected_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (series_id, day)
+                DO UPDATE SET value = excluded.value, collected_at = excluded.collected_at
+            """, rows)
+            self.conn.commit()
+
+        self.logger.info(f"写入 {len(rows)} 条指数记录")
+        return len(rows)
+
+    def _fetch(self, series_ids, start_day, end_day):
+        """读取若干序列在天序号范围内的 (序列ID, 天序号, 数值) 数组"""
+        if not series_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+        placeholders = ','.join('?' * len(series_ids))
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT series_id, day, value FROM daily_values
+                WHERE series_id IN ({placeholders}) AND day BETWEEN ? AND ?
+            """, [*series_ids, start_day, end_day]).fetchall()
+
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        ids, days, values = zip(*rows)
+        return (np.fromiter(ids, dtype=np.int64, count=len(rows)),
+                np.fromiter(days, dtype=np.int64, count=len(rows)),
+                np.array(values, dtype=np.float64))
+
+    def query_arrays(self, source, metric, start_date, end_date, keywords=None):
+        """
+        查询日期范围内的数据
+        返回 (日期数组 datetime64[D], 关键词列表, 数值矩阵[天, 关键词])，缺失值为NaN
+        指定keywords时按其顺序返回列（没有数据的关键词整列为NaN）
+        """
+        start_day, end_day = to_day(start_date), to_day(end_date)
+        dates = np.arange(start_day, end_day + 1).astype('datetime64[D]')
+
+        found = self._find_series(source, metric, keywords)
+        columns = list(keywords) if keywords is not None else [keyword for _, keyword in found]
+        values = np.full((len(dates), len(columns)), np.nan)
+
+        column_of = {keyword: i for i, keyword in enumerate(columns)}
+        id_to_column = {series_id: column_of[keyword] for series_id, keyword in found}
+        ids, days, data = self._fetch(list(id_to_column), start_day, end_day)
+        if len(ids):
+            column_index = np.zeros(max(id_to_column) + 1, dtype=np.int64)
+            column_index[list(id_to_column)] = list(id_to_column.values())
+            values[days - start_day, column_index[ids]] = data
+
+        return dates, columns, values
+
+    def query_frame(self, source, metric, start_date, end_date, keywords=None, dropna=True):
+        """查询日期范围内的数据，返回以日期为索引、关键词为列的DataFrame"""
+        dates, columns, values = self.query_arrays(source, metric, start_date, end_date, keywords)
+        df = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='date'), columns=columns)
+        if dropna:
+            df = df.dropna(how='all')
+        return df
+
+    def query_long(self, start_date, end_date, sources=None):
+        """查询所有序列的长表 DataFrame（列：date, source, metric, keyword, value）"""
+        self._load_series_ids()
+        with self._lock:
+            series = {series_id: key for key, series_id in self._series_ids.items()
+                      if sources is None or key[0] in sources}
+
+        ids, days, values = self._fetch(list(series), to_day(start_date), to_day(end_date))
+        keys = [series[series_id] for series_id in ids.tolist()]
+        df = pd.DataFrame({
+            'date': days.astype('datetime64[D]'),
+            'source': [key[0] for key in keys],
+            'metric': [key[2] for key in keys],
+            'keyword': [key[1] for key in keys],
+            'value': values
+        })
+        return df.sort_values(['source', 'metric', 'keyword', 'date'], ignore_index=True)
+
+    def existing_dates(self, source, metric, keywords, start_date, end_date):
+        """一次查询多个关键词在日期范围内已有数据的日期，返回 {关键词: {日期字符串}}"""
+        found = dict(self._find_series(source, metric, keywords))
+        result = {keyword: set() for keyword in keywords}
+        ids, days, _ = self._fetch(list(found), to_day(start_date), to_day(end_date))
+        for series_id, day in zip(ids.tolist(), days.tolist()):
+            result[found[series_id]].add(day_to_str(day))
+        return result
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
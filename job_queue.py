@@ -0,0 +1,218 @@
+"""
+收集任务队列
+Web应用提交的收集任务进入有界队列，由固定数量的工作线程并行执行
+每个任务有独立的ID、状态、进度和结果，排队中的任务可以直接取消，运行中的任务在下一个检查点停止
+"""
+
+import os
+import uuid
+import queue
+import logging
+import threading
+from datetime import datetime
+from config import JOB_QUEUE_CONFIG, DATA_DIR, KEYWORDS
+from pipeline import CollectionPipeline, CollectionCancelled
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+CANCELLING = 'cancelling'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class QueueFullError(RuntimeError):
+    """排队任务已达上限"""
+
+class Job:
+    """一个收集任务"""
+
+    def __init__(self, start_date, end_date, keywords=None, sources=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.start_date = start_date
+        self.end_date = end_date
+        self.keywords = keywords or KEYWORDS
+        self.sources = list(sources or CollectionPipeline.SOURCES)
+        self.status = QUEUED
+        self.progress = 0
+        self.message = '排队中'
+        self.source_status = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        """任务状态（可序列化为JSON）"""
+        def time_text(value):
+            return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d'),
+            'keywords': {source: self.keywords[source] for source in self.sources},
+            'sources': self.source_status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': time_text(self.created_at),
+            'started_at': time_text(self.started_at),
+            'finished_at': time_text(self.finished_at)
+        }
+
+class JobManager:
+    """收集任务管理：有界队列 + 工作线程池"""
+
+    def __init__(self, store=None, max_workers=None, max_queued=None, max_history=None, on_update=None,
+                 pipeline_factory=CollectionPipeline):
+        """
+        on_update: 任务状态变化时的回调 on_update(job)
+        pipeline_factory: 创建流水线的函数，参数与CollectionPipeline相同（工作线程中不能等待控制台输入，interactive固定为False）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.store = store
+        self.max_workers = max_workers or JOB_QUEUE_CONFIG['max_workers']
+        self.max_history = max_history or JOB_QUEUE_CONFIG['max_history']
+        self.on_update = on_update
+        self.pipeline_factory = pipeline_factory
+        self.queue = queue.Queue(maxsize=max_queued or JOB_QUEUE_CONFIG['max_queued'])
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def start(self):
+        """启动工作线程（重复调用无影响）"""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, start_date, end_date, keywords=None, sources=None):
+        """提交任务，队列已满时抛出QueueFullError"""
+        self.start()
+        job = Job(start_date, end_date, keywords, sources)
+        with self._lock:
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"排队任务已达上限（{self.queue.maxsize}），请稍后再提交")
+            self.jobs[job.id] = job
+            self._trim_history()
+        self.logger.info(f"收集任务 {job.id} 已提交: {job.start_date.strftime('%Y-%m-%d')} 到 "
+                         f"{job.end_date.strftime('%Y-%m-%d')}，数据源 {', '.join(job.sources)}")
+        self._notify(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        """所有任务，最新的在前"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def running(self):
+        """是否有任务正在运行"""
+        with self._lock:
+            return any(job.status in (RUNNING, CANCELLING) for job in self.jobs.values())
+
+    def cancel(self, job_id):
+        """取消任务：排队中的任务直接取消，运行中的任务在下一个检查点停止；任务不存在时返回None"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                # 工作线程取出后会直接跳过
+                job.status = CANCELLED
+                job.message = '任务已取消'
+                job.finished_at = datetime.now()
+            else:
+                job.status = CANCELLING
+                job.message = '正在取消...'
+        self.logger.info(f"收集任务 {job.id} 请求取消")
+        self._notify(job)
+        return job
+
+    def _trim_history(self):
+        """只保留最近max_history个已结束的任务（调用方需持有锁）"""
+        finished = [job for job in self.jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.created_at)[:max(0, len(finished) - self.max_history)]:
+            del self.jobs[job.id]
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                self.logger.error(f"任务状态回调失败: {str(e)}")
+
+    def _update(self, job, **changes):
+        """更新任务状态并通知"""
+        with self._lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+        self._notify(job)
+
+    def _worker(self):
+        """工作线程：依次取出任务执行"""
+        while True:
+            job = self.queue.get()
+            try:
+                if not job.cancel_event.is_set():
+                    self._run(job)
+            finally:
+                self.queue.task_done()
+
+    def _run(self, job):
+        """执行一个任务"""
+        self._update(job, status=RUNNING, message='正在收集数据...', started_at=datetime.now())
+
+        def progress_callback(progress, message, sources):
+            with self._lock:
+                job.progress = progress
+                job.message = message
+                job.source_status = sources
+            self._notify(job)
+
+        try:
+            pipeline = self.pipeline_factory(progress_callback=progress_callback, store=self.store,
+                                             keywords=job.keywords, sources=job.sources,
+                                             cancel_event=job.cancel_event, interactive=False)
+            output_path = os.path.join(DATA_DIR, f"运营商指数报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job.id}.xlsx")
+            result = pipeline.run(job.start_date, job.end_date, output_path)
+
+            if result['errors']:
+                message = f"数据收集部分完成，失败数据源: {', '.join(result['errors'])}"
+            else:
+                message = '数据收集完成'
+            self._update(job, status=DONE, progress=100, message=message, finished_at=datetime.now(),
+                         result={'report_path': result['report_path'], 'errors': result['errors']})
+            self.logger.info(f"收集任务 {job.id} 完成")
+
+        except CollectionCancelled:
+            self._update(job, status=CANCELLED, message='任务已取消', finished_at=datetime.now())
+            self.logger.info(f"收集任务 {job.id} 已取消")
+        except Exception as e:
+            self._update(job, status=FAILED, message=f'数据收集失败: {str(e)}', error=str(e),
+                         finished_at=datetime.now())
+            self.logger.error(f"收集任务 {job.id} 失败: {str(e)}")
+        finally:
+            with self._lock:
+                self._trim_history()
@@ -0,0 +1,144 @@
+"""
+实时日志和状态推送
+- EventHub: 日志和状态共用的变更通知，等待方被唤醒后只读取新增内容
+- RingBufferHandler: 日志处理器，在内存环形缓冲区中保留最近N条带序号的日志
+- StatusPublisher: 收集状态变化时递增版本号并通知等待方
+- tail_lines: 从文件末尾向前按块读取最后N行，启动时用来预填缓冲区，耗时与文件大小无关
+"""
+
+import os
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+class EventHub:
+    """变更通知：每次变更递增版本号，等待方按版本号判断是否有新内容"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout=None):
+        """等待版本号超过version，返回当前版本号（超时时不变）"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+def tail_lines(path, count, block_size=8192):
+    """读取文件最后count行：从末尾向前按块读取，直到读到足够的换行符"""
+    if count <= 0 or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-count:]
+
+def parse_log_line(line):
+    """解析 '时间 - 模块 - 级别 - 消息' 格式的日志行，格式不符时返回None"""
+    parts = line.rstrip('\n').split(' - ', 3)
+    if len(parts) < 4:
+        return None
+    return {
+        'time': parts[0].split(',')[0],
+        'level': parts[2],
+        'name': parts[1],
+        'message': parts[3]
+    }
+
+class RingBufferHandler(logging.Handler):
+    """把日志以结构化记录保存在有界环形缓冲区中，每条记录有递增序号"""
+
+    def __init__(self, capacity=1000, hub=None, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+        self.seq = 0
+        self.hub = hub
+        self._records_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            # 时间、级别单独保存，消息只取正文（basicConfig会给所有处理器设置完整格式）
+            message = record.getMessage()
+            with self._records_lock:
+                self.seq += 1
+                self.records.append({
+                    'seq': self.seq,
+                    'time': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S'),
+                    'level': record.levelname,
+                    'name': record.name,
+                    'message': message
+                })
+            if self.hub:
+                self.hub.notify()
+        except Exception:
+            self.handleError(record)
+
+    def preload(self, path, count):
+        """从日志文件末尾读取最近count条记录放入缓冲区（进程启动时调用）"""
+        try:
+            records = [record for record in map(parse_log_line, tail_lines(path, count)) if record]
+        except Exception as e:
+            logging.getLogger(__name__).error(f"读取历史日志失败: {str(e)}")
+            return 0
+        with self._records_lock:
+            for record in records:
+                self.seq += 1
+                self.records.append(dict(record, seq=self.seq))
+        return len(records)
+
+    def since(self, seq=0, limit=None):
+        """
+        序号大于seq的记录，按序号升序，最多limit条（取最早的，调用方可以用最后一条的序号继续读取；limit小于1时按1条）
+        从尾部向前遍历，只访问新增记录
+        """
+        with self._records_lock:
+            new_records = []
+            for entry in reversed(self.records):
+                if entry['seq'] <= seq:
+                    break
+                new_records.append(entry)
+        new_records.reverse()
+        return new_records[:max(1, limit)] if limit is not None else new_records
+
+    def tail(self, count):
+        """最近count条记录（序号连续，按序号取不需要复制整个缓冲区）"""
+        return self.since(self.latest_seq() - count) if count > 0 else []
+
+    def latest_seq(self):
+        with self._records_lock:
+            return self.seq
+
+class StatusPublisher:
+    """收集状态变更通知，保存最新版本号供推送端判断是否需要重新发送"""
+
+    def __init__(self, status, hub=None):
+        self.status = status
+        self.hub = hub
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def update(self, **changes):
+        """更新状态并通知等待方"""
+        with self._lock:
+            self.status.update(changes)
+            self.version += 1
+        if self.hub:
+            self.hub.notify()
+
+    def snapshot(self):
+        """返回 (版本号, 状态副本)"""
+        with self._lock:
+            return self.version, dict(self.status)
@@ -12,9 +12,9 @@ import threading
 
 from config import create_directories
 from scheduler import IndexScheduler
-from baidu_collector import BaiduIndexCollector
-from wechat_collector import WechatIndexCollector
 from data_processor import DataProcessor
+from pipeline import CollectionPipeline
+from index_store import IndexStore
 
 class IndexCollectorGUI:
     """图形用户界面"""
@@ -153,33 +153,21 @@ class IndexCollectorGUI:
                 start_date, end_date = get_collection_dates()
                 logging.info(f"收集数据范围: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
                 
-                # 收集百度指数
-                logging.info("开始收集百度指数数据...")
-                baidu_collector = BaiduIndexCollector(headless=True)
-                baidu_data = baidu_collector.collect_baidu_index_data(start_date, end_date)
-                logging.info("百度指数数据收集完成")
-                
-                # 收集微信指数
-                logging.info("开始收集微信指数数据...")
-                wechat_collector = WechatIndexCollector(headless=True)
-                wechat_data = wechat_collector.collect_wechat_index_data(start_date, end_date)
-                logging.info("微信指数数据收集完成")
-                
-                # 处理数据
-                logging.info("开始处理数据...")
-                processor = DataProcessor()
-                processor.process_baidu_data(baidu_data)
-                processor.process_wechat_data(wechat_data)
-                
-                # 生成报告
+                # 百度指数和微信指数并行收集，处理并生成报告
                 output_path = f"/mnt/okcomputer/output/index_collector/data/运营商指数报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                if processor.generate_excel_report(output_path):
+                pipeline = CollectionPipeline(progress_callback=lambda progress, message, sources: logging.info(f"[{progress}%] {message}"))
+                result = pipeline.run(start_date, end_date, output_path)
+                
+                if result['report_path']:
                     logging.info(f"Excel报告生成成功: {output_path}")
                     messagebox.showinfo("成功", f"数据收集完成！\n报告已保存到:\n{output_path}")
                 else:
                     logging.error("Excel报告生成失败")
                     messagebox.showerror("错误", "Excel报告生成失败")
                 
+                if result['errors']:
+                    logging.warning(f"部分数据源收集失败: {result['errors']}")
+                
                 self.update_status("数据收集完成", "green")
                 
             except Exception as e:
@@ -213,10 +201,11 @@ class IndexCollectorGUI:
         try:
             self.update_status("正在生成报告...", "blue")
             
+            # 从数据存储读取本期已收集的数据
+            from config import get_collection_dates
+            start_date, end_date = get_collection_dates()
             processor = DataProcessor()
-            
-            # 这里可以从数据库或缓存中读取已有的数据
-            # 目前生成空模板
+            processor.load_from_store(IndexStore(), start_date, end_date)
             
             output_path = f"/mnt/okcomputer/output/index_collector/data/运营商指数报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             
@@ -0,0 +1,179 @@
+"""
+百度指数网络捕获提取
+开启Chrome性能日志，捕获趋势图背后的接口JSON响应并直接解码为逐日序列
+捕获到的原始响应可保存为JSON文件，离线回放验证解码结果
+"""
+
+import os
+import sys
+import json
+import base64
+import logging
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from baidu_decoder import METRIC_BY_API, decode_index_payload
+
+# 需要捕获的接口：指数数据接口和解密密钥接口
+PTBK_PATH = 'Interface/ptbk'
+CAPTURE_PATTERNS = tuple(METRIC_BY_API) + (PTBK_PATH,)
+
+def enable_performance_logging(chrome_options):
+    """在Chrome启动参数中开启性能日志（包含网络事件）"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+def extract_responses(log_entries, get_body, patterns=CAPTURE_PATTERNS):
+    """
+    从性能日志中找出匹配接口的响应并读取响应体
+    get_body(request_id) 返回响应体文本，回放时可替换为读取录制文件
+    """
+    logger = logging.getLogger(__name__)
+    urls = {}
+    finished = []
+
+    for entry in log_entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError, TypeError):
+            continue
+
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.responseReceived':
+            url = params.get('response', {}).get('url', '')
+            if any(pattern in url for pattern in patterns):
+                urls[params['requestId']] = url
+        elif method == 'Network.loadingFinished' and params.get('requestId') in urls:
+            finished.append(params['requestId'])
+
+    responses = []
+    for request_id in finished:
+        try:
+            responses.append({'url': urls[request_id], 'body': get_body(request_id)})
+        except Exception as e:
+            logger.warning(f"读取接口响应失败 {urls[request_id]}: {str(e)}")
+
+    return responses
+
+def _metric_of(url):
+    """根据接口地址判断指数类型"""
+    for api, metric in METRIC_BY_API.items():
+        if api in url:
+            return metric
+    return None
+
+def decode_captured_responses(responses):
+    """
+    把捕获到的响应解码为 {指数类型: {日期: {关键词: 数值}}}
+    指数接口与ptbk接口通过uniqid配对，同一类型的多次响应按捕获顺序合并
+    """
+    logger = logging.getLogger(__name__)
+    keys = {}
+    payloads = []
+
+    for response in responses:
+        try:
+            body = json.loads(response['body'])
+        except (ValueError, TypeError):
+            continue
+
+        if PTBK_PATH in response['url']:
+            uniqid = parse_qs(urlparse(response['url']).query).get('uniqid', [''])[0]
+            keys[uniqid] = body.get('data', '')
+        else:
+            metric = _metric_of(response['url'])
+            if metric:
+                payloads.append((metric, body))
+
+    result = {}
+    for metric, body in payloads:
+        if body.get('status', 0) != 0:
+            logger.warning(f"{metric}接口返回异常状态: {body.get('status')} {body.get('message', '')}")
+            continue
+        uniqid = (body.get('data') or {}).get('uniqid', '')
+        if uniqid not in keys:
+            logger.warning(f"{metric}接口响应缺少对应的解密密钥（uniqid={uniqid}）")
+            continue
+        series = result.setdefault(metric, {})
+        for date_str, values in decode_index_payload(body, keys[uniqid]).items():
+            series.setdefault(date_str, {}).update(values)
+
+    return {metric: dict(sorted(series.items())) for metric, series in result.items()}
+
+def save_recording(responses, filepath):
+    """保存捕获到的原始响应，供离线回放"""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(responses, f, ensure_ascii=False, indent=2)
+    return filepath
+
+def load_recording(filepath):
+    """读取录制的原始响应"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+class NetworkCapture:
+    """浏览器网络响应捕获器"""
+
+    def __init__(self, driver, record_dir=None):
+        self.logger = logging.getLogger(__name__)
+        self.driver = driver
+        self.record_dir = record_dir
+        self.responses = []
+
+    def reset(self):
+        """清空已缓冲的性能日志和已捕获的响应"""
+        self.responses = []
+        try:
+            self.driver.get_log('performance')
+        except Exception as e:
+            self.logger.warning(f"浏览器未开启性能日志，无法捕获网络响应: {str(e)}")
+
+    def _get_body(self, request_id):
+        """通过DevTools协议读取响应体"""
+        result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        body = result.get('body', '')
+        if result.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8')
+        return body
+
+    def poll(self):
+        """读取新产生的性能日志并追加捕获到的响应"""
+        log_entries = self.driver.get_log('performance')
+        new_responses = extract_responses(log_entries, self._get_body)
+        self.responses.extend(new_responses)
+        self.logger.info(f"捕获到 {len(new_responses)} 个指数接口响应")
+        return new_responses
+
+    def decode(self):
+        """解码目前捕获到的所有响应"""
+        return decode_captured_responses(self.responses)
+
+    def save(self, filename_prefix='baidu_capture'):
+        """保存录制文件（未配置录制目录时跳过）"""
+        if not self.record_dir or not self.responses:
+            return None
+        os.makedirs(self.record_dir, exist_ok=True)
+        filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filepath = save_recording(self.responses, os.path.join(self.record_dir, filename))
+        self.logger.info(f"网络响应录制已保存: {filepath}")
+        return filepath
+
+def main():
+    """主函数：离线回放录制文件并输出解码结果"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if len(sys.argv) < 2:
+        print("用法: python network_capture.py <录制文件.json>")
+        return
+
+    decoded = decode_captured_responses(load_recording(sys.argv[1]))
+    for metric, series in decoded.items():
+        print(f"[{metric}] {len(series)} 天")
+        for date_str, values in series.items():
+            print(f"  {date_str}: {values}")
+
+if __name__ == '__main__':
+    main()
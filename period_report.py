@@ -0,0 +1,138 @@
+"""
+多周期历史报告
+对任意日期范围按周期（月/季度/年）拆分，每个周期一个工作表，按粒度（日/周/月）聚合已存储的数据
+逐个周期查询、聚合、写入，内存只保留当前周期的数据
+"""
+
+import time
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from excel_writer import StreamingReportWriter
+from weekly_stats import week_start_days
+from index_store import IndexStore
+from artifact_catalog import get_catalog
+from config import EXCEL_TEMPLATE, PERIOD_REPORT_CONFIG
+
+PERIOD_FREQ = {'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+GRANULARITY_LABELS = {'day': '日期', 'week': '周（周一）', 'month': '月份'}
+
+def split_periods(start_date, end_date, period):
+    """把日期范围拆分为周期 [(工作表名, 开始, 结束)]，首尾周期截断到范围内"""
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize()
+    if period == 'all':
+        return [(f"{start.strftime('%Y%m%d')}-{end.strftime('%Y%m%d')}", start, end)]
+
+    periods = []
+    for p in pd.period_range(start, end, freq=PERIOD_FREQ[period]):
+        periods.append((str(p), max(start, p.start_time), min(end, p.end_time.normalize())))
+    return periods
+
+def bucket_keys(dates, granularity):
+    """每个日期所属的聚合区间起始日（datetime64[D]）"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if granularity == 'week':
+        return week_start_days(dates).astype('datetime64[D]')
+    if granularity == 'month':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    return dates
+
+def aggregate(dates, values, granularity):
+    """
+    按粒度对 [天, 序列] 矩阵求平均（忽略缺失值）
+    返回 (区间标签列表, 聚合后的矩阵)
+    """
+    keys = bucket_keys(dates, granularity)
+    grouped = pd.DataFrame(values).groupby(keys, sort=True).mean()
+    labels = grouped.index.values.astype('datetime64[D]').astype(str)
+    if granularity == 'month':
+        labels = [label[:7] for label in labels]
+    return list(labels), grouped.to_numpy()
+
+def report_series():
+    """报告中的全部序列 [(列名, 数据源, 指标, 关键词)]，顺序与模板一致"""
+    series = []
+    for sheet_name, spec in EXCEL_TEMPLATE.items():
+        for keyword in spec['keywords']:
+            series.append((f"{sheet_name}-{keyword}", spec['source'], spec['metric'], keyword))
+    return series
+
+class PeriodReportGenerator:
+    """多周期历史报告生成器"""
+
+    def __init__(self, store=None, period=None, granularity=None):
+        self.logger = logging.getLogger(__name__)
+        self.store = store or IndexStore()
+        self.period = period or PERIOD_REPORT_CONFIG['period']
+        self.granularity = granularity or PERIOD_REPORT_CONFIG['granularity']
+        if self.period not in PERIOD_FREQ and self.period != 'all':
+            raise ValueError(f"不支持的周期: {self.period}")
+        if self.granularity not in GRANULARITY_LABELS:
+            raise ValueError(f"不支持的粒度: {self.granularity}")
+
+    def _load_period(self, start_date, end_date):
+        """查询一个周期内所有模板序列，返回 (日期数组, [天, 序列] 矩阵)"""
+        dates = None
+        blocks = []
+        for spec in EXCEL_TEMPLATE.values():
+            dates, _, values = self.store.query_arrays(
+                spec['source'], spec['metric'], start_date, end_date, spec['keywords'])
+            blocks.append(values)
+        return dates, np.hstack(blocks)
+
+    def generate(self, start_date, end_date, output_path):
+        """生成报告，成功返回output_path"""
+        try:
+            started = time.perf_counter()
+            periods = split_periods(start_date, end_date, self.period)
+            series = report_series()
+            header = [GRANULARITY_LABELS[self.granularity]] + [name for name, _, _, _ in series]
+            self.logger.info(f"开始生成多周期报告: {len(periods)} 个周期，{len(series)} 个序列，粒度 {self.granularity}")
+
+            writer = StreamingReportWriter()
+            summary = []
+            for sheet_name, period_start, period_end in periods:
+                dates, values = self._load_period(period_start, period_end)
+                labels, aggregated = aggregate(dates, values, self.granularity)
+                rows = ([label] + row for label, row in zip(labels, aggregated.tolist()))
+                writer.write_rows(sheet_name, header, rows)
+                summary.append([sheet_name] + pd.DataFrame(values).mean().tolist())
+
+            writer.write_rows('周期汇总', ['周期'] + header[1:], summary)
+            writer.save(output_path)
+            get_catalog().register(output_path, start_date, end_date)
+
+            self.logger.info(f"多周期报告已生成: {output_path}，耗时 {time.perf_counter() - started:.2f} 秒")
+            return output_path
+
+        except Exception as e:
+            self.logger.error(f"生成多周期报告失败: {str(e)}")
+            return None
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='用已存储的数据生成多周期历史报告')
+    parser.add_argument('--start', required=True, help='开始日期 YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='结束日期 YYYY-MM-DD')
+    parser.add_argument('--period', choices=list(PERIOD_FREQ) + ['all'], help='每个工作表的周期')
+    parser.add_argument('--granularity', choices=list(GRANULARITY_LABELS), help='聚合粒度')
+    parser.add_argument('--output', help='输出文件路径')
+    args = parser.parse_args()
+
+    generator = PeriodReportGenerator(period=args.period, granularity=args.granularity)
+    output_path = args.output or f"运营商指数历史报告_{generator.period}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    report_path = generator.generate(
+        datetime.strptime(args.start, '%Y-%m-%d'), datetime.strptime(args.end, '%Y-%m-%d'), output_path)
+    print(f"报告已生成: {report_path}" if report_path else "报告生成失败")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+数据收集流水线
+百度指数和微信指数并行收集，各数据源独立容错，结果到达即处理，最后生成Excel报告
+收集结果写入本地存储，只收集存储中缺失的日期，报告基于存储数据生成
+Web应用、定时任务和图形界面共用此流程
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import KEYWORDS, SHARD_CONFIG, EXPORT_CONFIG
+from baidu_collector import BaiduIndexCollector
+from wechat_collector import WechatIndexCollector
+from sharded_collector import ShardedCollector
+from data_processor import DataProcessor
+from driver_pool import get_driver_pool
+from index_store import IndexStore
+from collection_planner import CollectionPlanner, baidu_records, wechat_records
+from exporter import ColumnarExporter
+from artifact_catalog import get_catalog
+
+class CollectionCancelled(RuntimeError):
+    """收集任务被取消"""
+
+# 总进度分配：收集阶段 0-70，处理完成 90，报告生成 100
+COLLECT_PROGRESS = 70
+PROCESS_PROGRESS = 90
+
+class CollectionPipeline:
+    """数据收集流水线"""
+
+    SOURCES = ('baidu', 'wechat')
+    SOURCE_NAMES = {'baidu': '百度指数', 'wechat': '微信指数'}
+
+    def __init__(self, progress_callback=None, driver_pool=None, store=None, keywords=None, sources=None,
+                 cancel_event=None, interactive=True):
+        """
+        keywords: {数据源: 关键词列表}，默认使用配置中的关键词
+        sources: 要收集的数据源，默认全部
+        cancel_event: threading.Event，设置后在下一个检查点抛出CollectionCancelled
+        interactive: 为False时微信指数网页版不可用直接失败，不进入需要按回车继续的手动收集模式
+        """
+        self.logger = logging.getLogger(__name__)
+        self.progress_callback = progress_callback
+        self.driver_pool = driver_pool or get_driver_pool()
+        self.store = store or IndexStore()
+        self.keywords = keywords or KEYWORDS
+        self.sources = tuple(sources or self.SOURCES)
+        self.cancel_event = cancel_event
+        self.interactive = interactive
+        self.planner = CollectionPlanner(self.store)
+        self._lock = threading.Lock()
+        self.source_status = {}
+
+    def _update(self, source, status, progress, message):
+        """更新单个数据源的进度并通知调用方"""
+        with self._lock:
+            self.source_status[source] = {'status': status, 'progress': progress, 'message': message}
+            collected = sum(s['progress'] for key, s in self.source_status.items() if key in self.sources)
+            overall = int(collected / (100 * len(self.sources)) * COLLECT_PROGRESS)
+            sources = {key: dict(value) for key, value in self.source_status.items()}
+
+        self.logger.info(message)
+        if self.progress_callback:
+            self.progress_callback(overall, message, sources)
+
+    def _notify(self, progress, message):
+        """通知处理和报告阶段的总进度"""
+        self.logger.info(message)
+        if self.progress_callback:
+            with self._lock:
+                sources = {key: dict(value) for key, value in self.source_status.items()}
+            self.progress_callback(progress, message, sources)
+
+    def check_cancelled(self):
+        """已请求取消时抛出CollectionCancelled（正在进行的单次浏览器收集无法中断，在区间之间检查）"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CollectionCancelled("收集任务已取消")
+
+    def _collect_baidu(self, start_date, end_date):
+        """收集百度指数（关键词超过对比上限时分片并行）"""
+        keywords = self.keywords['baidu']
+        if len(keywords) > SHARD_CONFIG['baidu_compare_limit']:
+            return ShardedCollector().collect_baidu_index_data(start_date, end_date, keywords)
+        collector = BaiduIndexCollector(headless=True, driver_pool=self.driver_pool)
+        return collector.collect_baidu_index_data(start_date, end_date, keywords)
+
+    def _collect_wechat(self, start_date, end_date, interactive=True):
+        """收集微信指数（关键词较多时分片并行）"""
+        keywords = self.keywords['wechat']
+        if len(keywords) > SHARD_CONFIG['wechat_shard_size']:
+            return ShardedCollector().collect_wechat_index_data(start_date, end_date, keywords, interactive=interactive)
+        collector = WechatIndexCollector(headless=True, driver_pool=self.driver_pool)
+        return collector.collect_wechat_index_data(start_date, end_date, keywords, interactive=interactive)
+
+    def _run_source(self, source, start_date, end_date):
+        """在工作线程中收集单个数据源缺失的日期区间并写入存储，返回最后一次收集的原始结果"""
+        name = self.SOURCE_NAMES[source]
+        ranges = self.planner.plan(source, start_date, end_date, self.keywords[source])
+        if not ranges:
+            self._update(source, 'running', 0, f"{name}数据已在存储中，跳过收集")
+            return {'method': 'stored'}
+
+        data = None
+        for i, (range_start, range_end) in enumerate(ranges):
+            self.check_cancelled()
+            self._update(source, 'running', int(i / len(ranges) * 100),
+                         f"开始收集{name}数据: {range_start.strftime('%Y-%m-%d')} 到 {range_end.strftime('%Y-%m-%d')}")
+            data = self.collect_range(source, range_start, range_end)
+            if data is None:
+                return None
+
+        return data
+
+    def collect_range(self, source, start_date, end_date, require_records=False, interactive=None):
+        """
+        收集单个数据源一个日期区间的数据并写入存储，返回原始结果（失败时为None）
+        require_records: 结果中没有可写入存储的数据（手动收集模式、页面未取到数据）时抛出RuntimeError
+        interactive: 覆盖流水线的interactive设置，None时使用流水线的设置
+        """
+        if source == 'baidu':
+            data = self._collect_baidu(start_date, end_date)
+        else:
+            data = self._collect_wechat(start_date, end_date,
+                                        interactive=self.interactive if interactive is None else interactive)
+        if data is None:
+            return None
+        if source == 'baidu':
+            records = baidu_records(data)
+        else:
+            records = wechat_records(data, start_date, end_date)
+        if require_records and not records:
+            raise RuntimeError(f"{self.SOURCE_NAMES[source]}收集结果没有可写入的数据（method={data.get('method')}）")
+        self.store.upsert_records(records)
+        return data
+
+    def run(self, start_date, end_date, output_path):
+        """
+        运行完整流程
+        返回 {'baidu_data', 'wechat_data', 'errors', 'report_path', 'sources'}
+        """
+        self.source_status = {}
+        results = {source: None for source in self.SOURCES}
+        errors = {}
+        processor = DataProcessor(keywords=self.keywords)
+        self.check_cancelled()
+
+        self.logger.info(f"收集日期范围: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
+
+        with ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix='collect') as executor:
+            futures = {
+                executor.submit(self._run_source, source, start_date, end_date): source
+                for source in self.sources
+            }
+
+            # 哪个数据源先完成就先处理哪个
+            for future in as_completed(futures):
+                source = futures[future]
+                name = self.SOURCE_NAMES[source]
+                try:
+                    data = future.result()
+                    if data is None:
+                        raise RuntimeError(f"{name}收集未返回数据")
+                    results[source] = data
+                    processor.load_from_store(self.store, start_date, end_date, sources=(source,))
+                    self._update(source, 'done', 100, f"{name}数据收集完成")
+                except CollectionCancelled as e:
+                    errors[source] = str(e)
+                    self._update(source, 'cancelled', 100, f"{name}数据收集已取消")
+                except Exception as e:
+                    errors[source] = str(e)
+                    self._update(source, 'failed', 100, f"{name}数据收集失败: {str(e)}")
+
+        self.check_cancelled()
+        if len(errors) == len(self.sources):
+            raise RuntimeError(f"所有数据源均收集失败: {errors}")
+
+        self._notify(PROCESS_PROGRESS, "正在生成Excel报告...")
+        report_path = output_path if processor.generate_excel_report(output_path) else None
+        if report_path:
+            # 登记到报告目录索引（报告不在索引目录中时忽略）
+            get_catalog().register(report_path, start_date, end_date,
+                                   sorted({keyword for source in self.sources for keyword in self.keywords[source]}),
+                                   self.sources[0] if len(self.sources) == 1 else None)
+            self._notify(100, f"Excel报告生成成功: {report_path}")
+        else:
+            self.logger.error("Excel报告生成失败")
+
+        # 同步导出本次日期范围覆盖月份的列式数据
+        if EXPORT_CONFIG['enabled']:
+            ColumnarExporter(self.store).export(start_date, end_date, self.sources)
+
+        return {
+            'baidu_data': results['baidu'],
+            'wechat_data': results['wechat'],
+            'errors': errors,
+            'report_path': report_path,
+            'sources': self.source_status
+        }
@@ -0,0 +1,321 @@
+"""
+请求限速和熔断
+每个数据源一个令牌桶限速器和一个熔断器，所有收集器共享
+- 限速：请求成功且延迟正常时逐步加速（加法增加），出错或被限流时按比例降速（乘法减少）
+  记住上次被限流时的速率，接近该速率时放慢加速，避免在限流边缘反复震荡
+- 熔断：连续失败达到阈值后暂停请求，冷却后放行一个探测请求，成功则恢复
+- 共享：配置了状态文件时令牌桶和熔断状态保存在SQLite中，分片工作进程、定时任务和Web应用
+  共用同一个速率和熔断器；未配置时只在进程内共享
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from config import RATE_LIMIT_CONFIG
+
+class ThrottledError(RuntimeError):
+    """请求被网站限流（验证码、429等）"""
+
+class CircuitOpenError(RuntimeError):
+    """熔断器打开，暂停请求"""
+
+    def __init__(self, message, retry_after=0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class MemoryState:
+    """进程内共享的状态"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    @contextmanager
+    def transaction(self, key, defaults):
+        """读取并修改一个键的状态，代码块内独占"""
+        with self._lock:
+            yield self._data.setdefault(key, dict(defaults))
+
+class SqliteState:
+    """多进程共享的状态：每次读改写在一个IMMEDIATE事务内完成，进程之间互斥"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._connect()
+        self.conn.execute("CREATE TABLE IF NOT EXISTS guard_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+
+    @contextmanager
+    def transaction(self, key, defaults):
+        """读取并修改一个键的状态，代码块内独占（代码块抛出异常时不写入）"""
+        if self._pid != os.getpid():
+            # 分片工作进程由fork创建时不能沿用父进程的连接
+            self._connect()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT value FROM guard_state WHERE key = ?", (key,)).fetchone()
+                state = dict(defaults, **json.loads(row[0])) if row else dict(defaults)
+                yield state
+                self.conn.execute("INSERT OR REPLACE INTO guard_state (key, value) VALUES (?, ?)",
+                                  (key, json.dumps(state)))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+class AdaptiveRateLimiter:
+    """AIMD自适应令牌桶"""
+
+    def __init__(self, rate, burst=1, min_rate=0.01, max_rate=None, increase=0.05,
+                 error_decrease=0.7, throttle_decrease=0.5, latency_target=None, state=None, key='limiter'):
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.increase = increase
+        self.error_decrease = error_decrease
+        self.throttle_decrease = throttle_decrease
+        self.latency_target = latency_target
+        self.state = state or MemoryState()
+        self.key = key
+        # 状态可能跨进程共享，时间使用系统时钟
+        self._defaults = {'rate': rate, 'ceiling': None, 'tokens': burst, 'updated': time.time()}
+
+    @property
+    def rate(self):
+        with self.state.transaction(self.key, self._defaults) as state:
+            return state['rate']
+
+    @property
+    def ceiling(self):
+        """上次被限流时的速率"""
+        with self.state.transaction(self.key, self._defaults) as state:
+            return state['ceiling']
+
+    def acquire(self):
+        """取得一个令牌，必要时等待，返回等待的秒数"""
+        with self.state.transaction(self.key, self._defaults) as state:
+            now = time.time()
+            # 按当前速率补充令牌
+            state['tokens'] = min(self.burst, state['tokens'] + max(0, now - state['updated']) * state['rate'])
+            state['updated'] = now
+            # 先预留令牌再在事务外等待，并发请求按到达顺序排队
+            state['tokens'] -= 1
+            wait = -state['tokens'] / state['rate'] if state['tokens'] < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self, latency=None):
+        """请求成功：延迟正常时加法增加速率，延迟过高时小幅降速"""
+        with self.state.transaction(self.key, self._defaults) as state:
+            if self.latency_target and latency is not None and latency > self.latency_target:
+                state['rate'] = max(self.min_rate, state['rate'] * 0.9)
+                return
+            step = self.increase
+            if state['ceiling'] and state['rate'] >= state['ceiling'] * 0.9:
+                step /= 4
+            state['rate'] = min(self.max_rate, state['rate'] + step)
+
+    def on_failure(self, throttled=False):
+        """请求失败：乘法减少速率，被限流时减少更多并记住当时的速率"""
+        with self.state.transaction(self.key, self._defaults) as state:
+            if throttled:
+                state['ceiling'] = state['rate']
+                state['rate'] = max(self.min_rate, state['rate'] * self.throttle_decrease)
+            else:
+                state['rate'] = max(self.min_rate, state['rate'] * self.error_decrease)
+
+class CircuitBreaker:
+    """熔断器：closed（正常）-> open（暂停）-> half_open（探测）"""
+
+    def __init__(self, failure_threshold=5, recovery_timeout=60, max_recovery_timeout=1800, probe_timeout=300,
+                 state=None, key='breaker'):
+        """probe_timeout: 探测请求超过该秒数仍未结束（进程崩溃或被终止）时放行新的探测"""
+        self.failure_threshold = failure_threshold
+        self.base_recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.probe_timeout = probe_timeout
+        self.state_store = state or MemoryState()
+        self.key = key
+        self._defaults = {'state': 'closed', 'failures': 0, 'opened_at': 0,
+                          'recovery_timeout': recovery_timeout, 'probing': False, 'probe_started': 0}
+
+    @property
+    def state(self):
+        with self.state_store.transaction(self.key, self._defaults) as state:
+            return state['state']
+
+    @property
+    def recovery_timeout(self):
+        with self.state_store.transaction(self.key, self._defaults) as state:
+            return state['recovery_timeout']
+
+    def retry_after(self):
+        """距离允许探测还有多少秒（探测进行中时为探测超时前的剩余时间）"""
+        with self.state_store.transaction(self.key, self._defaults) as state:
+            if state['state'] == 'open':
+                return max(0, state['opened_at'] + state['recovery_timeout'] - time.time())
+            if state['state'] == 'half_open' and state['probing']:
+                return max(0, state['probe_started'] + self.probe_timeout - time.time())
+            return 0
+
+    def allow(self):
+        """是否允许发出请求；冷却结束后只放行一个探测请求，探测超时未结束时放行下一个"""
+        with self.state_store.transaction(self.key, self._defaults) as state:
+            now = time.time()
+            if state['state'] == 'closed':
+                return True
+            if state['state'] == 'open':
+                if now - state['opened_at'] < state['recovery_timeout']:
+                    return False
+                state['state'] = 'half_open'
+                state['probing'] = False
+            if state['probing'] and now - state['probe_started'] < self.probe_timeout:
+                return False
+            state['probing'] = True
+            state['probe_started'] = now
+            return True
+
+    def record_success(self):
+        with self.state_store.transaction(self.key, self._defaults) as state:
+            state.update(state='closed', failures=0, probing=False, recovery_timeout=self.base_recovery_timeout)
+
+    def record_failure(self):
+        with self.state_store.transaction(self.key, self._defaults) as state:
+            state['failures'] += 1
+            if state['state'] == 'half_open':
+                # 探测失败，冷却时间翻倍
+                state['recovery_timeout'] = min(self.max_recovery_timeout, state['recovery_timeout'] * 2)
+                self._open(state)
+            elif state['state'] == 'closed' and state['failures'] >= self.failure_threshold:
+                self._open(state)
+
+    def _open(self, state):
+        """打开熔断器（在事务内调用）"""
+        state.update(state='open', opened_at=time.time(), probing=False)
+
+class SourceGuard:
+    """单个数据源的限速器和熔断器"""
+
+    def __init__(self, source, limiter, breaker):
+        self.logger = logging.getLogger(__name__)
+        self.source = source
+        self.limiter = limiter
+        self.breaker = breaker
+        self.stats = {'requests': 0, 'failures': 0, 'throttled': 0, 'rejected': 0, 'wait_time': 0.0}
+        self._lock = threading.Lock()
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def check(self):
+        """熔断器打开时直接抛出CircuitOpenError，不占用探测名额"""
+        retry_after = self.breaker.retry_after()
+        if retry_after > 0:
+            self._count('rejected')
+            raise CircuitOpenError(f"{self.source}请求已熔断，{retry_after:.0f} 秒后重试", retry_after)
+
+    @contextmanager
+    def request(self, name=''):
+        """
+        包裹一次对网站的请求：先检查熔断、取得令牌，再根据结果调整速率
+        代码块中抛出ThrottledError表示被限流
+        """
+        if not self.breaker.allow():
+            self._count('rejected')
+            retry_after = self.breaker.retry_after()
+            raise CircuitOpenError(f"{self.source}请求已熔断，{retry_after:.0f} 秒后重试", retry_after)
+
+        self._count('wait_time', self.limiter.acquire())
+        self._count('requests')
+        started = time.monotonic()
+        try:
+            yield
+        except ThrottledError as e:
+            self._count('throttled')
+            self.limiter.on_failure(throttled=True)
+            self.breaker.record_failure()
+            self.logger.warning(f"{self.source}请求被限流{f'（{name}）' if name else ''}: {str(e)}，"
+                                f"速率降至 {self.limiter.rate:.3f} 次/秒")
+            raise
+        except Exception:
+            self._count('failures')
+            self.limiter.on_failure()
+            self.breaker.record_failure()
+            raise
+        else:
+            self.limiter.on_success(time.monotonic() - started)
+            self.breaker.record_success()
+
+    def get_stats(self):
+        """限速和熔断状态"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update({
+            'rate': round(self.limiter.rate, 4),
+            'ceiling': round(self.limiter.ceiling, 4) if self.limiter.ceiling else None,
+            'circuit': self.breaker.state,
+            'retry_after': round(self.breaker.retry_after(), 1),
+            'wait_time': round(stats['wait_time'], 2)
+        })
+        return stats
+
+_guards = {}
+_guards_lock = threading.Lock()
+_state = None
+
+def get_state():
+    """限速和熔断状态的存储：配置了状态文件时跨进程共享，否则只在进程内共享"""
+    global _state
+    if _state is None:
+        path = RATE_LIMIT_CONFIG.get('state_file')
+        try:
+            _state = SqliteState(path) if path else MemoryState()
+        except Exception as e:
+            logging.getLogger(__name__).error(f"打开限速状态文件失败，改为进程内共享: {str(e)}")
+            _state = MemoryState()
+    return _state
+
+def get_guard(source):
+    """获取数据源共享的限速熔断器"""
+    with _guards_lock:
+        if source not in _guards:
+            config = RATE_LIMIT_CONFIG[source]
+            limiter = AdaptiveRateLimiter(
+                rate=config['rate'],
+                burst=config['burst'],
+                min_rate=config['min_rate'],
+                max_rate=config['max_rate'],
+                increase=config['increase'],
+                latency_target=config['latency_target'],
+                state=get_state(),
+                key=f'{source}:limiter'
+            )
+            breaker = CircuitBreaker(
+                failure_threshold=RATE_LIMIT_CONFIG['breaker']['failure_threshold'],
+                recovery_timeout=RATE_LIMIT_CONFIG['breaker']['recovery_timeout'],
+                max_recovery_timeout=RATE_LIMIT_CONFIG['breaker']['max_recovery_timeout'],
+                probe_timeout=RATE_LIMIT_CONFIG['breaker']['probe_timeout'],
+                state=get_state(),
+                key=f'{source}:breaker'
+            )
+            _guards[source] = SourceGuard(source, limiter, breaker)
+        return _guards[source]
+
+def get_all_stats():
+    """所有数据源的限速熔断状态"""
+    with _guards_lock:
+        guards = dict(_guards)
+    return {source: guard.get_stats() for source, guard in guards.items()}
@@ -0,0 +1,142 @@
+"""
+报告缓存
+以输入数据、模板配置和报告代码版本的哈希作为键保存生成的Excel文件
+相同的请求直接复制已有文件，不再重新生成；按总大小、数量和存放时间淘汰旧文件
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import logging
+import tempfile
+import threading
+import numpy as np
+from config import REPORT_CACHE_CONFIG, EXCEL_TEMPLATE, ANOMALY_CONFIG, CHART_CONFIG, template_columns
+
+# 参与生成报告的模块，源码变化后缓存自动失效
+REPORT_MODULES = ('data_processor', 'series_frame', 'excel_writer', 'anomaly_detector', 'weekly_stats', 'report_cache')
+# config.py中决定报告列名的函数（EXCEL_TEMPLATE本身作为配置计入缓存键）
+REPORT_FUNCTIONS = (template_columns,)
+
+_code_version = None
+
+def code_version():
+    """报告相关模块和函数源码的哈希"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in REPORT_MODULES:
+            path = os.path.join(base_dir, f"{name}.py")
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        for function in REPORT_FUNCTIONS:
+            digest.update(inspect.getsource(function).encode('utf-8'))
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def report_key(values, settings=None):
+    """
+    计算报告缓存键
+    values: 以日期为索引、(数据源, 指标, 关键词) 为列的DataFrame
+    settings: 影响报告内容的配置，默认使用模板、高亮和图表配置
+    """
+    if settings is None:
+        settings = {'template': EXCEL_TEMPLATE, 'anomaly': ANOMALY_CONFIG, 'chart': CHART_CONFIG}
+
+    # 列按名称排序，数值统一为float64，保证相同数据得到相同的键
+    values = values.sort_index(axis=1)
+    digest = hashlib.sha256()
+    digest.update(code_version().encode())
+    digest.update(json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str).encode())
+    digest.update(json.dumps([list(map(str, column)) for column in values.columns], ensure_ascii=False).encode())
+    digest.update(np.ascontiguousarray(values.index.values.astype('datetime64[D]').astype(np.int64)).tobytes())
+    digest.update(np.ascontiguousarray(values.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+class ReportCache:
+    """按内容寻址的报告缓存"""
+
+    def __init__(self, cache_dir=None, max_bytes=None, max_entries=None, max_age_days=None):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir or REPORT_CACHE_CONFIG['dir']
+        self.max_bytes = max_bytes or REPORT_CACHE_CONFIG['max_bytes']
+        self.max_entries = max_entries or REPORT_CACHE_CONFIG['max_entries']
+        self.max_age_days = max_age_days or REPORT_CACHE_CONFIG['max_age_days']
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        """缓存文件路径"""
+        return os.path.join(self.cache_dir, f"{key}.xlsx")
+
+    def get(self, key, output_path):
+        """命中时把缓存文件复制到output_path并返回True"""
+        path = self._path(key)
+        try:
+            os.utime(path)  # 记录最近使用时间，淘汰时保留常用文件
+            if os.path.abspath(path) != os.path.abspath(output_path):
+                output_dir = os.path.dirname(output_path)
+                if output_dir:
+                    os.makedirs(output_dir, exist_ok=True)
+                shutil.copyfile(path, output_path)
+        except FileNotFoundError:
+            return False
+        self.logger.info(f"报告缓存命中: {key[:12]}")
+        return True
+
+    def put(self, key, report_path):
+        """保存生成好的报告并淘汰旧文件"""
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+            os.close(fd)
+            shutil.copyfile(report_path, temp_path)
+            os.replace(temp_path, self._path(key))
+            self.evict()
+            return True
+        except Exception as e:
+            self.logger.error(f"保存报告缓存失败: {str(e)}")
+            return False
+
+    def _entries(self):
+        """缓存文件列表 [(修改时间, 大小, 路径)]，按修改时间升序"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.xlsx'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def evict(self, now=None):
+        """删除过期文件，再按最近使用时间从旧到新删除，直到总大小和数量都在限制内"""
+        with self._lock:
+            entries = self._entries()
+            now = now if now is not None else time.time()
+            expire_before = now - self.max_age_days * 86400
+            total = sum(size for _, size, _ in entries)
+            count = len(entries)
+            removed = 0
+
+            for mtime, size, path in entries:
+                if mtime >= expire_before and total <= self.max_bytes and count <= self.max_entries:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                count -= 1
+                removed += 1
+
+        if removed:
+            self.logger.info(f"报告缓存淘汰 {removed} 个文件")
+        return removed
+
+    def get_stats(self):
+        """缓存文件数量和总大小"""
+        entries = self._entries()
+        return {'entries': len(entries), 'bytes': sum(size for _, size, _ in entries), 'dir': self.cache_dir}
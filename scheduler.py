@@ -12,9 +12,11 @@ import os
 import sys
 
 from config import get_collection_dates, COLLECTION_HOUR, LOG_CONFIG
-from baidu_collector import BaiduIndexCollector
-from wechat_collector import WechatIndexCollector
+from pipeline import CollectionPipeline
 from data_processor import DataProcessor
+from index_store import IndexStore
+from period_report import PeriodReportGenerator, PERIOD_FREQ, GRANULARITY_LABELS
+from backfill import BackfillRunner, Checkpoint
 
 class IndexScheduler:
     """指数数据收集调度器"""
@@ -67,34 +69,20 @@ class IndexScheduler:
             start_date, end_date = get_collection_dates()
             self.logger.info(f"收集数据范围: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
             
-            # 收集百度指数数据
-            self.logger.info("开始收集百度指数数据")
-            baidu_collector = BaiduIndexCollector(headless=True)
-            baidu_data = baidu_collector.collect_baidu_index_data(start_date, end_date)
-            self.logger.info("百度指数数据收集完成")
-            
-            # 收集微信指数数据
-            self.logger.info("开始收集微信指数数据")
-            wechat_collector = WechatIndexCollector(headless=True)
-            wechat_data = wechat_collector.collect_wechat_index_data(start_date, end_date)
-            self.logger.info("微信指数数据收集完成")
-            
-            # 处理数据
-            self.logger.info("开始处理数据")
-            processor = DataProcessor()
-            processor.process_baidu_data(baidu_data)
-            processor.process_wechat_data(wechat_data)
-            
-            # 生成Excel报告
+            # 百度指数和微信指数并行收集，处理并生成Excel报告
             output_path = f"/mnt/okcomputer/output/index_collector/data/运营商指数报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            if processor.generate_excel_report(output_path):
-                self.logger.info(f"Excel报告生成成功: {output_path}")
-                
+            # 定时任务无人值守，微信指数网页版不可用时直接失败，不等待手动输入
+            result = CollectionPipeline(interactive=False).run(start_date, end_date, output_path)
+            
+            if result['report_path']:
                 # 发送通知（可以扩展邮件、微信等通知方式）
-                self._send_notification(output_path, baidu_data, wechat_data)
+                self._send_notification(result['report_path'], result['baidu_data'] or {}, result['wechat_data'] or {})
             else:
                 self.logger.error("Excel报告生成失败")
             
+            if result['errors']:
+                self.logger.warning(f"部分数据源收集失败: {result['errors']}")
+            
             self.logger.info("数据收集任务执行完成")
             
         except Exception as e:
@@ -116,6 +104,51 @@ class IndexScheduler:
         except Exception as e:
             self.logger.error(f"发送通知失败: {str(e)}")
     
+    def generate_report_from_store(self, start_date, end_date, output_path=None):
+        """不收集数据，直接用已存储的数据生成报告"""
+        try:
+            self.logger.info(f"从数据存储生成报告: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
+            output_path = output_path or f"/mnt/okcomputer/output/index_collector/data/运营商指数报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            
+            processor = DataProcessor()
+            processor.load_from_store(IndexStore(), start_date, end_date)
+            if processor.generate_excel_report(output_path):
+                self.logger.info(f"Excel报告生成成功: {output_path}")
+                return output_path
+            
+            self.logger.error("Excel报告生成失败")
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"从数据存储生成报告失败: {str(e)}")
+            return None
+    
+    def generate_period_report(self, start_date, end_date, period=None, granularity=None, output_path=None):
+        """用已存储的数据生成多周期历史报告"""
+        try:
+            generator = PeriodReportGenerator(IndexStore(), period=period, granularity=granularity)
+            output_path = output_path or f"/mnt/okcomputer/output/index_collector/data/运营商指数历史报告_{generator.period}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            return generator.generate(start_date, end_date, output_path)
+            
+        except Exception as e:
+            self.logger.error(f"生成多周期报告失败: {str(e)}")
+            return None
+    
+    def backfill(self, start_date, end_date, sources=None, max_workers=None, reset=False):
+        """回填历史数据，中断后再次运行从断点继续"""
+        try:
+            checkpoint = Checkpoint()
+            if reset:
+                checkpoint.reset()
+            runner = BackfillRunner(checkpoint=checkpoint, max_workers=max_workers)
+            result = runner.run(start_date, end_date, sources)
+            self.logger.info(f"回填结束: 完成 {result['completed']} 个区间，跳过 {result['skipped']} 个，失败 {len(result['failed'])} 个")
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"回填历史数据失败: {str(e)}")
+            return None
+    
     def manual_run(self):
         """手动运行一次"""
         self.logger.info("手动运行数据收集任务")
@@ -179,8 +212,16 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='运营商指数数据自动收集工具')
-    parser.add_argument('--mode', choices=['manual', 'schedule'], default='manual',
-                       help='运行模式: manual(手动运行一次) 或 schedule(启动定时调度)')
+    parser.add_argument('--mode', choices=['manual', 'schedule', 'report', 'period', 'backfill'], default='manual',
+                       help='运行模式: manual(手动运行一次)、schedule(启动定时调度)、report(用已存储数据生成报告)、period(生成多周期历史报告) 或 backfill(回填历史数据)')
+    parser.add_argument('--start', help='开始日期 YYYY-MM-DD（report/period/backfill模式）')
+    parser.add_argument('--end', help='结束日期 YYYY-MM-DD（report/period/backfill模式）')
+    parser.add_argument('--source', action='append', choices=list(CollectionPipeline.SOURCES),
+                       help='只回填指定数据源，可重复（backfill模式）')
+    parser.add_argument('--workers', type=int, help='并行收集的区间数（backfill模式）')
+    parser.add_argument('--reset', action='store_true', help='清空断点重新回填（backfill模式）')
+    parser.add_argument('--period', choices=list(PERIOD_FREQ) + ['all'], help='每个工作表的周期（period模式）')
+    parser.add_argument('--granularity', choices=list(GRANULARITY_LABELS), help='聚合粒度（period模式）')
     parser.add_argument('--headless', action='store_true',
                        help='是否使用无浏览器模式')
     
@@ -192,6 +233,34 @@ def main():
     if args.mode == 'manual':
         # 手动运行一次
         scheduler.manual_run()
+    elif args.mode == 'backfill':
+        # 回填历史数据
+        if not (args.start and args.end):
+            parser.error('backfill模式需要指定 --start 和 --end')
+        result = scheduler.backfill(
+            datetime.strptime(args.start, '%Y-%m-%d'), datetime.strptime(args.end, '%Y-%m-%d'),
+            sources=args.source, max_workers=args.workers, reset=args.reset)
+        if result:
+            print(f"回填完成: {result['completed']} 个区间，跳过 {result['skipped']} 个，失败 {len(result['failed'])} 个")
+        else:
+            print("回填失败")
+    elif args.mode == 'period':
+        # 任意日期范围的多周期报告
+        if not (args.start and args.end):
+            parser.error('period模式需要指定 --start 和 --end')
+        report_path = scheduler.generate_period_report(
+            datetime.strptime(args.start, '%Y-%m-%d'), datetime.strptime(args.end, '%Y-%m-%d'),
+            period=args.period, granularity=args.granularity)
+        print(f"报告已生成: {report_path}" if report_path else "报告生成失败")
+    elif args.mode == 'report':
+        # 用已存储的数据生成报告
+        start_date, end_date = get_collection_dates()
+        if args.start:
+            start_date = datetime.strptime(args.start, '%Y-%m-%d')
+        if args.end:
+            end_date = datetime.strptime(args.end, '%Y-%m-%d')
+        report_path = scheduler.generate_report_from_store(start_date, end_date)
+        print(f"报告已生成: {report_path}" if report_path else "报告生成失败")
     else:
         # 启动定时调度
         scheduler.start_scheduler()
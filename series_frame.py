@@ -0,0 +1,115 @@
+"""
+指数序列容器
+每个 (数据源, 指标) 一个SeriesFrame：datetime64[D] 日期索引、关键词轴和 float32 数值矩阵[天, 关键词]
+按日期切片和按关键词取列都返回视图，转换为DataFrame不复制数据
+"""
+
+import numpy as np
+import pandas as pd
+from index_store import to_number
+
+class SeriesFrame:
+    """单个 (数据源, 指标) 的指数序列"""
+
+    __slots__ = ('source', 'metric', 'dates', 'keywords', 'values', '_column_of')
+
+    def __init__(self, source, metric, dates, keywords, values):
+        self.source = source
+        self.metric = metric
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.keywords = list(keywords)
+        self.values = np.asarray(values, dtype=np.float32).reshape(len(self.dates), len(self.keywords))
+        self._column_of = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+    @classmethod
+    def empty(cls, source, metric, keywords=()):
+        """没有数据的序列"""
+        keywords = list(keywords)
+        return cls(source, metric, np.empty(0, dtype='datetime64[D]'), keywords,
+                   np.empty((0, len(keywords)), dtype=np.float32))
+
+    @classmethod
+    def from_mapping(cls, source, metric, data, keywords=None):
+        """
+        从 {日期字符串: {关键词: 数值}} 构建，数值可以是带千分位的字符串
+        日期升序排列；未指定keywords时按首次出现的顺序排列关键词
+        """
+        if not isinstance(data, dict) or not data:
+            return cls.empty(source, metric, keywords or ())
+
+        day_strings = sorted(data)
+        if keywords is None:
+            keywords = list(dict.fromkeys(keyword for values in data.values() if isinstance(values, dict)
+                                          for keyword in values))
+        column_of = {keyword: i for i, keyword in enumerate(keywords)}
+
+        rows, cols, numbers = [], [], []
+        for row, day in enumerate(day_strings):
+            values = data[day]
+            if not isinstance(values, dict):
+                continue
+            for keyword, value in values.items():
+                number = to_number(value)
+                if number is not None and keyword in column_of:
+                    rows.append(row)
+                    cols.append(column_of[keyword])
+                    numbers.append(number)
+
+        matrix = np.full((len(day_strings), len(keywords)), np.nan, dtype=np.float32)
+        matrix[rows, cols] = numbers
+        dates = np.array([day[:10] for day in day_strings], dtype='datetime64[D]')
+        return cls(source, metric, dates, keywords, matrix)
+
+    @classmethod
+    def from_store(cls, store, source, metric, start_date, end_date, keywords=None, dropna=True):
+        """从IndexStore查询日期范围内的数据，dropna时去掉所有关键词都没有数据的日期"""
+        dates, columns, values = store.query_arrays(source, metric, start_date, end_date, keywords)
+        if dropna:
+            keep = ~np.isnan(values).all(axis=1)
+            dates, values = dates[keep], values[keep]
+        return cls(source, metric, dates, columns, values)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        return f"SeriesFrame({self.source}, {self.metric}, {len(self.dates)} 天 × {len(self.keywords)} 个关键词)"
+
+    @property
+    def nbytes(self):
+        """日期和数值占用的字节数"""
+        return self.dates.nbytes + self.values.nbytes
+
+    def column(self, keyword):
+        """单个关键词的数值（视图）"""
+        return self.values[:, self._column_of[keyword]]
+
+    def slice(self, start_date, end_date):
+        """日期范围切片（含首尾），日期已排序，二分查找后返回视图"""
+        start = np.datetime64(pd.Timestamp(start_date).date(), 'D')
+        end = np.datetime64(pd.Timestamp(end_date).date(), 'D')
+        first = np.searchsorted(self.dates, start, side='left')
+        last = np.searchsorted(self.dates, end, side='right')
+        return SeriesFrame(self.source, self.metric, self.dates[first:last], self.keywords, self.values[first:last])
+
+    def select(self, keywords):
+        """按给定顺序取关键词，没有数据的关键词整列为NaN"""
+        matrix = np.full((len(self.dates), len(keywords)), np.nan, dtype=np.float32)
+        for i, keyword in enumerate(keywords):
+            if keyword in self._column_of:
+                matrix[:, i] = self.values[:, self._column_of[keyword]]
+        return SeriesFrame(self.source, self.metric, self.dates, keywords, matrix)
+
+    def to_frame(self):
+        """转换为以日期为索引、关键词为列的DataFrame（共享数值内存）"""
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates, name='date'),
+                            columns=self.keywords, copy=False)
+
+    def means(self):
+        """每个关键词的平均值（忽略缺失值），返回以关键词为索引的Series"""
+        present = ~np.isnan(self.values)
+        sums = np.where(present, self.values, 0).sum(axis=0, dtype=np.float64)
+        counts = present.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        return pd.Series(means, index=self.keywords, dtype=np.float64)
@@ -0,0 +1,162 @@
+"""
+关键词分片并行收集
+把关键词按站点对比上限分组，分发到多个工作进程（每个进程独立的浏览器），再合并结果
+"""
+
+import logging
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import KEYWORDS, SHARD_CONFIG
+
+def shard_keywords(keywords, shard_size):
+    """按分片大小切分关键词，保持原有顺序"""
+    shard_size = max(1, shard_size)
+    return [keywords[i:i + shard_size] for i in range(0, len(keywords), shard_size)]
+
+def _collect_baidu_shard(keywords, start_date, end_date):
+    """工作进程：收集一组关键词的百度指数"""
+    from baidu_collector import BaiduIndexCollector
+    collector = BaiduIndexCollector(headless=True)
+    return collector.collect_baidu_index_data(start_date, end_date, keywords)
+
+def _collect_wechat_shard(keywords, start_date, end_date, interactive=True):
+    """工作进程：收集一组关键词的微信指数"""
+    from wechat_collector import WechatIndexCollector
+    collector = WechatIndexCollector(headless=True)
+    return collector.collect_wechat_index_data(start_date, end_date, keywords, interactive=interactive)
+
+def _merge_series(target, series):
+    """合并 {日期: {关键词: 数值}} 结构"""
+    for date_str, values in (series or {}).items():
+        target.setdefault(date_str, {}).update(values)
+
+def merge_baidu_results(results, start_date, end_date):
+    """合并各分片的百度指数结果，结构与单次收集一致"""
+    search_data = {}
+    info_data = {}
+    screenshots = []
+    methods = set()
+
+    for result in results:
+        if not result:
+            continue
+        _merge_series(search_data, result.get('search_data'))
+        _merge_series(info_data, result.get('info_data'))
+        screenshots.append(result.get('screenshots', {}))
+        methods.add(result.get('method', 'browser'))
+
+    return {
+        'method': methods.pop() if len(methods) == 1 else 'mixed',
+        'search_data': dict(sorted(search_data.items())),
+        'info_data': dict(sorted(info_data.items())),
+        'screenshots': screenshots[0] if screenshots else {},
+        'shard_screenshots': screenshots,
+        'date_range': {
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_date.strftime('%Y-%m-%d')
+        }
+    }
+
+def merge_wechat_results(results, start_date, end_date):
+    """合并各分片的微信指数结果"""
+    data = []
+    screenshots = []
+    manual_keywords = []
+
+    for result in results:
+        if not result:
+            continue
+        if result.get('method') == 'web':
+            data.extend(result.get('data', []))
+        else:
+            manual_keywords.extend(result.get('keywords', []))
+        screenshots.append(result.get('screenshot'))
+
+    merged = {
+        'method': 'web' if data or not manual_keywords else 'manual',
+        'data': data,
+        'screenshot': screenshots[0] if screenshots else None,
+        'shard_screenshots': screenshots,
+        'date_range': {
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_date.strftime('%Y-%m-%d')
+        }
+    }
+    if manual_keywords:
+        merged['keywords'] = manual_keywords
+    return merged
+
+class ShardedCollector:
+    """关键词分片并行收集器"""
+
+    def __init__(self, max_workers=None):
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers or SHARD_CONFIG['max_workers']
+        self.failed_shards = []
+
+    def _run_shards(self, func, shards, start_date, end_date):
+        """并行运行分片，单个分片失败不影响其他分片"""
+        if len(shards) == 1:
+            # 单个分片无需进程池
+            try:
+                return [func(shards[0], start_date, end_date)]
+            except Exception as e:
+                self.logger.error(f"分片 {shards[0]} 收集失败: {str(e)}")
+                self.failed_shards.append({'keywords': shards[0], 'error': str(e)})
+                return []
+
+        results = []
+        workers = min(self.max_workers, len(shards))
+        self.logger.info(f"使用 {workers} 个工作进程收集 {len(shards)} 个分片")
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(func, shard, start_date, end_date): shard for shard in shards}
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    results.append(future.result())
+                    self.logger.info(f"分片 {','.join(shard)} 收集完成")
+                except Exception as e:
+                    self.logger.error(f"分片 {','.join(shard)} 收集失败: {str(e)}")
+                    self.failed_shards.append({'keywords': shard, 'error': str(e)})
+
+        return results
+
+    def collect_baidu_index_data(self, start_date, end_date, keywords=None):
+        """分片收集百度指数数据"""
+        keywords = keywords or KEYWORDS['baidu']
+        shards = shard_keywords(keywords, SHARD_CONFIG['baidu_compare_limit'])
+        results = self._run_shards(_collect_baidu_shard, shards, start_date, end_date)
+        if not results:
+            raise RuntimeError("所有百度指数分片均收集失败")
+        return merge_baidu_results(results, start_date, end_date)
+
+    def collect_wechat_index_data(self, start_date, end_date, keywords=None, interactive=True):
+        """分片收集微信指数数据，interactive为False时不进入手动收集模式"""
+        keywords = keywords or KEYWORDS['wechat']
+        shards = shard_keywords(keywords, SHARD_CONFIG['wechat_shard_size'])
+        results = self._run_shards(partial(_collect_wechat_shard, interactive=interactive), shards, start_date, end_date)
+        return merge_wechat_results(results, start_date, end_date)
+
+def main():
+    """主函数"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    from config import get_collection_dates
+    start_date, end_date = get_collection_dates()
+
+    collector = ShardedCollector()
+    try:
+        data = collector.collect_baidu_index_data(start_date, end_date)
+        print("百度指数分片收集完成")
+        print(f"数据范围: {data['date_range']['start']} 到 {data['date_range']['end']}")
+        if collector.failed_shards:
+            print(f"失败分片: {collector.failed_shards}")
+    except Exception as e:
+        print(f"数据收集失败: {str(e)}")
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,76 @@
 """
 模板工具 - 简化版本，用于Replit部署
+模板按源码的哈希编译一次并缓存，之后每次请求只执行编译好的渲染函数
+（静态HTML在编译时已成为常量字符串，只有变量和控制块在渲染时计算）
+编译结果同时写入字节码缓存目录，进程重启后无需重新解析模板
 """
 
-from jinja2 import Template
+import os
+import hashlib
+import logging
+import threading
+from jinja2 import Environment, BaseLoader, TemplateNotFound, FileSystemBytecodeCache
+from config import TEMPLATE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class SourceHashLoader(BaseLoader):
+    """以源码哈希为模板名的加载器，源码不变则模板名不变，缓存永远有效"""
+
+    def __init__(self):
+        self.sources = {}
+
+    def register(self, source):
+        """登记模板源码，返回模板名"""
+        name = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        self.sources[name] = source
+        return name
+
+    def get_source(self, environment, template):
+        if template not in self.sources:
+            raise TemplateNotFound(template)
+        return self.sources[template], None, lambda: True
+
+_environment = None
+_loader = SourceHashLoader()
+# 源码字符串 -> 模板名；同一个字符串对象的哈希值由Python缓存，查找不需要重新计算sha256
+_names = {}
+_lock = threading.Lock()
+
+def _bytecode_cache():
+    """字节码缓存，目录无法创建时不使用"""
+    directory = TEMPLATE_CONFIG['bytecode_cache_dir']
+    if not directory:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        return FileSystemBytecodeCache(directory)
+    except Exception as e:
+        logger.error(f"创建模板字节码缓存失败: {str(e)}")
+        return None
+
+def get_environment():
+    """共享的Jinja2环境"""
+    global _environment
+    with _lock:
+        if _environment is None:
+            _environment = Environment(
+                loader=_loader,
+                autoescape=True,
+                cache_size=TEMPLATE_CONFIG['cache_size'],
+                bytecode_cache=_bytecode_cache(),
+                auto_reload=False
+            )
+        return _environment
+
+def get_template(template_str):
+    """取得编译好的模板，首次使用时编译"""
+    name = _names.get(template_str)
+    if name is None:
+        with _lock:
+            name = _names[template_str] = _loader.register(template_str)
+    return get_environment().get_template(name)
 
 def render_template_string(template_str, **kwargs):
     """渲染模板字符串"""
-    template = Template(template_str)
-    return template.render(**kwargs)
\ No newline at end of file
+    return get_template(template_str).render(**kwargs)
@@ -0,0 +1,17 @@
+"""
+测试公共配置：把项目根目录加入模块搜索路径，提供录制数据目录
+"""
+
+import os
+import sys
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+@pytest.fixture
+def fixtures_dir():
+    return FIXTURES_DIR
@@ -0,0 +1,52 @@
+"""
+峰值和异常检测测试
+"""
+
+import numpy as np
+import pandas as pd
+from anomaly_detector import mad_outliers, weekly_peaks, week_over_week_jumps, detect
+
+def noisy(length, seed=0):
+    rng = np.random.default_rng(seed)
+    return 1000 + rng.uniform(-30, 30, size=(length, 1))
+
+def test_spike_in_three_weeks_is_flagged():
+    values = noisy(21)
+    values[3, 0] = 99999
+    assert np.flatnonzero(mad_outliers(values)[:, 0]).tolist() == [3]
+
+def test_spike_in_weekly_report_is_flagged():
+    values = noisy(7)
+    values[0, 0] = 5000
+    assert np.flatnonzero(mad_outliers(values)[:, 0]).tolist() == [0]
+
+def test_short_series_uses_whole_column():
+    values = np.array([[100.0], [102.0], [98.0], [101.0], [900.0]])
+    assert mad_outliers(values)[:, 0].tolist() == [False, False, False, False, True]
+    # 数据太少时不判断
+    assert not mad_outliers(np.array([[1.0], [500.0]])).any()
+
+def test_constant_series_with_spike():
+    values = np.full((7, 1), 100.0)
+    values[5, 0] = 400
+    assert np.flatnonzero(mad_outliers(values)[:, 0]).tolist() == [5]
+    assert not mad_outliers(np.full((7, 1), 100.0)).any()
+
+def test_normal_noise_and_missing_values_are_not_flagged():
+    values = noisy(28, seed=1)
+    values[[4, 10], 0] = np.nan
+    assert not mad_outliers(values).any()
+
+def test_peaks_and_jumps_per_week():
+    dates = pd.date_range('2024-01-01', periods=14)
+    values = np.array([[1.0], [5.0], [2.0], [5.0], [1.0], [1.0], [1.0]] + [[10.0]] * 7)
+    assert np.flatnonzero(weekly_peaks(dates, values)[:7, 0]).tolist() == [1, 3]
+    jumps = week_over_week_jumps(dates, values)[:, 0]
+    assert not jumps[:7].any() and jumps[7:].all()
+
+def test_detect_returns_coordinates():
+    dates = pd.date_range('2024-01-01', periods=7)
+    values = np.column_stack([noisy(7)[:, 0], noisy(7, seed=2)[:, 0]])
+    values[2, 1] = 8000
+    rows, cols = detect(dates, values)['outlier']
+    assert list(zip(rows.tolist(), cols.tolist())) == [(2, 1)]
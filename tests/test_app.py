@@ -0,0 +1,80 @@
+"""
+Web应用接口测试（Flask测试客户端，不启动收集任务）
+"""
+
+import pytest
+import app as web_app
+
+@pytest.fixture
+def client():
+    web_app.app.config['TESTING'] = True
+    return web_app.app.test_client()
+
+@pytest.mark.parametrize('body, message', [
+    ([1, 2], '请求体应为JSON对象'),
+    ({'sources': 5}, 'sources应为数据源名称列表'),
+    ({'sources': ['baidu', 1]}, 'sources应为数据源名称列表'),
+    ({'sources': ['weibo']}, '未知数据源: weibo'),
+    ({'keywords': 'x'}, 'keywords应为关键词列表或 {数据源: 关键词列表}'),
+    ({'keywords': ['上海电信', 1]}, 'baidu的关键词应为非空字符串列表'),
+    ({'start': 5}, '日期格式应为YYYY-MM-DD'),
+    ({'start': '2024-01-08', 'end': '2024-01-01'}, '开始日期不能晚于结束日期')
+])
+def test_submit_job_rejects_invalid_body(client, body, message):
+    response = client.post('/api/jobs', json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': message}
+
+def test_submit_job_accepts_valid_body(client, monkeypatch):
+    submitted = {}
+
+    class FakeJob:
+        id = 'abc'
+
+        def to_dict(self):
+            return {'id': self.id}
+
+    class FakeManager:
+        def submit(self, **params):
+            submitted.update(params)
+            return FakeJob()
+
+    monkeypatch.setattr(web_app, 'get_job_manager', lambda: FakeManager())
+    response = client.post('/api/jobs', json={'start': '2024-01-01', 'end': '2024-01-07',
+                                              'sources': 'wechat', 'keywords': {'wechat': ['上海电信']}})
+    assert response.status_code in (200, 202)
+    assert submitted['sources'] == ['wechat']
+    assert submitted['keywords']['wechat'] == ['上海电信']
+
+def read_events(response, count):
+    """从推送流中读取前count条消息"""
+    events = []
+    for chunk in response.response:
+        events.append(chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk)
+        if len(events) >= count:
+            break
+    response.close()
+    return events
+
+def test_stream_resets_stale_last_event_id(client):
+    web_app.logger.info('重启后的第一条日志')
+    latest = web_app.log_buffer.latest_seq()
+    # 重启前的浏览器带着比当前序号大的Last-Event-ID重连
+    response = client.get('/api/stream', headers={'Last-Event-ID': str(latest + 1000)}, buffered=False)
+    events = read_events(response, 3)
+    assert events[0].startswith('retry:')
+    assert events[1].startswith('event: status')
+    assert events[2].startswith('event: log')
+
+def test_log_limit_is_clamped(client):
+    for i in range(3):
+        web_app.logger.info(f'日志 {i}')
+    latest = web_app.log_buffer.latest_seq()
+
+    newest = client.get('/api/log?limit=-1').get_json()
+    assert [record['seq'] for record in newest['logs']] == [latest]
+    assert len(client.get('/api/log?limit=0').get_json()['logs']) == 1
+    assert len(client.get(f'/api/log?since={latest - 3}&limit=2').get_json()['logs']) == 2
+    # 重启前的序号比当前大时返回最近的日志
+    assert client.get(f'/api/log?since={latest + 100}&limit=1').get_json()['seq'] == latest
+    assert client.get('/api/log?limit=x').status_code == 400
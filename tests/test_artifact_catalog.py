@@ -0,0 +1,75 @@
+"""
+报告和截图目录索引测试
+"""
+
+import os
+from datetime import datetime
+import pytest
+from artifact_catalog import ArtifactCatalog
+
+@pytest.fixture
+def report_dir(tmp_path):
+    directory = tmp_path / 'reports'
+    directory.mkdir()
+    return directory
+
+@pytest.fixture
+def catalog(report_dir, tmp_path):
+    return ArtifactCatalog(kinds={'report': (str(report_dir), '.xlsx')}, scan_interval=0,
+                           manifest_path=str(tmp_path / 'manifest.json'))
+
+def write(directory, name, content='x', mtime=1000):
+    path = directory / name
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+def test_query_pages_newest_first(catalog, report_dir):
+    for i in range(5):
+        write(report_dir, f'r{i}.xlsx', mtime=1000 + i)
+    write(report_dir, 'notes.txt')
+
+    page = catalog.query('report', limit=2)
+    assert [item['name'] for item in page['items']] == ['r4.xlsx', 'r3.xlsx']
+    assert page['total'] == 5 and page['next_offset'] == 2
+    last = catalog.query('report', offset=4, limit=2)
+    assert [item['name'] for item in last['items']] == ['r0.xlsx'] and last['next_offset'] is None
+
+def test_limit_and_offset_are_clamped(catalog, report_dir):
+    write(report_dir, 'r0.xlsx')
+    page = catalog.query('report', offset=-5, limit=-1)
+    assert page['offset'] == 0 and page['limit'] == 1
+    assert catalog.query('report', limit=10000)['limit'] == 200
+
+def test_filters_report_filtered_total(catalog, report_dir):
+    for i in range(4):
+        write(report_dir, f'r{i}.xlsx', mtime=1000 + i)
+    catalog.register(str(report_dir / 'r1.xlsx'), datetime(2024, 1, 1), datetime(2024, 1, 7), ['上海电信'], 'baidu')
+
+    page = catalog.query('report', keyword='上海电信')
+    assert [item['name'] for item in page['items']] == ['r1.xlsx'] and page['total'] == 1
+    assert page['items'][0]['start_date'] == '2024-01-01'
+    assert catalog.query('report', since=datetime.fromtimestamp(1001.5))['total'] == 2
+    assert catalog.query('report', until=datetime.fromtimestamp(1001))['total'] == 2
+    assert catalog.query('report', source='wechat')['total'] == 3
+
+def test_refresh_tracks_added_removed_and_rewritten_files(catalog, report_dir):
+    write(report_dir, 'a.xlsx', mtime=1000)
+    write(report_dir, 'b.xlsx', mtime=1001)
+    assert catalog.count('report') == 2
+
+    os.remove(report_dir / 'a.xlsx')
+    write(report_dir, 'b.xlsx', content='rewritten', mtime=2000)
+    write(report_dir, 'c.xlsx', mtime=1500)
+    page = catalog.query('report')
+    assert [(item['name'], item['size']) for item in page['items']] == [('b.xlsx', 9), ('c.xlsx', 1)]
+
+def test_register_without_metadata_keeps_manifest(catalog, report_dir, tmp_path):
+    path = write(report_dir, 'r.xlsx')
+    catalog.register(path, datetime(2024, 1, 1), datetime(2024, 1, 7), ['上海电信'])
+    write(report_dir, 'r.xlsx', content='new content', mtime=3000)
+    entry = catalog.register(path)
+    assert entry['size'] == 11 and entry['keywords'] == ['上海电信']
+
+    restored = ArtifactCatalog(kinds=catalog.kinds, scan_interval=0, manifest_path=str(tmp_path / 'manifest.json'))
+    assert restored.get('report', 'r.xlsx')['end_date'] == '2024-01-07'
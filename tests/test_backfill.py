@@ -0,0 +1,84 @@
+"""
+历史数据回填测试：假的流水线按日期写入存储，不启动浏览器
+"""
+
+from datetime import datetime, date, timedelta
+import pytest
+import backfill
+from backfill import BackfillRunner, Checkpoint, split_chunks
+from collection_planner import CollectionPlanner, date_range
+from index_store import IndexStore
+
+class FakePipeline:
+    """每次收集写入区间内除no_data以外所有日期的数据；fail_times次之前抛出异常"""
+
+    def __init__(self, store, no_data=(), fail_times=0):
+        self.store = store
+        self.planner = CollectionPlanner(store)
+        self.keywords = {'wechat': ['上海电信', '上海移动']}
+        self.interactive = True
+        self.no_data = set(no_data)
+        self.fail_times = fail_times
+        self.calls = []
+
+    def collect_range(self, source, start_date, end_date, require_records=False, interactive=None):
+        self.calls.append((start_date.date(), end_date.date(), require_records, interactive))
+        if len(self.calls) <= self.fail_times:
+            raise RuntimeError('页面加载超时')
+        records = [('wechat', keyword, 'index', day.strftime('%Y-%m-%d'), 1.0)
+                   for day in date_range(start_date, end_date) for keyword in self.keywords['wechat']
+                   if (keyword, day) not in self.no_data]
+        if require_records and not records:
+            raise RuntimeError('收集结果没有可写入的数据')
+        self.store.upsert_records(records)
+        return {'method': 'web'}
+
+@pytest.fixture(autouse=True)
+def fast_config(monkeypatch):
+    monkeypatch.setitem(backfill.BACKFILL_CONFIG, 'retry_backoff', 0)
+    monkeypatch.setitem(backfill.BACKFILL_CONFIG, 'chunk_days', {'baidu': 10, 'wechat': 10})
+
+@pytest.fixture
+def store(tmp_path):
+    store = IndexStore(str(tmp_path / 'index.db'))
+    yield store
+    store.close()
+
+def make_runner(store, pipeline, tmp_path):
+    return BackfillRunner(store=store, pipeline=pipeline, checkpoint=Checkpoint(str(tmp_path / 'checkpoint.json')),
+                          max_workers=1, min_interval=0)
+
+def test_split_chunks():
+    chunks = split_chunks(datetime(2024, 1, 1), datetime(2024, 1, 25), 10)
+    assert [(start.day, end.day) for start, end in chunks] == [(1, 10), (11, 20), (21, 25)]
+
+def test_days_without_data_are_recorded_and_chunk_completes(store, tmp_path):
+    pipeline = FakePipeline(store, no_data={('上海移动', date(2024, 1, 3)), ('上海移动', date(2024, 1, 4))})
+    runner = make_runner(store, pipeline, tmp_path)
+    result = runner.run(datetime(2024, 1, 1), datetime(2024, 1, 10), ['wechat'])
+
+    assert result == {'total': 1, 'completed': 1, 'failed': {}, 'skipped': 0}
+    assert runner.checkpoint.no_data == {'wechat:2024-01-01:2024-01-10': ['2024-01-03', '2024-01-04']}
+    # 第一次收集整个区间，第二次只收集缺失的日期
+    assert [call[:2] for call in pipeline.calls] == [(date(2024, 1, 1), date(2024, 1, 10)),
+                                                     (date(2024, 1, 3), date(2024, 1, 4))]
+    assert all(call[3] is False for call in pipeline.calls)
+
+    # 再次运行时跳过已完成的区间
+    rerun = make_runner(store, pipeline, tmp_path).run(datetime(2024, 1, 1), datetime(2024, 1, 10), ['wechat'])
+    assert rerun['skipped'] == 1 and len(pipeline.calls) == 2
+
+def test_failures_are_retried_then_recorded(store, tmp_path, monkeypatch):
+    monkeypatch.setitem(backfill.BACKFILL_CONFIG, 'max_retries', 1)
+    runner = make_runner(store, FakePipeline(store, fail_times=1), tmp_path)
+    assert runner.run(datetime(2024, 1, 1), datetime(2024, 1, 10), ['wechat'])['completed'] == 1
+
+    runner = make_runner(store, FakePipeline(store, fail_times=5), tmp_path)
+    result = runner.run(datetime(2024, 1, 11), datetime(2024, 1, 20), ['wechat'])
+    assert result['failed'] == {'wechat:2024-01-11:2024-01-20': '页面加载超时'}
+    assert not runner.checkpoint.is_done('wechat:2024-01-11:2024-01-20')
+
+def test_caller_pipeline_is_not_modified(store, tmp_path):
+    pipeline = FakePipeline(store)
+    make_runner(store, pipeline, tmp_path)
+    assert pipeline.interactive is True
@@ -0,0 +1,78 @@
+"""
+百度指数浏览器收集器测试：用假的浏览器驱动，不启动Chrome
+"""
+
+from datetime import datetime
+import pytest
+import baidu_collector
+from baidu_collector import BaiduIndexCollector
+from wait_strategy import PageWaiter
+from rate_limiter import AdaptiveRateLimiter, CircuitBreaker, SourceGuard, CircuitOpenError, ThrottledError
+
+class FakeElement:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        self.driver.clicks += 1
+        if self.driver.redirect_to:
+            self.driver.current_url = self.driver.redirect_to
+
+    def clear(self):
+        pass
+
+    def send_keys(self, text):
+        pass
+
+class FakeDriver:
+    def __init__(self, redirect_to=None):
+        self.current_url = 'https://index.baidu.com/v2/index.html'
+        self.title = '百度指数'
+        self.redirect_to = redirect_to
+        self.clicks = 0
+
+    def find_element(self, by=None, value=None):
+        return FakeElement(self)
+
+    def execute_script(self, script, *args):
+        if '__icPending' in script:
+            return [0, 0]
+        return True
+
+@pytest.fixture
+def make_collector(monkeypatch):
+    def make(driver, failure_threshold=5):
+        guard = SourceGuard('baidu', AdaptiveRateLimiter(rate=1000, burst=10),
+                            CircuitBreaker(failure_threshold=failure_threshold))
+        monkeypatch.setattr(baidu_collector, 'get_guard', lambda source: guard)
+        collector = BaiduIndexCollector()
+        collector.driver = driver
+        collector.waiter = PageWaiter(driver, timeouts={'date_picker': 0.05, 'date_range': 0.05}, poll_interval=0.01)
+        return collector
+    return make
+
+def test_set_date_range_raises_on_verification_page(make_collector):
+    collector = make_collector(FakeDriver(redirect_to='https://wappass.baidu.com/static/captcha'))
+    with pytest.raises(ThrottledError):
+        collector.set_date_range(datetime(2024, 1, 1), datetime(2024, 1, 7))
+    assert collector.guard.get_stats()['throttled'] == 1
+
+def test_set_date_range_raises_when_circuit_open(make_collector):
+    collector = make_collector(FakeDriver(), failure_threshold=1)
+    collector.guard.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        collector.set_date_range(datetime(2024, 1, 1), datetime(2024, 1, 7))
+    # 日期选择器已打开，确认按钮没有点击
+    assert collector.driver.clicks == 1
+
+def test_set_date_range_succeeds(make_collector):
+    collector = make_collector(FakeDriver())
+    collector.set_date_range(datetime(2024, 1, 1), datetime(2024, 1, 7))
+    assert collector.driver.clicks == 2
+    assert collector.guard.get_stats()['requests'] == 1
@@ -0,0 +1,31 @@
+"""
+百度指数接口数据解码测试
+"""
+
+import os
+import json
+import copy
+import pytest
+from baidu_decoder import decode_index_payload
+
+@pytest.fixture
+def responses(fixtures_dir):
+    with open(os.path.join(fixtures_dir, 'baidu_api_responses.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_decode_search_payload(responses):
+    payload = responses['search']
+    decoded = decode_index_payload(payload, responses['ptbk'][payload['data']['uniqid']])
+    assert len(decoded) == 7
+    assert decoded['2024-01-07'] == {'上海电信': 1012, '上海移动': 1390}
+
+def test_bad_keyword_does_not_drop_others(responses):
+    payload = copy.deepcopy(responses['search'])
+    key = responses['ptbk'][payload['data']['uniqid']]
+    payload['data']['userIndexes'][1]['all']['data'] = 'not-a-series'
+    decoded = decode_index_payload(payload, key)
+    assert len(decoded) == 7
+    assert all(set(values) == {'上海电信'} for values in decoded.values())
+
+    payload['data']['userIndexes'][0]['all']['startDate'] = 'bad-date'
+    assert decode_index_payload(payload, key) == {}
@@ -0,0 +1,96 @@
+"""
+百度指数HTTP收集器测试：在本地http.server桩服务上运行，返回录制的接口响应
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+import baidu_http_collector
+from baidu_http_collector import BaiduHttpCollector
+from rate_limiter import AdaptiveRateLimiter, CircuitBreaker, SourceGuard, ThrottledError
+
+class StubHandler(BaseHTTPRequestHandler):
+    """按路径返回录制的响应，server.throttle为True时返回429"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        self.server.requests.append((url.path, params, self.headers.get('Cookie', '')))
+        responses = self.server.responses
+
+        if self.server.throttle:
+            return self._send(429, {'status': 10001, 'message': 'request block'})
+        if url.path == '/api/SearchApi/index':
+            return self._send(200, responses['search'])
+        if url.path == '/api/FeedSearchApi/getFeedIndex':
+            return self._send(200, responses['info'])
+        if url.path == '/Interface/ptbk':
+            return self._send(200, {'status': 0, 'data': responses['ptbk'][params['uniqid'][0]]})
+        return self._send(404, {'status': 404})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_server(fixtures_dir):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    with open(os.path.join(fixtures_dir, 'baidu_api_responses.json'), 'r', encoding='utf-8') as f:
+        server.responses = json.load(f)
+    server.requests = []
+    server.throttle = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def collector(stub_server, monkeypatch):
+    # 每个测试使用独立的内存限速器，不读写共享状态文件
+    guard = SourceGuard('baidu', AdaptiveRateLimiter(rate=1000, burst=100), CircuitBreaker(failure_threshold=2))
+    monkeypatch.setattr(baidu_http_collector, 'get_guard', lambda source: guard)
+    collector = BaiduHttpCollector(cookies=[{'name': 'BDUSS', 'value': 'test-session'}],
+                                   base_url=f'http://127.0.0.1:{stub_server.server_port}')
+    collector.session.trust_env = False
+    yield collector
+    collector.close()
+
+def test_collect_decodes_both_metrics(collector, stub_server):
+    data = collector.collect_baidu_index_data(datetime(2024, 1, 1), datetime(2024, 1, 7), ['上海电信', '上海移动'])
+
+    assert data['method'] == 'http'
+    assert data['date_range'] == {'start': '2024-01-01', 'end': '2024-01-07'}
+    assert data['search_data']['2024-01-02'] == {'上海电信': 1498, '上海移动': 2304}
+    assert data['info_data']['2024-01-01'] == {'上海电信': 35012}
+
+    paths = [path for path, _, _ in stub_server.requests]
+    assert paths.count('/Interface/ptbk') == 2
+    search_params = next(params for path, params, _ in stub_server.requests if path == '/api/SearchApi/index')
+    assert search_params['startDate'] == ['2024-01-01'] and search_params['endDate'] == ['2024-01-07']
+    assert [word[0]['name'] for word in json.loads(search_params['word'][0])] == ['上海电信', '上海移动']
+    assert all('BDUSS=test-session' in cookie for _, _, cookie in stub_server.requests)
+
+def test_ptbk_is_cached(collector, stub_server):
+    collector.fetch_index('search', ['上海电信'], datetime(2024, 1, 1), datetime(2024, 1, 7))
+    collector.fetch_index('search', ['上海电信'], datetime(2024, 1, 1), datetime(2024, 1, 7))
+    assert [path for path, _, _ in stub_server.requests].count('/Interface/ptbk') == 1
+
+def test_throttled_response_opens_circuit(collector, stub_server):
+    stub_server.throttle = True
+    for _ in range(2):
+        with pytest.raises(ThrottledError):
+            collector.fetch_index('search', ['上海电信'], datetime(2024, 1, 1), datetime(2024, 1, 7))
+    assert collector.guard.breaker.state == 'open'
+    assert collector.guard.get_stats()['throttled'] == 2
@@ -0,0 +1,54 @@
+"""
+增量收集计划测试
+"""
+
+from datetime import date, datetime
+import pytest
+from index_store import IndexStore
+from collection_planner import CollectionPlanner, group_contiguous, baidu_records, wechat_records
+
+@pytest.fixture
+def store(tmp_path):
+    store = IndexStore(str(tmp_path / 'index.db'))
+    yield store
+    store.close()
+
+def test_group_contiguous():
+    days = [date(2024, 1, 5), date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 4)]
+    assert group_contiguous(days) == [(date(2024, 1, 1), date(2024, 1, 2)), (date(2024, 1, 4), date(2024, 1, 5))]
+
+def test_plan_empty_store_requests_whole_range(store):
+    ranges = CollectionPlanner(store).plan('wechat', datetime(2024, 1, 1), datetime(2024, 1, 7), ['上海电信'])
+    assert ranges == [(datetime(2024, 1, 1), datetime(2024, 1, 7))]
+
+def test_plan_only_missing_ranges(store):
+    store.upsert_records([('wechat', '上海电信', 'index', f'2024-01-0{day}', 100.0) for day in (1, 2, 5, 6, 7)])
+    ranges = CollectionPlanner(store).plan('wechat', datetime(2024, 1, 1), datetime(2024, 1, 7), ['上海电信'])
+    assert ranges == [(datetime(2024, 1, 3), datetime(2024, 1, 4))]
+
+def test_missing_when_any_keyword_or_metric_lacks_data(store):
+    planner = CollectionPlanner(store)
+    records = [('baidu', keyword, 'search', '2024-01-01', 1.0) for keyword in ('上海电信', '上海移动')]
+    store.upsert_records(records + [('baidu', '上海电信', 'info', '2024-01-01', 1.0)])
+    # 上海移动缺少资讯指数
+    assert planner.missing_dates('baidu', datetime(2024, 1, 1), datetime(2024, 1, 1), ['上海电信', '上海移动']) \
+        == [date(2024, 1, 1)]
+    store.upsert_records([('baidu', '上海移动', 'info', '2024-01-01', 1.0)])
+    assert planner.missing_dates('baidu', datetime(2024, 1, 1), datetime(2024, 1, 1), ['上海电信', '上海移动']) == []
+
+def test_baidu_records_parse_numbers():
+    result = {'search_data': {'2024-01-01': {'上海电信': '1,520', '上海移动': ''}}, 'info_data': {}}
+    assert baidu_records(result) == [('baidu', '上海电信', 'search', '2024-01-01', 1520.0)]
+
+def test_wechat_records_accept_lists_and_dicts():
+    result = {'method': 'web', 'data': [
+        {'keyword': '上海电信', 'data': [10, None, '30']},
+        {'keyword': '上海移动', 'data': {'2024-01-02': 5}}
+    ]}
+    records = wechat_records(result, datetime(2024, 1, 1), datetime(2024, 1, 3))
+    assert records == [
+        ('wechat', '上海电信', 'index', '2024-01-01', 10.0),
+        ('wechat', '上海电信', 'index', '2024-01-03', 30.0),
+        ('wechat', '上海移动', 'index', '2024-01-02', 5.0)
+    ]
+    assert wechat_records({'method': 'manual'}, datetime(2024, 1, 1), datetime(2024, 1, 3)) == []
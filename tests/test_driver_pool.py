@@ -0,0 +1,113 @@
+"""
+浏览器驱动池测试：假驱动，不启动浏览器
+"""
+
+import threading
+import pytest
+from driver_pool import DriverPool
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.quit_called = False
+        self.pages = []
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise RuntimeError('会话已断开')
+        return 'complete'
+
+    def get(self, url):
+        self.pages.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+class FakeFactory:
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver(len(self.drivers) + 1)
+        self.drivers.append(driver)
+        return driver
+
+@pytest.fixture
+def factory():
+    return FakeFactory()
+
+def make_pool(factory, size=2, max_uses=3, checkout_timeout=1):
+    return DriverPool(size=size, max_uses=max_uses, checkout_timeout=checkout_timeout, driver_factory=factory)
+
+def test_warm_up_and_reuse(factory):
+    pool = make_pool(factory)
+    assert pool.warm_up() == 2
+    assert pool.warm_up() == 0
+
+    driver = pool.acquire()
+    pool.release(driver)
+    assert pool.acquire() is factory.drivers[1]
+    assert pool.acquire() is driver
+    assert driver.pages == ['about:blank']
+    assert pool.get_stats()['created'] == 2 and pool.get_stats()['in_use'] == 2
+
+def test_checkout_waits_for_release_and_times_out(factory):
+    pool = make_pool(factory, size=1, checkout_timeout=0.1)
+    driver = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+    timer = threading.Timer(0.05, pool.release, args=(driver,))
+    timer.start()
+    assert pool.acquire(timeout=2) is driver
+    timer.join()
+
+def test_session_recycled_after_max_uses(factory):
+    pool = make_pool(factory, size=1, max_uses=2)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+    assert first.quit_called
+
+    second = pool.acquire()
+    assert second is not first and len(factory.drivers) == 2
+    assert pool.get_stats()['recycled'] == 1
+
+def test_broken_and_unhealthy_sessions_are_replaced(factory):
+    pool = make_pool(factory, size=1)
+    driver = pool.acquire()
+    pool.release(driver, broken=True)
+    assert driver.quit_called
+
+    driver = pool.acquire()
+    pool.release(driver)
+    driver.healthy = False
+    replacement = pool.acquire()
+    assert replacement is not driver and driver.quit_called
+    assert pool.get_stats()['recycled'] == 2
+
+def test_factory_failure_frees_the_slot(factory):
+    calls = []
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('Chrome启动失败')
+        return factory()
+
+    pool = make_pool(flaky, size=1)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert pool.acquire() is factory.drivers[0]
+
+def test_close_rejects_checkout_and_quits_returned_drivers(factory):
+    pool = make_pool(factory)
+    pool.warm_up()
+    driver = pool.acquire()
+    pool.close()
+    assert factory.drivers[1].quit_called
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(driver)
+    assert driver.quit_called
@@ -0,0 +1,75 @@
+"""
+Excel报告测试：写入后用openpyxl重新读取，检查样式、条件格式和趋势图
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+import data_processor
+from data_processor import DataProcessor
+from excel_writer import StreamingReportWriter, HEADER_STYLE, CELL_STYLE
+from series_frame import SeriesFrame
+
+class FakeCatalog:
+    def register(self, path, *args, **kwargs):
+        return None
+
+@pytest.fixture(autouse=True)
+def fake_catalog(monkeypatch):
+    monkeypatch.setattr(data_processor, 'get_catalog', lambda: FakeCatalog())
+
+def test_streaming_writer_styles_and_highlights(tmp_path):
+    writer = StreamingReportWriter()
+    df = pd.DataFrame({'日期': ['2024-01-01', '2024-01-02', '2024-01-03'], '数值': [1.0, np.nan, np.int64(3)]})
+    ws, row_count = writer.write_frame('数据', df)
+    writer.highlight(ws, [2, 3, 4, 2], [2, 2, 2, 1], 'FF0000', 'FFFFFF')
+    path = str(tmp_path / 'report.xlsx')
+    writer.save(path)
+
+    workbook = load_workbook(path)
+    sheet = workbook['数据']
+    assert row_count == 3
+    assert {HEADER_STYLE, CELL_STYLE} <= set(workbook.named_styles)
+    assert [cell.style for cell in sheet[1]] == [HEADER_STYLE, HEADER_STYLE]
+    assert all(cell.style == CELL_STYLE for row in sheet.iter_rows(min_row=2) for cell in row)
+    assert [cell.value for cell in sheet['B'][1:]] == [1, None, 3]
+
+    # 同一批单元格合并为一条规则
+    formats = list(sheet.conditional_formatting)
+    assert len(formats) == 1
+    assert str(formats[0].sqref) == 'A2 B2:B4'
+    rule = formats[0].rules[0]
+    assert rule.type == 'expression' and rule.formula == ['TRUE']
+    assert rule.dxf.fill.fgColor.rgb.endswith('FF0000')
+
+def test_report_chart_and_highlights_reference_daily_columns(tmp_path):
+    dates = pd.date_range('2024-01-01', periods=14).strftime('%Y-%m-%d')
+    processor = DataProcessor(report_cache=False, keywords={'baidu': ['上海电信', '上海移动'], 'wechat': ['上海电信', '上海移动']})
+    # 上海移动没有数据，图表只引用上海电信的每日指数列
+    processor.series[('wechat', 'index')] = SeriesFrame.from_mapping(
+        'wechat', 'index', {day: {'上海电信': 100.0 + i} for i, day in enumerate(dates)})
+    path = str(tmp_path / 'report.xlsx')
+    assert processor.generate_excel_report(path)
+
+    sheet = load_workbook(path)['微信指数趋势']
+    assert [cell.value for cell in sheet[1]] == ['日期', '星期', '上海电信每日指数', '每周指数平均值',
+                                                 '上海移动每日指数', '每周指数平均值', '三家指数趋势对比']
+    assert sheet.max_row == 15
+
+    charts = sheet._charts
+    assert len(charts) == 1
+    chart = charts[0]
+    assert chart.anchor._from.col == 6 and chart.anchor._from.row == 1
+    assert len(chart.series) == 1
+    series = chart.series[0]
+    assert series.val.numRef.f == "'微信指数趋势'!$C$2:$C$15"
+    assert series.tx.strRef.f == "'微信指数趋势'!C1"
+    assert series.cat.numRef.f == "'微信指数趋势'!$A$2:$A$15"
+
+    # 每周最高值标在对应的每日指数单元格
+    formats = list(sheet.conditional_formatting)
+    assert [str(item.sqref) for item in formats] == ['C8 C15']
+
+    # 没有数据的工作表不生成图表
+    assert not load_workbook(path)['百度指数搜索']._charts
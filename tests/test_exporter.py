@@ -0,0 +1,38 @@
+"""
+列式导出测试：长表的每周平均值与Excel报告一致
+"""
+
+from datetime import datetime
+import pandas as pd
+import pytest
+from data_processor import DataProcessor
+from exporter import long_table
+from index_store import IndexStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = IndexStore(str(tmp_path / 'index.db'))
+    # 2024-01-01是周一，第一周每天的值为1..7
+    store.upsert_records([('wechat', '上海电信', 'index', f'2024-01-{day:02d}', float(day)) for day in range(1, 15)])
+    yield store
+    store.close()
+
+def test_boundary_week_uses_full_iso_week(store):
+    df = long_table(store, datetime(2024, 1, 5), datetime(2024, 1, 9))
+    assert df['date'].dt.day.tolist() == [5, 6, 7, 8, 9]
+    assert df['weekly_avg'].tolist() == [4.0, 4.0, 4.0, 11.0, 11.0]
+
+def test_report_and_export_agree(store):
+    start, end = datetime(2024, 1, 5), datetime(2024, 1, 9)
+    processor = DataProcessor(report_cache=False)
+    assert processor.load_from_store(store, start, end, sources=('wechat',))
+    calendar, values, averages = processor._build_report_frame()
+
+    key = ('wechat', 'index', '上海电信')
+    exported = long_table(store, start, end)
+    assert calendar['日期'].tolist() == exported['date'].dt.strftime('%Y-%m-%d').tolist()
+    assert values[key].tolist() == exported['value'].tolist()
+    assert averages[key].tolist() == exported['weekly_avg'].tolist()
+
+    # 汇总表只按报告日期范围内的数据计算
+    assert processor._report_series()[('wechat', 'index')].means()['上海电信'] == pytest.approx(7.0)
@@ -0,0 +1,74 @@
+"""
+指数数据存储测试
+"""
+
+from datetime import datetime
+import numpy as np
+import pytest
+from index_store import IndexStore, to_number
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'index.db')
+
+@pytest.fixture
+def store(db_path):
+    store = IndexStore(db_path)
+    yield store
+    store.close()
+
+def test_query_arrays_aligns_keywords_and_days(store):
+    store.upsert_records([
+        ('baidu', '上海电信', 'search', '2024-01-01', 10.0),
+        ('baidu', '上海电信', 'search', '2024-01-03', 30.0),
+        ('baidu', '上海移动', 'search', '2024-01-02', 20.0)
+    ])
+    dates, columns, values = store.query_arrays('baidu', 'search', datetime(2024, 1, 1), datetime(2024, 1, 3),
+                                                ['上海移动', '上海电信', '上海联通'])
+    assert dates.astype(str).tolist() == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert columns == ['上海移动', '上海电信', '上海联通']
+    np.testing.assert_array_equal(values, [[np.nan, 10, np.nan], [20, np.nan, np.nan], [np.nan, 30, np.nan]])
+
+def test_upsert_overwrites_existing_value(store):
+    store.upsert_records([('wechat', '上海电信', 'index', '2024-01-01', 1.0)])
+    store.upsert_records([('wechat', '上海电信', 'index', '2024-01-01', 2.0)])
+    assert store.query_frame('wechat', 'index', '2024-01-01', '2024-01-01')['上海电信'].tolist() == [2.0]
+
+def test_existing_dates(store):
+    store.upsert_records([('wechat', '上海电信', 'index', f'2024-01-0{day}', 1.0) for day in (2, 4)])
+    assert store.existing_dates('wechat', 'index', ['上海电信', '上海移动'], '2024-01-01', '2024-01-31') == {
+        '上海电信': {'2024-01-02', '2024-01-04'},
+        '上海移动': set()
+    }
+
+def test_query_long_filters_sources(store):
+    store.upsert_records([
+        ('baidu', '上海电信', 'info', '2024-01-01', 5.0),
+        ('wechat', '上海电信', 'index', '2024-01-01', 7.0)
+    ])
+    df = store.query_long('2024-01-01', '2024-01-01', sources=['wechat'])
+    assert df[['source', 'metric', 'keyword', 'value']].values.tolist() == [['wechat', 'index', '上海电信', 7.0]]
+
+def test_data_persists_after_reopen(store, db_path):
+    store.upsert_records([('wechat', '上海电信', 'index', '2024-01-01', 3.0)])
+    reopened = IndexStore(db_path)
+    try:
+        df = reopened.query_long('2024-01-01', '2024-01-01')
+        assert df[['source', 'metric', 'keyword', 'value']].values.tolist() == [['wechat', 'index', '上海电信', 3.0]]
+    finally:
+        reopened.close()
+
+def test_series_created_by_another_connection_are_found(store, db_path):
+    # 例如分片工作进程或定时任务写入了新关键词
+    writer = IndexStore(db_path)
+    try:
+        writer.upsert_records([('wechat', '上海联通', 'index', '2024-01-01', 4.0)])
+    finally:
+        writer.close()
+
+    assert store.existing_dates('wechat', 'index', ['上海联通'], '2024-01-01', '2024-01-01') == {'上海联通': {'2024-01-01'}}
+    assert store.query_frame('wechat', 'index', '2024-01-01', '2024-01-01').columns.tolist() == ['上海联通']
+    assert store.query_long('2024-01-01', '2024-01-01')['keyword'].tolist() == ['上海联通']
+
+def test_to_number_parses_collected_values():
+    assert [to_number(value) for value in ('1,234', ' 56 ', 7, '', None, '--')] == [1234.0, 56.0, 7.0, None, None, None]
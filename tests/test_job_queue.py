@@ -0,0 +1,110 @@
+"""
+收集任务队列测试：用假的流水线代替真实收集
+"""
+
+import time
+import threading
+from datetime import datetime
+import pytest
+from job_queue import JobManager, QueueFullError, DONE, FAILED, CANCELLED, RUNNING
+from pipeline import CollectionCancelled
+
+class FakePipeline:
+    """按构造参数记录调用，run的行为由测试指定"""
+
+    def __init__(self, behavior, progress_callback=None, store=None, keywords=None, sources=None, cancel_event=None,
+                 interactive=True):
+        self.behavior = behavior
+        self.interactive = interactive
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+
+    def run(self, start_date, end_date, output_path):
+        return self.behavior(self, output_path)
+
+def make_manager(behavior, **kwargs):
+    updates = []
+    manager = JobManager(on_update=lambda job: updates.append(job.status),
+                         pipeline_factory=lambda **options: FakePipeline(behavior, **options), **kwargs)
+    return manager, updates
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('等待超时')
+        time.sleep(0.01)
+
+def submit(manager):
+    return manager.submit(datetime(2024, 1, 1), datetime(2024, 1, 7), sources=['wechat'])
+
+def test_job_completes_with_progress():
+    def behavior(pipeline, output_path):
+        # 工作线程中不能进入需要控制台输入的手动收集模式
+        assert pipeline.interactive is False
+        pipeline.progress_callback(50, '收集中', {'wechat': 'running'})
+        return {'report_path': output_path, 'errors': []}
+
+    manager, updates = make_manager(behavior, max_workers=1)
+    job = submit(manager)
+    wait_for(lambda: job.finished)
+
+    assert job.status == DONE and job.progress == 100
+    assert job.result['report_path'].endswith(f'_{job.id}.xlsx')
+    assert job.source_status == {'wechat': 'running'}
+    assert updates[0] == 'queued' and RUNNING in updates and updates[-1] == DONE
+    assert job.to_dict()['keywords'].keys() == {'wechat'}
+
+def test_partial_errors_and_failures():
+    manager, _ = make_manager(lambda pipeline, path: {'report_path': path, 'errors': ['baidu']}, max_workers=1)
+    job = submit(manager)
+    wait_for(lambda: job.finished)
+    assert job.status == DONE and 'baidu' in job.message
+
+    def fail(pipeline, path):
+        raise RuntimeError('浏览器启动失败')
+
+    manager, _ = make_manager(fail, max_workers=1)
+    job = submit(manager)
+    wait_for(lambda: job.finished)
+    assert job.status == FAILED and job.error == '浏览器启动失败'
+
+def test_cancel_queued_and_running_jobs():
+    started = threading.Event()
+
+    def behavior(pipeline, path):
+        started.set()
+        pipeline.cancel_event.wait(5)
+        raise CollectionCancelled()
+
+    manager, _ = make_manager(behavior, max_workers=1)
+    running = submit(manager)
+    queued = submit(manager)
+    assert started.wait(5)
+
+    assert manager.cancel(queued.id).status == CANCELLED
+    manager.cancel(running.id)
+    wait_for(lambda: running.finished)
+    assert running.status == CANCELLED
+    assert manager.cancel('missing') is None
+
+def test_queue_full_rejects_submission():
+    release = threading.Event()
+
+    def behavior(pipeline, path):
+        release.wait(5)
+        return {'report_path': path, 'errors': []}
+
+    manager, _ = make_manager(behavior, max_workers=1, max_queued=1)
+    first = submit(manager)
+    wait_for(lambda: first.status == RUNNING)
+    submit(manager)
+    with pytest.raises(QueueFullError):
+        submit(manager)
+    release.set()
+
+def test_history_is_trimmed():
+    manager, _ = make_manager(lambda pipeline, path: {'report_path': path, 'errors': []}, max_workers=1, max_history=2)
+    jobs = [submit(manager) for _ in range(4)]
+    wait_for(lambda: all(job.finished for job in jobs))
+    assert [job.id for job in manager.list()] == [job.id for job in jobs[::-1][:2]]
@@ -0,0 +1,75 @@
+"""
+实时日志和状态推送测试
+"""
+
+import logging
+import threading
+from log_stream import EventHub, RingBufferHandler, StatusPublisher, tail_lines, parse_log_line
+
+def make_logger(handler):
+    logger = logging.getLogger(f'test_log_stream.{id(handler)}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+def test_ring_buffer_keeps_latest_records():
+    handler = RingBufferHandler(capacity=3)
+    logger = make_logger(handler)
+    for i in range(5):
+        logger.info(f'消息 {i}')
+
+    assert [record['message'] for record in handler.tail(10)] == ['消息 2', '消息 3', '消息 4']
+    assert [record['seq'] for record in handler.since(3)] == [4, 5]
+    assert [record['seq'] for record in handler.since(0, limit=2)] == [3, 4]
+    assert handler.latest_seq() == 5
+    assert handler.tail(0) == []
+
+def test_hub_wakes_waiters():
+    hub = EventHub()
+    handler = RingBufferHandler(capacity=10, hub=hub)
+    logger = make_logger(handler)
+    versions = []
+    waiter = threading.Thread(target=lambda: versions.append(hub.wait(0, timeout=5)))
+    waiter.start()
+    logger.warning('收集失败')
+    waiter.join(5)
+    assert versions == [1]
+    assert hub.wait(1, timeout=0.01) == 1
+
+def test_status_publisher_versions_snapshots():
+    hub = EventHub()
+    publisher = StatusPublisher({'is_running': False}, hub=hub)
+    version, status = publisher.snapshot()
+    publisher.update(is_running=True, progress=10)
+    assert publisher.snapshot() == (version + 1, {'is_running': True, 'progress': 10})
+    # 快照是副本，之后的修改不影响已取得的快照
+    assert status == {'is_running': False}
+    assert hub.version == 1
+
+def test_tail_lines_reads_across_blocks(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text(''.join(f'第{i}行\n' for i in range(100)), encoding='utf-8')
+    assert tail_lines(str(path), 3, block_size=16) == ['第97行', '第98行', '第99行']
+    assert tail_lines(str(tmp_path / 'missing.log'), 3) == []
+
+def test_preload_parses_log_file(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text('2024-01-01 09:00:00,123 - pipeline - INFO - 开始收集\n'
+                    '无法解析的行\n'
+                    '2024-01-01 09:00:01,456 - pipeline - ERROR - 收集失败 - 超时\n', encoding='utf-8')
+    handler = RingBufferHandler(capacity=10)
+    assert handler.preload(str(path), 10) == 2
+    assert handler.tail(2) == [
+        {'seq': 1, 'time': '2024-01-01 09:00:00', 'level': 'INFO', 'name': 'pipeline', 'message': '开始收集'},
+        {'seq': 2, 'time': '2024-01-01 09:00:01', 'level': 'ERROR', 'name': 'pipeline', 'message': '收集失败 - 超时'}
+    ]
+    assert parse_log_line('短行') is None
+
+def test_since_limit_below_one_returns_one_record():
+    handler = RingBufferHandler(capacity=5)
+    logger = make_logger(handler)
+    for i in range(3):
+        logger.info(f'消息 {i}')
+    assert [record['seq'] for record in handler.since(0, limit=0)] == [1]
+    assert [record['seq'] for record in handler.since(0, limit=-1)] == [1]
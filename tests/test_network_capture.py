@@ -0,0 +1,49 @@
+"""
+百度指数网络捕获回放测试
+tests/fixtures/baidu_performance_log.json 为录制的Chrome性能日志和对应的响应体
+"""
+
+import os
+import json
+import pytest
+from network_capture import extract_responses, decode_captured_responses, save_recording, load_recording
+
+@pytest.fixture
+def recording(fixtures_dir):
+    with open(os.path.join(fixtures_dir, 'baidu_performance_log.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_extract_only_finished_index_responses(recording):
+    responses = extract_responses(recording['log'], recording['bodies'].__getitem__)
+    urls = [response['url'] for response in responses]
+    assert len(urls) == 4
+    assert not any('app.js' in url or 'late=1' in url for url in urls)
+    assert sum('Interface/ptbk' in url for url in urls) == 2
+
+def test_extract_skips_unreadable_bodies(recording):
+    bodies = dict(recording['bodies'])
+    del bodies['1001.3']
+    responses = extract_responses(recording['log'], bodies.__getitem__)
+    assert len(responses) == 3
+
+def test_decode_replayed_responses(recording):
+    decoded = decode_captured_responses(extract_responses(recording['log'], recording['bodies'].__getitem__))
+
+    assert set(decoded) == {'search', 'info'}
+    search = decoded['search']
+    assert list(search) == [f'2024-01-0{day}' for day in range(1, 8)]
+    assert search['2024-01-01'] == {'上海电信': 1520, '上海移动': 2210}
+    # 空值表示当天无数据
+    assert search['2024-01-03'] == {'上海电信': 1603}
+    assert decoded['info']['2024-01-07'] == {'上海电信': 15320}
+
+def test_decode_without_key_skips_metric(recording):
+    responses = extract_responses(recording['log'], recording['bodies'].__getitem__)
+    responses = [response for response in responses if 'a1b2c3d4' not in response['url']]
+    decoded = decode_captured_responses(responses)
+    assert set(decoded) == {'info'}
+
+def test_recording_round_trip(recording, tmp_path):
+    responses = extract_responses(recording['log'], recording['bodies'].__getitem__)
+    path = save_recording(responses, str(tmp_path / 'capture.json'))
+    assert decode_captured_responses(load_recording(path)) == decode_captured_responses(responses)
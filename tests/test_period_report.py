@@ -0,0 +1,71 @@
+"""
+多周期历史报告测试
+"""
+
+from datetime import datetime
+import numpy as np
+import pytest
+from openpyxl import load_workbook
+import period_report
+from period_report import PeriodReportGenerator, split_periods, aggregate, report_series
+from index_store import IndexStore
+
+class FakeCatalog:
+    def register(self, *args, **kwargs):
+        return None
+
+@pytest.fixture(autouse=True)
+def fake_catalog(monkeypatch):
+    monkeypatch.setattr(period_report, 'get_catalog', lambda: FakeCatalog())
+
+def test_split_periods_truncates_first_and_last():
+    periods = split_periods(datetime(2023, 12, 15), datetime(2024, 4, 10), 'quarter')
+    assert [(name, str(start.date()), str(end.date())) for name, start, end in periods] == [
+        ('2023Q4', '2023-12-15', '2023-12-31'),
+        ('2024Q1', '2024-01-01', '2024-03-31'),
+        ('2024Q2', '2024-04-01', '2024-04-10')
+    ]
+    assert [name for name, _, _ in split_periods(datetime(2024, 1, 31), datetime(2024, 3, 1), 'month')] == [
+        '2024-01', '2024-02', '2024-03']
+    assert split_periods(datetime(2024, 1, 1), datetime(2024, 2, 1), 'all')[0][0] == '20240101-20240201'
+
+def test_aggregate_by_week_and_month_ignores_missing_values():
+    dates = np.arange('2024-01-29', '2024-02-05', dtype='datetime64[D]')
+    values = np.array([[1.0, np.nan], [3.0, np.nan], [np.nan, 4.0], [5.0, 6.0], [7.0, np.nan], [9.0, 2.0], [11.0, np.nan]])
+
+    labels, weekly = aggregate(dates, values, 'week')
+    assert labels == ['2024-01-29']
+    np.testing.assert_allclose(weekly, [[6.0, 4.0]])
+
+    labels, monthly = aggregate(dates, values, 'month')
+    assert labels == ['2024-01', '2024-02']
+    np.testing.assert_allclose(monthly, [[2.0, 4.0], [8.0, 4.0]])
+
+def test_generate_writes_one_sheet_per_period(tmp_path):
+    store = IndexStore(str(tmp_path / 'index.db'))
+    name, source, metric, keyword = report_series()[0]
+    store.upsert_records([(source, keyword, metric, f'2024-01-{day:02d}', float(day)) for day in range(1, 32)] +
+                         [(source, keyword, metric, '2024-02-05', 100.0)])
+    output_path = str(tmp_path / 'period.xlsx')
+    generator = PeriodReportGenerator(store=store, period='month', granularity='week')
+    try:
+        assert generator.generate(datetime(2024, 1, 1), datetime(2024, 2, 29), output_path) == output_path
+    finally:
+        store.close()
+
+    workbook = load_workbook(output_path)
+    assert workbook.sheetnames == ['2024-01', '2024-02', '周期汇总']
+    january = workbook['2024-01']
+    assert january['A1'].value == '周（周一）' and january['B1'].value == name
+    assert [row[0] for row in january.iter_rows(min_row=2, values_only=True)] == [
+        '2024-01-01', '2024-01-08', '2024-01-15', '2024-01-22', '2024-01-29']
+    assert [row[1] for row in january.iter_rows(min_row=2, values_only=True)] == [4, 11, 18, 25, 30]
+    assert january['C2'].value is None
+    summary = list(workbook['周期汇总'].iter_rows(min_row=2, values_only=True))
+    assert [row[:2] for row in summary] == [('2024-01', 16), ('2024-02', 100)]
+
+def test_invalid_period_or_granularity():
+    with pytest.raises(ValueError):
+        PeriodReportGenerator(store=object(), period='decade')
+    with pytest.raises(ValueError):
+        PeriodReportGenerator(store=object(), granularity='hour')
@@ -0,0 +1,97 @@
+"""
+收集流水线测试：假的收集方法，检查先写入存储、再从存储生成报告的流程
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from openpyxl import load_workbook
+import data_processor
+import pipeline
+from pipeline import CollectionPipeline
+from index_store import IndexStore
+
+KEYWORDS = {'baidu': ['上海电信', '上海移动'], 'wechat': ['上海电信', '上海移动']}
+START, END = datetime(2024, 1, 1), datetime(2024, 1, 7)
+
+class FakeCatalog:
+    def register(self, *args, **kwargs):
+        return None
+
+class FakePipeline(CollectionPipeline):
+    """按日期生成数据；wechat_fails为True时微信指数收集抛出异常"""
+
+    wechat_fails = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def _days(self, start_date, end_date):
+        return [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end_date - start_date).days + 1)]
+
+    def _collect_baidu(self, start_date, end_date):
+        self.calls.append(('baidu', start_date, end_date))
+        series = {day: {'上海电信': '1,000', '上海移动': 500} for day in self._days(start_date, end_date)}
+        return {'method': 'http', 'search_data': series, 'info_data': series}
+
+    def _collect_wechat(self, start_date, end_date, interactive=True):
+        self.calls.append(('wechat', start_date, end_date))
+        if self.wechat_fails:
+            raise RuntimeError('微信指数页面不可用')
+        data = [{'keyword': keyword, 'data': {day: 10 for day in self._days(start_date, end_date)}}
+                for keyword in KEYWORDS['wechat']]
+        return {'method': 'web', 'data': data}
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setitem(pipeline.EXPORT_CONFIG, 'enabled', False)
+    monkeypatch.setitem(data_processor.REPORT_CACHE_CONFIG, 'enabled', False)
+    monkeypatch.setattr(pipeline, 'get_catalog', lambda: FakeCatalog())
+    monkeypatch.setattr(data_processor, 'get_catalog', lambda: FakeCatalog())
+
+@pytest.fixture
+def store(tmp_path):
+    store = IndexStore(str(tmp_path / 'index.db'))
+    yield store
+    store.close()
+
+def make_pipeline(store, **kwargs):
+    return FakePipeline(driver_pool=object(), store=store, keywords=KEYWORDS, **kwargs)
+
+def test_collected_data_is_stored_then_reported(store, tmp_path):
+    progress = []
+    collector = make_pipeline(store, progress_callback=lambda value, message, sources: progress.append(value))
+    output_path = str(tmp_path / 'report.xlsx')
+    result = collector.run(START, END, output_path)
+
+    assert result['errors'] == {} and result['report_path'] == output_path
+    assert store.existing_dates('baidu', 'search', ['上海电信'], START, END)['上海电信'] == {
+        f'2024-01-0{day}' for day in range(1, 8)}
+    assert progress[-1] == 100
+
+    workbook = load_workbook(output_path)
+    assert [cell.value for cell in workbook['百度指数搜索']['C'][1:]] == [1000] * 7
+    assert [cell.value for cell in workbook['微信指数趋势']['E'][1:]] == [10] * 7
+
+def test_stored_dates_are_not_collected_again(store, tmp_path):
+    make_pipeline(store).run(START, END - timedelta(days=3), str(tmp_path / 'first.xlsx'))
+    collector = make_pipeline(store)
+    collector.run(START, END, str(tmp_path / 'second.xlsx'))
+    assert sorted(collector.calls) == [('baidu', datetime(2024, 1, 5), END), ('wechat', datetime(2024, 1, 5), END)]
+    assert load_workbook(str(tmp_path / 'second.xlsx'))['百度指数资讯'].max_row == 8
+
+def test_failed_source_does_not_block_the_report(store, tmp_path):
+    collector = make_pipeline(store)
+    collector.wechat_fails = True
+    result = collector.run(START, END, str(tmp_path / 'report.xlsx'))
+
+    assert result['errors'] == {'wechat': '微信指数页面不可用'}
+    assert result['sources']['wechat']['status'] == 'failed'
+    assert result['report_path'] is not None
+    assert load_workbook(result['report_path'])['百度指数搜索'].max_row == 8
+
+def test_all_sources_failing_raises(store, tmp_path):
+    collector = make_pipeline(store, sources=('wechat',))
+    collector.wechat_fails = True
+    with pytest.raises(RuntimeError):
+        collector.run(START, END, str(tmp_path / 'report.xlsx'))
@@ -0,0 +1,95 @@
+"""
+限速和熔断测试
+"""
+
+import time
+import pytest
+from rate_limiter import (AdaptiveRateLimiter, CircuitBreaker, SourceGuard, SqliteState,
+                          ThrottledError, CircuitOpenError)
+
+def test_limiter_additive_increase_multiplicative_decrease():
+    limiter = AdaptiveRateLimiter(rate=1.0, max_rate=2.0, increase=0.5, error_decrease=0.5, throttle_decrease=0.25)
+    limiter.on_success(0.1)
+    assert limiter.rate == pytest.approx(1.5)
+    limiter.on_failure()
+    assert limiter.rate == pytest.approx(0.75)
+    limiter.on_failure(throttled=True)
+    assert limiter.ceiling == pytest.approx(0.75)
+    assert limiter.rate == pytest.approx(0.1875)
+
+def test_limiter_slows_down_on_high_latency():
+    limiter = AdaptiveRateLimiter(rate=1.0, latency_target=5)
+    limiter.on_success(10)
+    assert limiter.rate == pytest.approx(0.9)
+
+def test_limiter_waits_when_bucket_empty():
+    limiter = AdaptiveRateLimiter(rate=20, burst=1)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(0.05, abs=0.01)
+
+def test_breaker_opens_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()
+    # 探测失败：冷却时间翻倍
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.recovery_timeout == pytest.approx(0.1)
+
+    time.sleep(0.11)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.recovery_timeout == pytest.approx(0.05)
+
+def test_guard_rejects_when_open():
+    guard = SourceGuard('baidu', AdaptiveRateLimiter(rate=1000, burst=10), CircuitBreaker(failure_threshold=1))
+    with pytest.raises(ThrottledError):
+        with guard.request('search'):
+            raise ThrottledError('429')
+    with pytest.raises(CircuitOpenError):
+        guard.check()
+    with pytest.raises(CircuitOpenError):
+        with guard.request('search'):
+            pass
+    stats = guard.get_stats()
+    assert stats['throttled'] == 1 and stats['rejected'] == 2 and stats['circuit'] == 'open'
+
+def test_sqlite_state_is_shared(tmp_path):
+    path = str(tmp_path / 'state.db')
+    first = CircuitBreaker(failure_threshold=1, recovery_timeout=60, state=SqliteState(path), key='baidu:breaker')
+    second = CircuitBreaker(failure_threshold=1, recovery_timeout=60, state=SqliteState(path), key='baidu:breaker')
+    first.record_failure()
+    assert second.state == 'open'
+    assert second.retry_after() > 0
+
+    limiter = AdaptiveRateLimiter(rate=1.0, increase=0.5, state=SqliteState(path), key='baidu:limiter')
+    other = AdaptiveRateLimiter(rate=1.0, state=SqliteState(path), key='baidu:limiter')
+    limiter.on_success()
+    assert other.rate == pytest.approx(1.5)
+
+def test_abandoned_probe_expires(tmp_path):
+    path = str(tmp_path / 'state.db')
+    crashed = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01, probe_timeout=0.1,
+                             state=SqliteState(path), key='wechat:breaker')
+    crashed.record_failure()
+    time.sleep(0.02)
+    # 探测进程在请求中途退出，没有记录结果
+    assert crashed.allow()
+
+    other = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01, probe_timeout=0.1,
+                           state=SqliteState(path), key='wechat:breaker')
+    assert not other.allow()
+    assert 0 < other.retry_after() <= 0.1
+    time.sleep(0.11)
+    assert other.allow()
+    other.record_success()
+    assert crashed.state == 'closed'
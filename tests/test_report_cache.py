@@ -0,0 +1,60 @@
+"""
+报告缓存测试
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from report_cache import ReportCache, report_key
+
+@pytest.fixture
+def values():
+    columns = pd.MultiIndex.from_tuples([('baidu', 'search', '上海电信'), ('wechat', 'index', '上海电信')])
+    return pd.DataFrame([[1.0, 2.0], [3.0, np.nan]], index=pd.date_range('2024-01-01', periods=2), columns=columns)
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReportCache(str(tmp_path / 'cache'), max_bytes=1024, max_entries=3, max_age_days=1)
+
+def test_key_ignores_column_order(values):
+    assert report_key(values) == report_key(values[values.columns[::-1]])
+
+def test_key_changes_with_values_and_settings(values):
+    changed = values.copy()
+    changed.iloc[0, 0] = 1.5
+    assert report_key(values) != report_key(changed)
+    assert report_key(values, {'template': 'a'}) != report_key(values, {'template': 'b'})
+
+def test_put_then_get_copies_report(cache, tmp_path):
+    report = tmp_path / 'report.xlsx'
+    report.write_bytes(b'report')
+    assert not cache.get('k1', str(tmp_path / 'out.xlsx'))
+    assert cache.put('k1', str(report))
+    assert cache.get('k1', str(tmp_path / 'out' / 'copy.xlsx'))
+    assert (tmp_path / 'out' / 'copy.xlsx').read_bytes() == b'report'
+
+def test_evict_by_count_keeps_recently_used(cache, tmp_path):
+    report = tmp_path / 'report.xlsx'
+    report.write_bytes(b'x')
+    now = time.time()
+    for i in range(3):
+        cache.put(f'k{i}', str(report))
+        os.utime(cache._path(f'k{i}'), (now - 100 + i, now - 100 + i))
+    # k0 最近被使用，淘汰最久未使用的 k1
+    cache.get('k0', str(tmp_path / 'out.xlsx'))
+    cache.put('k3', str(report))
+    assert sorted(name[:2] for name in os.listdir(cache.cache_dir)) == ['k0', 'k2', 'k3']
+
+def test_evict_by_age_and_size(cache, tmp_path):
+    report = tmp_path / 'report.xlsx'
+    report.write_bytes(b'x' * 600)
+    cache.put('big1', str(report))
+    cache.put('big2', str(report))
+    assert cache.get_stats()['entries'] == 1
+
+    old = time.time() - 2 * 86400
+    os.utime(cache._path('big2'), (old, old))
+    assert cache.evict() == 1
+    assert cache.get_stats() == {'entries': 0, 'bytes': 0, 'dir': cache.cache_dir}
@@ -0,0 +1,71 @@
+"""
+关键词分片收集测试：分片函数替换为假的收集结果，进程池替换为线程池
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pytest
+import sharded_collector
+from sharded_collector import ShardedCollector, shard_keywords, merge_baidu_results, merge_wechat_results
+
+START, END = datetime(2024, 1, 1), datetime(2024, 1, 2)
+KEYWORDS = ['上海电信', '上海移动', '上海联通', '北京电信', '北京移动']
+
+@pytest.fixture(autouse=True)
+def thread_pool(monkeypatch):
+    monkeypatch.setattr(sharded_collector, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setitem(sharded_collector.SHARD_CONFIG, 'baidu_compare_limit', 2)
+    monkeypatch.setitem(sharded_collector.SHARD_CONFIG, 'wechat_shard_size', 2)
+
+def fake_baidu_shard(keywords, start_date, end_date):
+    if '北京移动' in keywords:
+        raise RuntimeError('页面加载超时')
+    series = {'2024-01-01': {keyword: i + 1 for i, keyword in enumerate(keywords)}}
+    return {'method': 'http', 'search_data': series, 'info_data': series, 'screenshots': {'search': keywords[0]}}
+
+def test_shard_keywords_keeps_order():
+    assert shard_keywords(KEYWORDS, 2) == [['上海电信', '上海移动'], ['上海联通', '北京电信'], ['北京移动']]
+    assert shard_keywords(KEYWORDS[:1], 0) == [['上海电信']]
+
+def test_baidu_shards_are_merged_and_failures_recorded(monkeypatch):
+    monkeypatch.setattr(sharded_collector, '_collect_baidu_shard', fake_baidu_shard)
+    collector = ShardedCollector(max_workers=3)
+    result = collector.collect_baidu_index_data(START, END, KEYWORDS)
+
+    assert result['method'] == 'http'
+    assert result['search_data'] == {'2024-01-01': {'上海电信': 1, '上海移动': 2, '上海联通': 1, '北京电信': 2}}
+    assert result['date_range'] == {'start': '2024-01-01', 'end': '2024-01-02'}
+    assert len(result['shard_screenshots']) == 2
+    assert collector.failed_shards == [{'keywords': ['北京移动'], 'error': '页面加载超时'}]
+
+def test_all_baidu_shards_failing_raises(monkeypatch):
+    monkeypatch.setattr(sharded_collector, '_collect_baidu_shard', fake_baidu_shard)
+    with pytest.raises(RuntimeError):
+        ShardedCollector().collect_baidu_index_data(START, END, ['北京移动'])
+
+def test_wechat_shards_pass_interactive(monkeypatch):
+    calls = []
+    def fake_wechat_shard(keywords, start_date, end_date, interactive=True):
+        calls.append((tuple(keywords), interactive))
+        if keywords[0] == '北京移动':
+            return {'method': 'manual', 'keywords': keywords}
+        return {'method': 'web', 'data': [{'keyword': keyword, 'data': {'2024-01-01': 1}} for keyword in keywords],
+                'screenshot': f"{keywords[0]}.png"}
+
+    monkeypatch.setattr(sharded_collector, '_collect_wechat_shard', fake_wechat_shard)
+    result = ShardedCollector().collect_wechat_index_data(START, END, KEYWORDS, interactive=False)
+
+    assert sorted(calls) == sorted([(('上海电信', '上海移动'), False), (('上海联通', '北京电信'), False),
+                                    (('北京移动',), False)])
+    assert result['method'] == 'web'
+    assert sorted(item['keyword'] for item in result['data']) == sorted(KEYWORDS[:4])
+    assert result['keywords'] == ['北京移动']
+
+def test_merge_results_mixed_and_manual():
+    baidu = merge_baidu_results([{'method': 'http', 'search_data': {'2024-01-02': {'a': 1}}},
+                                 {'method': 'browser', 'search_data': {'2024-01-01': {'b': 2}}}, None], START, END)
+    assert baidu['method'] == 'mixed'
+    assert list(baidu['search_data']) == ['2024-01-01', '2024-01-02']
+
+    wechat = merge_wechat_results([{'method': 'manual', 'keywords': ['a']}], START, END)
+    assert wechat['method'] == 'manual' and wechat['data'] == [] and wechat['keywords'] == ['a']
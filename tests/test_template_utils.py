@@ -0,0 +1,43 @@
+"""
+模板缓存测试：按源码哈希缓存，源码变化时重新编译
+"""
+
+import os
+import pytest
+import template_utils
+from template_utils import get_template, render_template_string
+
+@pytest.fixture(autouse=True)
+def fresh_environment(tmp_path, monkeypatch):
+    monkeypatch.setitem(template_utils.TEMPLATE_CONFIG, 'bytecode_cache_dir', str(tmp_path / 'templates'))
+    monkeypatch.setattr(template_utils, '_environment', None)
+    monkeypatch.setattr(template_utils, '_loader', template_utils.SourceHashLoader())
+    monkeypatch.setattr(template_utils, '_names', {})
+
+def test_same_source_is_compiled_once():
+    source = '<p>{{ name }}</p>'
+    assert get_template(source) is get_template(''.join(['<p>{{ name }}', '</p>']))
+    assert render_template_string(source, name='<b>') == '<p>&lt;b&gt;</p>'
+
+def test_changed_source_is_recompiled():
+    before = get_template('<p>{{ count }} 个任务</p>')
+    after = get_template('<p>{{ count }} 个已完成任务</p>')
+    assert before is not after
+    assert after.render(count=3) == '<p>3 个已完成任务</p>'
+    assert before.render(count=3) == '<p>3 个任务</p>'
+
+def test_bytecode_cache_survives_restart(tmp_path, monkeypatch):
+    source = '{% for item in items %}{{ item }},{% endfor %}'
+    assert render_template_string(source, items=[1, 2]) == '1,2,'
+    cache_dir = tmp_path / 'templates'
+    assert len(os.listdir(cache_dir)) == 1
+
+    # 模拟进程重启：新的环境和加载器从字节码缓存载入，不再写入新文件
+    monkeypatch.setattr(template_utils, '_environment', None)
+    monkeypatch.setattr(template_utils, '_loader', template_utils.SourceHashLoader())
+    monkeypatch.setattr(template_utils, '_names', {})
+    assert render_template_string(source, items=[3]) == '3,'
+    assert len(os.listdir(cache_dir)) == 1
+
+    render_template_string(source + '!', items=[])
+    assert len(os.listdir(cache_dir)) == 2
@@ -0,0 +1,48 @@
+"""
+页面等待策略测试：假的浏览器驱动模拟点击后仍在进行中的请求
+"""
+
+import time
+from wait_strategy import PageWaiter, network_idle, all_of
+
+class SlowRequestDriver:
+    """点击后发出一个持续duration秒的XHR；请求结束后资源加载数才增加"""
+
+    def __init__(self, duration=0.3):
+        self.duration = duration
+        self.tracker_installed_at = None
+        self.clicked_at = None
+
+    def click(self):
+        self.clicked_at = time.monotonic()
+
+    def execute_script(self, script, *args):
+        now = time.monotonic()
+        if self.tracker_installed_at is None:
+            self.tracker_installed_at = now
+        in_flight = self.clicked_at is not None and now - self.clicked_at < self.duration
+        # 计数脚本只能看到安装之后发出的请求
+        tracked = in_flight and self.tracker_installed_at <= self.clicked_at
+        finished = self.clicked_at is not None and not in_flight
+        return [1 if tracked else 0, 1 if finished else 0]
+
+def wait_after_click(arm):
+    driver = SlowRequestDriver()
+    waiter = PageWaiter(driver, timeouts={'step': 2}, poll_interval=0.01)
+    if arm:
+        waiter.arm()
+    driver.click()
+    started = time.monotonic()
+    waiter.until('step', network_idle(idle_ms=100))
+    return time.monotonic() - started
+
+def test_armed_wait_sees_request_in_flight():
+    assert wait_after_click(arm=True) >= 0.3
+
+def test_unarmed_wait_misses_request_in_flight():
+    # 未预先安装计数脚本时，进行中的请求看不到，过早判定为空闲
+    assert wait_after_click(arm=False) < 0.3
+
+def test_all_of_returns_last_result():
+    assert all_of(lambda driver: True, lambda driver: 'ok')(None) == 'ok'
+    assert all_of(lambda driver: False, lambda driver: 'ok')(None) is False
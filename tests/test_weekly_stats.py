@@ -0,0 +1,25 @@
+"""
+每周平均值计算测试
+"""
+
+import numpy as np
+import pandas as pd
+from weekly_stats import week_start_days, iso_week_bounds, weekly_average_frame
+
+def test_week_start_days_at_year_boundary():
+    starts = week_start_days(pd.to_datetime(['2020-12-31', '2021-01-03', '2021-01-04', '2024-12-30']))
+    assert starts.astype('datetime64[D]').astype(str).tolist() == ['2020-12-28', '2020-12-28', '2021-01-04', '2024-12-30']
+
+def test_iso_week_bounds():
+    start, end = iso_week_bounds('2024-01-05', '2024-01-08')
+    assert (str(start.date()), str(end.date())) == ('2024-01-01', '2024-01-14')
+
+def test_weekly_average_frame_keeps_years_apart():
+    dates = pd.to_datetime(['2023-01-02', '2023-01-03', '2024-01-01', '2024-01-02'])
+    values = pd.DataFrame({'上海电信': [10.0, 20.0, 100.0, np.nan]}, index=dates)
+    assert weekly_average_frame(dates, values)['上海电信'].tolist() == [15.0, 15.0, 100.0, 100.0]
+
+def test_weekly_average_frame_is_row_aligned():
+    dates = pd.date_range('2024-01-06', periods=4)
+    values = pd.DataFrame({'a': [1.0, 3.0, 10.0, '20']}, index=dates)
+    assert weekly_average_frame(dates, values)['a'].tolist() == [2.0, 2.0, 15.0, 15.0]
@@ -0,0 +1,137 @@
+"""
+页面等待策略
+用DOM就绪、图表渲染完成、网络空闲等条件代替固定的time.sleep，页面一就绪立即返回
+"""
+
+import time
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from config import WAIT_CONFIG
+
+# 注入页面的请求计数脚本：统计尚未完成的fetch/XHR请求数
+_INSTALL_REQUEST_TRACKER_JS = """
+if (!window.__icPending) {
+    window.__icPending = {count: 0};
+    var origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function() {
+            window.__icPending.count++;
+            return origFetch.apply(this, arguments).finally(function() {
+                window.__icPending.count--;
+            });
+        };
+    }
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__icPending.count++;
+        this.addEventListener('loadend', function() {
+            window.__icPending.count--;
+        });
+        return origSend.apply(this, arguments);
+    };
+}
+return [window.__icPending.count, performance.getEntriesByType('resource').length];
+"""
+
+_CHART_RENDERED_JS = """
+var root = document.querySelector(arguments[0]);
+if (!root) return false;
+var canvas = root.querySelector('canvas, svg');
+if (!canvas) return false;
+var rect = canvas.getBoundingClientRect();
+return rect.width > 0 && rect.height > 0;
+"""
+
+def dom_ready():
+    """条件：document.readyState为complete"""
+    def _condition(driver):
+        return driver.execute_script("return document.readyState") == 'complete'
+    return _condition
+
+def chart_rendered(css_selector):
+    """条件：图表容器内的canvas/svg已渲染出非零尺寸"""
+    def _condition(driver):
+        return bool(driver.execute_script(_CHART_RENDERED_JS, css_selector))
+    return _condition
+
+def install_request_tracker(driver):
+    """在页面中安装请求计数脚本，只统计安装之后发出的fetch/XHR请求"""
+    return driver.execute_script(_INSTALL_REQUEST_TRACKER_JS)
+
+def network_idle(idle_ms=None):
+    """
+    条件：没有未完成的fetch/XHR请求，且资源加载数在idle_ms内不再变化
+    计数脚本在第一次检查时才安装的话，之前已发出的请求看不到，触发请求的操作之前应先调用PageWaiter.arm()
+    """
+    idle_seconds = (idle_ms if idle_ms is not None else WAIT_CONFIG['network_idle_ms']) / 1000.0
+    state = {'resources': None, 'since': None}
+
+    def _condition(driver):
+        pending, resources = install_request_tracker(driver)
+        now = time.monotonic()
+        if pending > 0 or resources != state['resources']:
+            state['resources'] = resources
+            state['since'] = now
+            return False
+        return now - state['since'] >= idle_seconds
+    return _condition
+
+def all_of(*conditions):
+    """条件：所有条件同时满足，返回最后一个条件的结果"""
+    def _condition(driver):
+        result = True
+        for condition in conditions:
+            result = condition(driver)
+            if not result:
+                return False
+        return result
+    return _condition
+
+class PageWaiter:
+    """按步骤等待页面就绪并记录实际等待时间"""
+
+    def __init__(self, driver, timeouts=None, poll_interval=None):
+        self.logger = logging.getLogger(__name__)
+        self.driver = driver
+        self.timeouts = timeouts or WAIT_CONFIG['timeouts']
+        self.poll_interval = poll_interval or WAIT_CONFIG['poll_interval']
+        self.timings = {}  # 步骤名 -> [实际等待秒数, ...]
+
+    def arm(self):
+        """在点击等触发请求的操作之前调用，使network_idle能看到操作发出的请求"""
+        try:
+            install_request_tracker(self.driver)
+        except Exception as e:
+            self.logger.warning(f"安装请求计数脚本失败: {str(e)}")
+        return self
+
+    def until(self, step, *conditions, timeout=None, required=True):
+        """
+        等待条件满足
+        required为False时超时只记录警告，继续后续流程
+        """
+        budget = timeout if timeout is not None else self.timeouts.get(step, WAIT_CONFIG['default_timeout'])
+        started = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, budget, poll_frequency=self.poll_interval).until(
+                all_of(*conditions)
+            )
+            return result
+        except TimeoutException:
+            if required:
+                self.logger.error(f"等待步骤 {step} 超时（{budget}秒）")
+                raise
+            self.logger.warning(f"等待步骤 {step} 超时（{budget}秒），继续执行")
+            return None
+        finally:
+            elapsed = time.monotonic() - started
+            self.timings.setdefault(step, []).append(round(elapsed, 3))
+            self.logger.debug(f"步骤 {step} 等待 {elapsed:.3f} 秒")
+
+    def summary(self):
+        """汇总每个步骤的等待次数和总耗时"""
+        return {
+            step: {'count': len(values), 'total': round(sum(values), 3), 'max': max(values)}
+            for step, values in self.timings.items()
+        }
@@ -3,63 +3,71 @@
 注意：由于微信指数主要通过小程序提供，本工具提供多种收集方式
 """
 
-import time
+import os
 import logging
 import json
 import requests
 from datetime import datetime, timedelta
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd
-from config import BROWSER_CONFIG, KEYWORDS, SCREENSHOT_CONFIG, SCREENSHOTS_DIR
+from driver_pool import create_chrome_driver
+from wait_strategy import PageWaiter, dom_ready, chart_rendered, network_idle
+from rate_limiter import get_guard, CircuitOpenError, ThrottledError
+from config import KEYWORDS, SCREENSHOT_CONFIG, SCREENSHOTS_DIR
+from artifact_catalog import get_catalog
 
 class WechatIndexCollector:
     """微信指数数据收集器"""
     
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, driver_pool=None):
         self.driver = None
         self.headless = headless
+        self.driver_pool = driver_pool  # 共享驱动池，为None时每次新建浏览器
+        self._driver_broken = False
+        self.waiter = None
+        self.guard = get_guard('wechat')  # 所有微信指数请求共享的限速熔断器
         self.logger = logging.getLogger(__name__)
         self.data = []
         
     def setup_driver(self):
         """设置浏览器驱动"""
         try:
-            chrome_options = Options()
-            if self.headless:
-                chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument(f'--window-size={BROWSER_CONFIG["window_size"]}')
-            chrome_options.add_argument(f'--user-agent={BROWSER_CONFIG["user_agent"]}')
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.implicitly_wait(BROWSER_CONFIG['timeout'])
-            self.logger.info("浏览器驱动初始化成功")
+            self._driver_broken = False
+            if self.driver_pool:
+                self.driver = self.driver_pool.acquire()
+                self.logger.info("已从驱动池借用浏览器驱动")
+            else:
+                self.driver = create_chrome_driver(self.headless)
+                self.logger.info("浏览器驱动初始化成功")
+            self.waiter = PageWaiter(self.driver)
             
         except Exception as e:
             self.logger.error(f"浏览器驱动初始化失败: {str(e)}")
             raise
     
     def close_driver(self):
-        """关闭浏览器驱动"""
+        """关闭浏览器驱动（使用驱动池时归还会话）"""
         if self.driver:
-            self.driver.quit()
-            self.logger.info("浏览器驱动已关闭")
+            if self.driver_pool:
+                self.driver_pool.release(self.driver, broken=self._driver_broken)
+                self.logger.info("浏览器驱动已归还驱动池")
+            else:
+                self.driver.quit()
+                self.logger.info("浏览器驱动已关闭")
+            self.driver = None
     
     def try_web_version(self):
         """尝试访问微信指数的网页版本"""
         try:
             # 尝试访问微信指数的网页版本
             web_url = "https://index.weixin.qq.com"
-            self.driver.get(web_url)
-            self.logger.info(f"已访问微信指数网页版: {web_url}")
-            time.sleep(5)
+            with self.guard.request('打开页面'):
+                self.driver.get(web_url)
+                self.logger.info(f"已访问微信指数网页版: {web_url}")
+                self.waiter.until('wechat_page_load', dom_ready(), required=False)
             
             # 检查是否需要登录
             if "login" in self.driver.current_url or "auth" in self.driver.current_url:
@@ -76,6 +84,9 @@ class WechatIndexCollector:
         except TimeoutException:
             self.logger.error("微信指数网页版加载超时")
             return False
+        except (CircuitOpenError, ThrottledError):
+            # 被限流或已熔断时直接失败，不进入手动收集模式
+            raise
         except Exception as e:
             self.logger.error(f"访问微信指数网页版失败: {str(e)}")
             return False
@@ -97,9 +108,16 @@ class WechatIndexCollector:
                 self.logger.info(f"输入关键词: {keyword}")
                 
                 # 点击搜索按钮
-                search_button = self.driver.find_element(By.CLASS_NAME, "search-btn")
-                search_button.click()
-                time.sleep(3)
+                with self.guard.request('搜索'):
+                    search_button = self.driver.find_element(By.CLASS_NAME, "search-btn")
+                    self.waiter.arm()
+                    search_button.click()
+                    self.waiter.until(
+                        'wechat_search',
+                        network_idle(),
+                        chart_rendered('.index-chart'),
+                        required=False
+                    )
                 
                 # 获取数据
                 keyword_data = self.get_wechat_index_data(keyword)
@@ -108,6 +126,8 @@ class WechatIndexCollector:
             
             return True
             
+        except (CircuitOpenError, ThrottledError):
+            raise
         except Exception as e:
             self.logger.error(f"搜索关键词失败: {str(e)}")
             return False
@@ -175,7 +195,11 @@ class WechatIndexCollector:
                 EC.element_to_be_clickable((By.CLASS_NAME, "date-picker"))
             )
             date_picker.click()
-            time.sleep(2)
+            self.waiter.until(
+                'date_picker',
+                EC.visibility_of_element_located((By.CLASS_NAME, "start-date")),
+                required=False
+            )
             
             # 设置开始日期
             start_input = self.driver.find_element(By.CLASS_NAME, "start-date")
@@ -189,8 +213,14 @@ class WechatIndexCollector:
             
             # 确认
             confirm_btn = self.driver.find_element(By.CLASS_NAME, "date-confirm")
+            self.waiter.arm()
             confirm_btn.click()
-            time.sleep(3)
+            self.waiter.until(
+                'date_range',
+                network_idle(),
+                chart_rendered('.index-chart'),
+                required=False
+            )
             
             self.logger.info(f"已设置日期范围: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
             
@@ -204,8 +234,14 @@ class WechatIndexCollector:
             filename = f"{filename_prefix}_{timestamp}.png"
             filepath = os.path.join(SCREENSHOTS_DIR, filename)
             
-            # 等待页面加载
-            time.sleep(SCREENSHOT_CONFIG['wechat']['wait_time'])
+            # 等待页面就绪
+            self.waiter.until(
+                'wechat_screenshot',
+                dom_ready(),
+                network_idle(),
+                timeout=SCREENSHOT_CONFIG['wechat']['wait_time'],
+                required=False
+            )
             
             # 截图
             if SCREENSHOT_CONFIG['wechat']['full_page']:
@@ -213,6 +249,7 @@ class WechatIndexCollector:
             else:
                 self.driver.get_screenshot_as_file(filepath)
             
+            get_catalog().register(filepath, source='wechat')
             self.logger.info(f"截图已保存: {filepath}")
             return filepath
             
@@ -220,11 +257,12 @@ class WechatIndexCollector:
             self.logger.error(f"截图失败: {str(e)}")
             return None
     
-    def simulate_manual_collection(self, start_date, end_date):
+    def simulate_manual_collection(self, start_date, end_date, keywords=None):
         """
         模拟手动收集方式
         由于微信指数小程序的限制，提供手动收集的辅助工具
         """
+        keywords = keywords or KEYWORDS['wechat']
         try:
             self.logger.info("启动手动收集辅助模式")
             
@@ -242,7 +280,7 @@ class WechatIndexCollector:
                         <ul style="font-size: 16px; line-height: 1.8;">
             """ % (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
             
-            for keyword in KEYWORDS['wechat']:
+            for keyword in keywords:
                 js_script += f"<li>{keyword}</li>"
             
             js_script += """
@@ -275,7 +313,7 @@ class WechatIndexCollector:
                 'method': 'manual',
                 'screenshot': screenshot_path,
                 'guide': 'manual_collection_guide',
-                'keywords': KEYWORDS['wechat'],
+                'keywords': keywords,
                 'date_range': {
                     'start': start_date.strftime('%Y-%m-%d'),
                     'end': end_date.strftime('%Y-%m-%d')
@@ -286,11 +324,18 @@ class WechatIndexCollector:
             self.logger.error(f"手动收集模式失败: {str(e)}")
             return None
     
-    def collect_wechat_index_data(self, start_date, end_date):
-        """收集微信指数数据"""
+    def collect_wechat_index_data(self, start_date, end_date, keywords=None, interactive=True):
+        """
+        收集微信指数数据，keywords为空时使用配置中的关键词
+        interactive为False时网页版不可用直接返回None，不进入需要按回车继续的手动收集模式
+        """
+        keywords = keywords or KEYWORDS['wechat']
         try:
             self.logger.info("开始收集微信指数数据")
             
+            # 熔断期间不启动浏览器
+            self.guard.check()
+            
             # 1. 设置浏览器
             self.setup_driver()
             
@@ -299,7 +344,7 @@ class WechatIndexCollector:
             
             if web_success:
                 # 3. 搜索关键词
-                self.search_keywords_in_web(KEYWORDS['wechat'])
+                self.search_keywords_in_web(keywords)
                 
                 # 4. 设置日期范围
                 self.set_date_range(start_date, end_date)
@@ -314,20 +359,32 @@ class WechatIndexCollector:
                     'date_range': {
                         'start': start_date.strftime('%Y-%m-%d'),
                         'end': end_date.strftime('%Y-%m-%d')
-                    }
+                    },
+                    'wait_timings': self.waiter.summary()
                 }
             else:
                 # 如果网页版不可用，启动手动收集辅助模式
+                if not interactive:
+                    self.logger.warning("微信指数网页版不可用，非交互模式下不启动手动收集")
+                    return None
                 self.logger.warning("微信指数网页版不可用，启动手动收集辅助模式")
-                result = self.simulate_manual_collection(start_date, end_date)
+                result = self.simulate_manual_collection(start_date, end_date, keywords)
             
             self.logger.info("微信指数数据收集完成")
             return result
             
+        except (CircuitOpenError, ThrottledError) as e:
+            self.logger.error(f"收集微信指数数据失败: {str(e)}")
+            self._driver_broken = True
+            raise
         except Exception as e:
             self.logger.error(f"收集微信指数数据失败: {str(e)}")
+            # 出错的会话状态不可信，归还时回收
+            self._driver_broken = True
+            if not interactive:
+                return None
             # 失败后启动手动收集模式
-            return self.simulate_manual_collection(start_date, end_date)
+            return self.simulate_manual_collection(start_date, end_date, keywords)
         finally:
             self.close_driver()
 
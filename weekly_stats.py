@@ -0,0 +1,45 @@
+"""
+每周平均值计算
+一次计算ISO周键，对所有关键词在一次groupby/transform中求出逐行对齐的周平均值
+"""
+
+import numpy as np
+import pandas as pd
+
+def to_day_numbers(dates):
+    """日期序列转为距1970-01-01的天数（int64数组）"""
+    values = pd.DatetimeIndex(pd.to_datetime(dates)).values.astype('datetime64[D]')
+    return values.astype(np.int64)
+
+def week_start_days(dates):
+    """
+    每个日期所在ISO周的周一（天数），可直接作为周分组键
+    1970-01-01是周四，(天数 + 3) % 7 即为周一起算的星期序号
+    """
+    days = to_day_numbers(dates)
+    return days - (days + 3) % 7
+
+def iso_week_bounds(start_date, end_date):
+    """
+    把日期范围扩展到首尾两周的完整ISO周（周一到周日）
+    报告和导出的每周平均值都按完整ISO周计算，边界周不会只按范围内的几天平均
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize()
+    return start - pd.Timedelta(days=start.weekday()), end + pd.Timedelta(days=6 - end.weekday())
+
+def _numeric(values):
+    """确保所有列为数值类型，非数值转为NaN"""
+    if all(pd.api.types.is_numeric_dtype(dtype) for dtype in values.dtypes):
+        return values
+    return values.apply(pd.to_numeric, errors='coerce')
+
+def weekly_average_frame(dates, values):
+    """
+    计算逐行对齐的周平均值
+    dates: 日期序列；values: 以关键词为列的DataFrame（行与dates对齐）
+    返回与values同形状的DataFrame，每个单元格为所在ISO周的均值（忽略缺失值）
+    """
+    values = _numeric(values)
+    keys = week_start_days(dates)
+    return values.groupby(keys).transform('mean')